@@ -1,22 +1,54 @@
-import base64
+import asyncio
+import hashlib
+import io
 import json
 import logging
+import math
+import mimetypes
+import time
+import zipfile
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterator, List, Literal, Optional, Tuple, TypeVar
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-from .llm import generate_pack
-from .pdf_utils import build_single_page_pdf
-from .schemas import GenerateRequest, GenerateResponse
+from . import pack_service
+from .assets import ImageAsset, ImageValue, as_image_asset, is_valid_digest, map_pack_images
+from .deadline import deadline_scope
+from .gemini_client import close_client
+from .jobs import JOB_DONE, JOB_FAILED, PRIORITY_BATCH, JobQueue
+from .llm import image_breaker, stream_pack
+from .metrics import CACHE_LOOKUPS, Gauge, registry
+from .pack_cache import SingleFlight, pack_cache_key
+from .pdf_bundle import PdfBundleWriter
+from .pdf_pool import PdfRenderPool, PdfRenderQueueFull
+from .progress import progress_reporter
+from .rate_limit import yield_to_interactive
+from .renditions import RenditionCache
+from .schemas import (
+    BatchAccepted,
+    BatchItemStatus,
+    BatchRequest,
+    BatchStatus,
+    BundleRequest,
+    GenerateRequest,
+    GenerateResponse,
+    JobAccepted,
+    JobStatus,
+)
 from .settings import settings
+from .timing import collect_timings, timed_stage
 
 logger = logging.getLogger("tohu-kaiako")
 logging.basicConfig(level=logging.INFO)
 
+T = TypeVar("T")
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 templates = Jinja2Templates(directory=str(BASE_DIR / "frontend" / "templates"))
 
@@ -30,6 +62,32 @@ app.add_middleware(
 
 app.mount("/static", StaticFiles(directory=str(BASE_DIR / "frontend" / "static")), name="static")
 
+# Streamed generations bypass pack_flights (events cannot be shared) but still count as in flight
+pack_streams_in_flight = 0
+pdf_flights = SingleFlight()
+rendition_cache = RenditionCache(
+    Path(settings.cache_dir) / "renditions",
+    max_bytes=settings.rendition_cache_max_bytes,
+    ttl_secs=settings.asset_store_ttl_secs,
+)
+job_queue = JobQueue(Path(settings.job_queue_path), lease_secs=settings.job_lease_secs)
+pdf_pool = PdfRenderPool(max_workers=settings.pdf_workers, max_queue=settings.pdf_max_queue)
+
+# Read at scrape time through the module globals, so swapped-in instances are reported
+registry.register(Gauge("tohu_packs_in_flight", "Pack generations currently running.", lambda: pack_service.pack_flights.in_flight() + pack_streams_in_flight))
+registry.register(Gauge("tohu_pdf_renders_in_flight", "PDF renders running or queued.", lambda: pdf_pool.in_flight))
+registry.register(Gauge("tohu_pdf_queue_depth", "PDF renders waiting for a free worker.", lambda: pdf_pool.queue_depth))
+registry.register(Gauge("tohu_job_queue_depth", "Queued jobs waiting for a worker process.", lambda: job_queue.depth()))
+registry.register(
+    Gauge("tohu_image_circuit_open", "1 while the image circuit breaker is rejecting calls.", lambda: image_breaker.state == "open")
+)
+
+
+@app.on_event("shutdown")
+async def _shutdown_pools() -> None:
+    pdf_pool.shutdown()
+    await close_client()
+
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request) -> HTMLResponse:
@@ -49,38 +107,603 @@ async def index(request: Request) -> HTMLResponse:
     return templates.TemplateResponse("index.html", context)
 
 
-@app.post("/api/generate_pack", response_model=GenerateResponse)
-async def api_generate_pack(req: GenerateRequest) -> GenerateResponse:
-    try:
-        pack_payload = await generate_pack(req.theme, req.level, req.keywords or "", req.subject, req.activity)
-        scene_images = pack_payload.get("scene_images") or {}
-        sentence_en = pack_payload["sentence_en"]
-        sentence_nzsl = pack_payload["sentence_nzsl"]
-        
-        pdf_bytes = build_single_page_pdf(
+def _pdf_renditions(scene_images: Dict[str, ImageValue]) -> Dict[str, ImageAsset]:
+    """Swap full-size images for the print-sized JPEG renditions the PDF embeds."""
+    renditions = {}
+    for slot, image in scene_images.items():
+        asset = as_image_asset(image)
+        if asset is not None:
+            renditions[slot] = ImageAsset(*rendition_cache.get_or_create(asset.data, asset.mime_type, "pdf"))
+    return renditions
+
+
+async def _render_pdf(pack_payload: Dict[str, Any]) -> bytes:
+    """Build the one-page handout for a finished pack in the PDF process pool."""
+    scene_images = await asyncio.to_thread(_pdf_renditions, pack_payload.get("scene_images") or {})
+    sentence_en = pack_payload["sentence_en"]
+    sentence_nzsl = pack_payload["sentence_nzsl"]
+    
+    with timed_stage("pdf_render"):
+        return await pdf_pool.render(
             theme=pack_payload["theme"],
             images=scene_images,
             sentence_nzsl=sentence_nzsl,
             sentence_en=sentence_en,
         )
-        pdf_base64 = base64.b64encode(pdf_bytes).decode("ascii")
-        
-        pack_payload["pdf_base64"] = pdf_base64
-        return GenerateResponse(**pack_payload)
+
+
+@contextmanager
+def _streaming_pack() -> Iterator[None]:
+    global pack_streams_in_flight
+    pack_streams_in_flight += 1
+    try:
+        with timed_stage("pack"):
+            yield
+    finally:
+        pack_streams_in_flight -= 1
+
+
+async def run_job(job: Dict[str, Any]) -> None:
+    """
+    Execute a claimed job from `job_queue`, recording progress and the final
+    response. Batch jobs leave rate-limit headroom for interactive requests
+    and keep their result small by referencing images in the asset store.
+    """
+    job_id = job["job_id"]
+    is_batch = job.get("priority", 0) >= PRIORITY_BATCH
+    
+    def _record(stage: str, fraction: float) -> None:
+        job_queue.update_progress(job_id, stage, fraction)
+    
+    try:
+        req = GenerateRequest(**job["request"])
+        timeout = settings.batch_item_timeout_secs if is_batch else settings.timeout_secs
+        reserve = settings.batch_reserve_tokens if is_batch else 0.0
+        with progress_reporter(_record), deadline_scope(timeout), yield_to_interactive(reserve):
+            pack_payload = await pack_service.cached_pack_payload(req)
+        pack_payload = await asyncio.to_thread(_encode_images, pack_payload, "ref" if is_batch else "inline")
+        response = GenerateResponse(**pack_payload)
+        await asyncio.to_thread(job_queue.complete, job_id, response.model_dump())
+    except Exception as exc:
+        logger.error("Pack job failed", extra={"job_id": job_id, "error": str(exc)}, exc_info=True)
+        await asyncio.to_thread(job_queue.fail, job_id, _error_detail(exc))
+
+
+def _error_detail(exc: Exception) -> str:
+    """Provide more specific error messages for generation failures."""
+    if isinstance(exc, PdfRenderQueueFull):
+        return "The server is busy preparing other packs. Please try again shortly."
+    error_msg = str(exc)
+    if "401" in error_msg or "Unauthorized" in error_msg:
+        return "API authentication failed. Please check your Google Generative AI API key and project billing."
+    if "429" in error_msg or "rate limit" in error_msg.lower():
+        return "Rate limit exceeded. Please wait a moment and try again."
+    if "timeout" in error_msg.lower():
+        return "Request timed out. Please try again."
+    if "Invalid" in error_msg and "response" in error_msg:
+        return "Invalid response from AI service. Please try again."
+    return f"Generation failed: {error_msg}"
+
+
+ImageMode = Literal["inline", "ref"]
+
+
+class ClientDisconnected(Exception):
+    """The HTTP client went away before its pack was ready."""
+
+
+async def _cancel_on_disconnect(request: Request, work: Awaitable[T], poll_secs: float = 0.5) -> T:
+    """Await `work`, cancelling it if the client disconnects first."""
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_secs)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info("Client disconnected; cancelling pack generation")
+                task.cancel()
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def _inline_image(image: ImageValue, memo: Dict[str, str]) -> ImageValue:
+    """Encode a raw image as a data URL, once per distinct image."""
+    if not isinstance(image, ImageAsset):
+        return image
+    if image.digest not in memo:
+        memo[image.digest] = image.to_data_url()
+    return memo[image.digest]
+
+
+def _externalise_image(image: ImageValue, memo: Dict[str, str]) -> Tuple[ImageValue, ImageValue]:
+    """
+    Move an image to the asset store and return `(thumbnail_url,
+    original_url)`. Values that are not images come back unchanged.
+    """
+    asset = as_image_asset(image)
+    if asset is None:
+        return image, image
+    if asset.digest not in memo:
+        memo[asset.digest] = pack_service.asset_store.url_for_asset(asset)
+    thumb_key = f"{asset.digest}#thumb"
+    if thumb_key not in memo:
+        memo[thumb_key] = pack_service.asset_store.url_for(*rendition_cache.get_or_create(asset.data, asset.mime_type, "thumb"))
+    return memo[thumb_key], memo[asset.digest]
+
+
+def _encode_images(
+    pack_payload: Dict[str, Any],
+    image_mode: ImageMode,
+    memo: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Encode a pack's raw images for the client: as data URLs (`inline`), or
+    as `/api/assets/{digest}` URLs (`ref`) where cards get a WebP thumbnail
+    with the full-size original alongside in `image_original_url`. Inline
+    only base64-encodes each distinct image once and never touches the
+    asset store; it remains the default of `/api/generate_pack` for
+    compatibility, while the stream endpoint defaults to `ref`.
+    """
+    memo = {} if memo is None else memo
+    with timed_stage("image_encode"):
+        if image_mode == "inline":
+            return map_pack_images(pack_payload, lambda image: _inline_image(image, memo))
+        encoded = dict(pack_payload)
+        pack_content = []
+        for item in pack_payload.get("pack_content", []):
+            thumb_url, original_url = _externalise_image(item.get("image_data_url"), memo)
+            pack_content.append({**item, "image_data_url": thumb_url, "image_original_url": original_url})
+        encoded["pack_content"] = pack_content
+        if pack_payload.get("scene_images"):
+            encoded["scene_images"] = {
+                slot: _externalise_image(image, memo)[1] for slot, image in pack_payload["scene_images"].items()
+            }
+        return encoded
+
+
+def _encode_image_event(data: Dict[str, Any], image_mode: ImageMode, memo: Dict[str, str]) -> Dict[str, Any]:
+    if image_mode == "inline":
+        return {**data, "image_data_url": _inline_image(data["image_data_url"], memo)}
+    thumb_url, original_url = _externalise_image(data["image_data_url"], memo)
+    return {**data, "image_data_url": thumb_url, "image_original_url": original_url}
+
+
+def _sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/generate_pack", response_model=GenerateResponse)
+async def api_generate_pack(
+    req: GenerateRequest,
+    request: Request,
+    response: Response,
+    image_mode: ImageMode = "inline",
+) -> GenerateResponse:
+    """
+    Generate a pack. Images come back as data URLs by default, exactly as
+    generated, so existing clients are unaffected; `image_mode=ref` returns
+    asset URLs with WebP thumbnails instead.
+    """
+    try:
+        with collect_timings() as timings:
+            with deadline_scope(settings.timeout_secs):
+                pack_payload = await _cancel_on_disconnect(request, pack_service.cached_pack_payload(req))
+            pack_payload = await asyncio.to_thread(_encode_images, pack_payload, image_mode)
+            with timed_stage("response_validation"):
+                validated = GenerateResponse(**pack_payload)
+        response.headers["Server-Timing"] = timings.server_timing()
+        return validated
     except HTTPException:
         raise
+    except ClientDisconnected as exc:
+        # Nobody is listening; 499 follows the nginx convention for logs
+        raise HTTPException(status_code=499, detail="Client closed request.") from exc
     except Exception as exc:  # pragma: no cover - defensive logging
         logger.error("Pack generation failed", extra={"error": str(exc)}, exc_info=True)
-        # Provide more specific error messages
-        error_msg = str(exc)
-        if "401" in error_msg or "Unauthorized" in error_msg:
-            detail = "API authentication failed. Please check your Google Generative AI API key and project billing."
-        elif "429" in error_msg or "rate limit" in error_msg.lower():
-            detail = "Rate limit exceeded. Please wait a moment and try again."
-        elif "timeout" in error_msg.lower():
-            detail = "Request timed out. Please try again."
-        elif "Invalid" in error_msg and "response" in error_msg:
-            detail = "Invalid response from AI service. Please try again."
-        else:
-            detail = f"Generation failed: {error_msg}"
-        raise HTTPException(status_code=500, detail=detail) from exc
+        quota_error = pack_service.quota_error(exc)
+        if quota_error is not None:
+            retry_after = math.ceil(quota_error.retry_after or settings.quota_backoff_base_secs)
+            raise HTTPException(
+                status_code=429,
+                detail=_error_detail(exc),
+                headers={"Retry-After": str(retry_after)},
+            ) from exc
+        raise HTTPException(status_code=500, detail=_error_detail(exc)) from exc
+
+
+@app.post("/api/generate_pack/stream")
+async def api_generate_pack_stream(req: GenerateRequest, image_mode: ImageMode = "ref") -> StreamingResponse:
+    """
+    Stream a pack as Server-Sent Events: `text` once the text call returns,
+    one `image` per finished image, then `pack` with the full response. The
+    PDF is available from the pack's `pdf_url`. Failures are reported as an
+    `error` event. Images are asset URLs with WebP thumbnails unless
+    `image_mode=inline` asks for data URLs.
+    """
+    key = pack_cache_key(req)
+    memo: Dict[str, str] = {}
+    
+    async def _events() -> AsyncIterator[str]:
+        # Starlette cancels this generator when the client disconnects, which
+        # closes stream_pack and cancels its outstanding image tasks.
+        with deadline_scope(settings.timeout_secs), collect_timings() as timings:
+            try:
+                pack_payload = await asyncio.to_thread(pack_service.load_cached_pack, key)
+                CACHE_LOOKUPS.inc(cache="pack", result="miss" if pack_payload is None else "hit")
+                if pack_payload is None:
+                    with _streaming_pack():
+                        events = stream_pack(req.theme, req.level, req.keywords or "", req.subject, req.activity)
+                        try:
+                            async for event in events:
+                                if event["event"] == "pack":
+                                    pack_payload = event["data"]
+                                    continue
+                                if event["event"] == "image":
+                                    event["data"] = await asyncio.to_thread(
+                                        _encode_image_event, event["data"], image_mode, memo
+                                    )
+                                yield _sse(event["event"], event["data"])
+                        finally:
+                            await events.aclose()
+                        pack_payload = await pack_service.finalise_pack(key, pack_payload)
+                    await pack_service.record_cost(req, pack_payload, timings)
+                
+                pack_payload = await asyncio.to_thread(_encode_images, pack_payload, image_mode, memo)
+                yield _sse("pack", GenerateResponse(**pack_payload).model_dump())
+            except Exception as exc:
+                logger.error("Streaming pack generation failed", extra={"error": str(exc)}, exc_info=True)
+                yield _sse("error", {"detail": _error_detail(exc)})
+    
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/jobs", response_model=JobAccepted, status_code=202)
+async def api_create_job(req: GenerateRequest) -> JobAccepted:
+    """Queue a pack for a worker process (`python -m backend.worker`) and return immediately."""
+    job_id = await asyncio.to_thread(job_queue.enqueue, req.model_dump())
+    return JobAccepted(job_id=job_id, status="queued", status_url=f"/api/jobs/{job_id}")
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatus)
+async def api_get_job(job_id: str) -> JobStatus:
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return JobStatus(**job)
+
+
+def _batch_status(batch_id: str, jobs: List[Dict[str, Any]]) -> BatchStatus:
+    items = []
+    for position, job in enumerate(jobs):
+        result = job.get("result") or {}
+        items.append(
+            BatchItemStatus(
+                position=position,
+                job_id=job["job_id"],
+                theme=job["request"].get("theme", ""),
+                status=job["status"],
+                stage=job["stage"],
+                progress=job["progress"],
+                pack_id=result.get("pack_id"),
+                pdf_url=result.get("pdf_url"),
+                error=job.get("error"),
+            )
+        )
+    completed = sum(1 for item in items if item.status == JOB_DONE)
+    failed = sum(1 for item in items if item.status == JOB_FAILED)
+    finished = completed + failed == len(items)
+    if finished:
+        status = "done"
+    elif any(item.status != "queued" for item in items):
+        status = "running"
+    else:
+        status = "queued"
+    return BatchStatus(
+        batch_id=batch_id,
+        status=status,
+        total=len(items),
+        completed=completed,
+        failed=failed,
+        progress=round(sum(1.0 if item.status == JOB_FAILED else item.progress for item in items) / len(items), 3),
+        items=items,
+        pdf_url=f"/api/batches/{batch_id}/pdf" if finished else None,
+        zip_url=f"/api/batches/{batch_id}/zip" if finished else None,
+    )
+
+
+async def _finished_batch(batch_id: str) -> List[Dict[str, Any]]:
+    """Load a batch's jobs, raising 404 if unknown and 409 while items are still running."""
+    jobs = await asyncio.to_thread(job_queue.get_batch, batch_id)
+    if jobs is None:
+        raise HTTPException(status_code=404, detail="Batch not found.")
+    if any(job["status"] not in (JOB_DONE, JOB_FAILED) for job in jobs):
+        raise HTTPException(status_code=409, detail="Batch is still running.")
+    return jobs
+
+
+def _load_batch_packs(jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Load the stored pack of every successful item, in submission order, images still by reference."""
+    loaded: Dict[str, Optional[Dict[str, Any]]] = {}
+    packs = []
+    for job in jobs:
+        pack_id = (job.get("result") or {}).get("pack_id") if job["status"] == JOB_DONE else None
+        if pack_id is None:
+            continue
+        if pack_id not in loaded:
+            loaded[pack_id] = pack_service.pack_store.load(pack_id)
+        if loaded[pack_id] is not None:
+            packs.append(loaded[pack_id])
+    return packs
+
+
+def _resolve_image(value: Any) -> Optional[ImageAsset]:
+    """Load one stored image reference, or None if it is missing or not an image."""
+    try:
+        return as_image_asset(pack_service.asset_store.hydrate(value))
+    except KeyError:
+        logger.info(f"Image {str(value)[:40]} has been evicted; leaving its slot empty")
+        return None
+
+
+def _bundle_page(writer: PdfBundleWriter, stored: Dict[str, Any]) -> bytes:
+    """
+    Add one stored pack to a PDF bundle. Images already in the bundle are
+    reused by digest without being loaded; new ones are loaded one at a time.
+    """
+    chunks = []
+    image_keys: Dict[str, Optional[str]] = {}
+    for slot, value in (stored.get("scene_images") or {}).items():
+        key = value.get("asset") if isinstance(value, dict) else None
+        if key is None or not writer.has_image(key):
+            asset = _resolve_image(value)
+            if asset is None or asset.mime_type == "image/svg+xml":
+                continue
+            key = asset.digest
+            rendition = ImageAsset(*rendition_cache.get_or_create(asset.data, asset.mime_type, "pdf"))
+            chunks.append(writer.add_image(key, rendition))
+        image_keys[slot] = key
+    chunks.append(writer.add_page(stored["theme"], image_keys, stored["sentence_nzsl"], stored["sentence_en"]))
+    return b"".join(chunks)
+
+
+async def _stream_bundle(packs: List[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Stream a multi-page PDF, preparing and sending one pack's page at a time."""
+    writer = PdfBundleWriter()
+    started = time.perf_counter()
+    yield writer.start()
+    for stored in packs:
+        yield await asyncio.to_thread(_bundle_page, writer, stored)
+    yield writer.finish()
+    logger.info(
+        f"Streamed {writer.page_count}-page PDF bundle in {(time.perf_counter() - started) * 1000:.0f} ms",
+        extra={"images_embedded": writer.images_embedded, "images_reused": writer.images_reused},
+    )
+
+
+def _bundle_response(packs: List[Dict[str, Any]], filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        _stream_bundle(packs),
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _build_batch_zip(packs: List[Dict[str, Any]]) -> bytes:
+    """
+    Zip the combined PDF, each pack's JSON and every distinct image once,
+    with pack JSON pointing at `images/{digest}.{ext}` inside the archive.
+    Images are loaded one at a time.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        writer = PdfBundleWriter()
+        with archive.open("term-plan.pdf", "w") as pdf:
+            pdf.write(writer.start())
+            for stored in packs:
+                pdf.write(_bundle_page(writer, stored))
+            pdf.write(writer.finish())
+        written: Dict[str, str] = {}
+        
+        def _to_path(value: Any) -> Any:
+            key = value.get("asset") if isinstance(value, dict) else None
+            if key in written:
+                return written[key]
+            asset = _resolve_image(value)
+            if asset is None:
+                return None if key else value
+            if asset.digest not in written:
+                extension = mimetypes.guess_extension(asset.mime_type) or ".bin"
+                written[asset.digest] = f"images/{asset.digest}{extension}"
+                # Raster images are already compressed
+                compress = zipfile.ZIP_DEFLATED if asset.mime_type == "image/svg+xml" else zipfile.ZIP_STORED
+                archive.writestr(written[asset.digest], asset.data, compress_type=compress)
+            return written[asset.digest]
+        
+        for number, stored in enumerate(packs, start=1):
+            document = map_pack_images(stored, _to_path)
+            archive.writestr(f"packs/{number:02d}-{stored['pack_id']}.json", json.dumps(document, indent=2))
+    return buffer.getvalue()
+
+
+@app.post("/api/batches", response_model=BatchAccepted, status_code=202)
+async def api_create_batch(batch: BatchRequest) -> BatchAccepted:
+    """
+    Queue a term plan for the workers at batch priority. Identical requests
+    share one job; images shared between packs are generated once.
+    """
+    if len(batch.items) > settings.batch_max_items:
+        raise HTTPException(status_code=422, detail=f"A batch may contain at most {settings.batch_max_items} packs.")
+    requests = [item.model_dump() for item in batch.items]
+    keys = [pack_cache_key(item) for item in batch.items]
+    batch_id = await asyncio.to_thread(job_queue.enqueue_batch, requests, keys)
+    return BatchAccepted(
+        batch_id=batch_id,
+        status="queued",
+        status_url=f"/api/batches/{batch_id}",
+        total=len(keys),
+        unique=len(set(keys)),
+    )
+
+
+@app.get("/api/batches/{batch_id}", response_model=BatchStatus)
+async def api_get_batch(batch_id: str) -> BatchStatus:
+    jobs = await asyncio.to_thread(job_queue.get_batch, batch_id)
+    if jobs is None:
+        raise HTTPException(status_code=404, detail="Batch not found.")
+    return _batch_status(batch_id, jobs)
+
+
+@app.get("/api/batches/{batch_id}/pdf")
+async def api_get_batch_pdf(batch_id: str) -> StreamingResponse:
+    """Stream one PDF with a handout page per successful pack, in submission order."""
+    jobs = await _finished_batch(batch_id)
+    packs = await asyncio.to_thread(_load_batch_packs, jobs)
+    if not packs:
+        raise HTTPException(status_code=404, detail="No packs in this batch are available.")
+    return _bundle_response(packs, f"{batch_id}.pdf")
+
+
+@app.get("/api/batches/{batch_id}/zip")
+async def api_get_batch_zip(batch_id: str) -> Response:
+    """The combined PDF plus every pack's JSON and images, as a zip archive."""
+    jobs = await _finished_batch(batch_id)
+    packs = await asyncio.to_thread(_load_batch_packs, jobs)
+    if not packs:
+        raise HTTPException(status_code=404, detail="No packs in this batch are available.")
+    archive = await asyncio.to_thread(_build_batch_zip, packs)
+    return Response(
+        content=archive,
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{batch_id}.zip"'},
+    )
+
+
+@app.post("/api/packs/bundle")
+async def api_bundle_packs(bundle: BundleRequest) -> StreamingResponse:
+    """Stream stored packs as one multi-page PDF, a handout page each, in the order given."""
+    if len(bundle.pack_ids) > settings.batch_max_items:
+        raise HTTPException(status_code=422, detail=f"A bundle may contain at most {settings.batch_max_items} packs.")
+    packs = []
+    for pack_id in bundle.pack_ids:
+        stored = await asyncio.to_thread(pack_service.pack_store.load, pack_id)
+        if stored is None:
+            raise HTTPException(status_code=404, detail=f"Pack {pack_id} not found.")
+        packs.append(stored)
+    return _bundle_response(packs, "tohu-kaiako-bundle.pdf")
+
+
+@app.get("/api/assets/{digest}")
+async def api_get_asset(digest: str, request: Request) -> Response:
+    """Serve a content-addressed image or PDF with immutable caching headers."""
+    if not is_valid_digest(digest):
+        raise HTTPException(status_code=404, detail="Asset not found.")
+    headers = {
+        "ETag": f'"{digest}"',
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if f'"{digest}"' in if_none_match or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    asset = await asyncio.to_thread(pack_service.asset_store.get, digest)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Asset not found.")
+    data, mime_type = asset
+    return Response(content=data, media_type=mime_type, headers=headers)
+
+
+def _parse_byte_range(range_header: str, size: int) -> Tuple[int, int]:
+    """
+    Parse a single `bytes=start-end` range into inclusive offsets.
+    Raises ValueError for malformed or unsatisfiable ranges.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        raise ValueError("Only single byte ranges are supported")
+    start_text, _, end_text = spec.strip().partition("-")
+    if not start_text:
+        length = int(end_text)
+        if length <= 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size or end < start:
+        raise ValueError("Unsatisfiable range")
+    return start, min(end, size - 1)
+
+
+@app.get("/api/packs/{pack_id}/pdf")
+async def api_get_pack_pdf(pack_id: str, request: Request) -> Response:
+    """Render a stored pack's PDF on first request, then serve the cached bytes."""
+    pdf_bytes = await asyncio.to_thread(pack_service.pack_store.load_pdf, pack_id)
+    server_timing: Optional[str] = None
+    if pdf_bytes is None:
+        pack_payload = await asyncio.to_thread(pack_service.load_stored_pack, pack_id)
+        if pack_payload is None:
+            raise HTTPException(status_code=404, detail="Pack not found.")
+        
+        async def _render_and_store() -> bytes:
+            started = time.perf_counter()
+            rendered = await _render_pdf(pack_payload)
+            await asyncio.to_thread(pack_service.pack_store.save_pdf, pack_id, rendered)
+            try:
+                await asyncio.to_thread(pack_service.cost_ledger.record_pdf, pack_id, time.perf_counter() - started)
+            except Exception as exc:
+                logger.warning(f"Unable to record PDF render time for {pack_id}: {exc}")
+            return rendered
+        
+        try:
+            with collect_timings() as timings:
+                pdf_bytes = await pdf_flights.do(pack_id, _render_and_store)
+            server_timing = timings.server_timing()
+        except PdfRenderQueueFull as exc:
+            raise HTTPException(status_code=503, detail=_error_detail(exc), headers={"Retry-After": "5"}) from exc
+    
+    etag = f'"{hashlib.sha256(pdf_bytes).hexdigest()[:32]}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=86400",
+        "Content-Disposition": f'inline; filename="{pack_id}.pdf"',
+    }
+    if server_timing:
+        headers["Server-Timing"] = server_timing
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == etag):
+        size = len(pdf_bytes)
+        try:
+            start, end = _parse_byte_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return Response(
+            content=pdf_bytes[start : end + 1],
+            status_code=206,
+            media_type="application/pdf",
+            headers=headers,
+        )
+    return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
+
+
+@app.get("/api/breakers")
+async def api_breakers() -> Dict[str, Any]:
+    """Circuit breaker state and recent transitions, for monitoring."""
+    return {"image": image_breaker.snapshot()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Prometheus text exposition of this process's stage latencies, counters and gauges."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
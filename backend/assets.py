@@ -0,0 +1,128 @@
+import base64
+import binascii
+import hashlib
+import re
+import urllib.parse
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from .image_cache import ImageCache
+
+ASSET_URL_PREFIX = "/api/assets/"
+
+_DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_valid_digest(digest: str) -> bool:
+    return bool(_DIGEST_PATTERN.match(digest))
+
+
+def decode_data_url(data_url: str) -> Optional[Tuple[bytes, str]]:
+    """Decode a base64 or percent-encoded data URL into `(bytes, mime_type)`."""
+    if not data_url or not data_url.startswith("data:"):
+        return None
+    header, _, encoded = data_url[5:].partition(",")
+    if not encoded:
+        return None
+    mime_type, _, params = header.partition(";")
+    try:
+        if params.endswith("base64"):
+            data = base64.b64decode(encoded)
+        else:
+            data = urllib.parse.unquote_to_bytes(encoded)
+    except (ValueError, binascii.Error):
+        return None
+    return data, mime_type or "application/octet-stream"
+
+
+@dataclass(frozen=True)
+class ImageAsset:
+    """
+    Raw image bytes as they travel through the pipeline. Packs carry these
+    until the HTTP boundary, where they become data URLs or asset URLs.
+    """
+
+    data: bytes
+    mime_type: str
+
+    @cached_property
+    def digest(self) -> str:
+        return content_digest(self.data)
+
+    def to_data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode('ascii')}"
+
+
+ImageValue = Union[ImageAsset, str, None]
+
+
+def as_image_asset(value: Any) -> Optional[ImageAsset]:
+    """Return raw image bytes for an `ImageAsset` or inline data URL, else None."""
+    if isinstance(value, ImageAsset):
+        return value
+    if isinstance(value, str):
+        decoded = decode_data_url(value)
+        if decoded is not None:
+            return ImageAsset(*decoded)
+    return None
+
+
+def map_pack_images(pack_payload: Dict[str, Any], convert: Callable[[Any], Any]) -> Dict[str, Any]:
+    """Return a shallow copy of a pack with `convert` applied to every image value."""
+    converted = dict(pack_payload)
+    if "pack_content" in pack_payload:
+        converted["pack_content"] = [
+            {**item, "image_data_url": convert(item.get("image_data_url"))} for item in pack_payload["pack_content"]
+        ]
+    if pack_payload.get("scene_images"):
+        converted["scene_images"] = {slot: convert(image) for slot, image in pack_payload["scene_images"].items()}
+    return converted
+
+
+class AssetStore(ImageCache):
+    """
+    Content-addressed store for images and PDFs served from `/api/assets/{digest}`.
+    Entries are keyed by the SHA-256 of their bytes, so a digest always names
+    exactly one immutable payload.
+    """
+
+    def put_bytes(self, data: bytes, mime_type: str) -> str:
+        """Store `data` and return its digest."""
+        digest = content_digest(data)
+        if not self.contains(digest):
+            self.put(digest, data, mime_type)
+        return digest
+
+    def url_for(self, data: bytes, mime_type: str) -> str:
+        return f"{ASSET_URL_PREFIX}{self.put_bytes(data, mime_type)}"
+
+    def url_for_asset(self, asset: ImageAsset) -> str:
+        if not self.contains(asset.digest):
+            self.put(asset.digest, asset.data, asset.mime_type)
+        return f"{ASSET_URL_PREFIX}{asset.digest}"
+
+    def dehydrate(self, value: Any) -> Any:
+        """
+        Swap an `ImageAsset` for a small `{"asset": digest}` reference so packs
+        can be stored as JSON without base64. Other values pass through.
+        """
+        if not isinstance(value, ImageAsset):
+            return value
+        if not self.enabled:
+            return value.to_data_url()
+        self.url_for_asset(value)
+        return {"asset": value.digest, "mime_type": value.mime_type}
+
+    def hydrate(self, value: Any) -> Any:
+        """Resolve a reference made by `dehydrate`; raises KeyError if it was evicted."""
+        if not (isinstance(value, dict) and "asset" in value):
+            return value
+        stored = self.get(value["asset"]) if is_valid_digest(str(value["asset"])) else None
+        if stored is None:
+            raise KeyError(value["asset"])
+        return ImageAsset(*stored)
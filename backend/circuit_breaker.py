@@ -0,0 +1,138 @@
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger("tohu-kaiako")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker over a rolling window of recent calls.
+
+    Calls slower than `slow_call_secs` count as failures. Once at least
+    `min_calls` are in the window and the failure rate reaches
+    `failure_rate_threshold` the breaker opens and rejects calls for
+    `cooldown_secs`. It then goes half-open and lets roughly
+    `probe_ratio` of requests through, one at a time; `probe_successes`
+    consecutive successes close it again and any failure reopens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_size: int = 20,
+        min_calls: int = 8,
+        failure_rate_threshold: float = 0.5,
+        slow_call_secs: float = 30.0,
+        cooldown_secs: float = 30.0,
+        probe_ratio: float = 0.1,
+        probe_successes: int = 2,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_secs = slow_call_secs
+        self.cooldown_secs = cooldown_secs
+        self.probe_ratio = probe_ratio
+        self.probe_successes = probe_successes
+        self._clock = clock
+        self._rng = rng
+        self._window: Deque[bool] = deque(maxlen=window_size)  # True = failed
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_streak = 0
+        self.rejected = 0
+        self.transitions: Deque[Dict[str, Any]] = deque(maxlen=50)
+
+    def _transition(self, new_state: str, reason: str) -> None:
+        if new_state == self._state:
+            return
+        record = {"at": time.time(), "from": self._state, "to": new_state, "reason": reason}
+        self.transitions.append(record)
+        log = logger.warning if new_state == OPEN else logger.info
+        log(f"Circuit {self.name}: {self._state} -> {new_state} ({reason})")
+        self._state = new_state
+        if new_state == OPEN:
+            self._opened_at = self._clock()
+        if new_state != HALF_OPEN:
+            self._probe_in_flight = False
+            self._probe_streak = 0
+        if new_state == CLOSED:
+            self._window.clear()
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.cooldown_secs:
+            self._transition(HALF_OPEN, "cooldown elapsed")
+        return self._state
+
+    def failure_rate(self) -> float:
+        if not self._window:
+            return 0.0
+        return sum(self._window) / len(self._window)
+
+    def allow_request(self) -> bool:
+        """Return True if a call may go to the protected dependency."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probe_in_flight and self._rng() < self.probe_ratio:
+            self._probe_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self, latency_secs: float) -> None:
+        if latency_secs > self.slow_call_secs:
+            self.record_failure(f"slow call ({latency_secs:.1f}s)")
+            return
+        if self._state == HALF_OPEN:
+            self._probe_in_flight = False
+            self._probe_streak += 1
+            if self._probe_streak >= self.probe_successes:
+                self._transition(CLOSED, f"{self._probe_streak} successful probes")
+            return
+        self._window.append(False)
+
+    def record_failure(self, reason: str = "error") -> None:
+        if self._state == HALF_OPEN:
+            self._transition(OPEN, f"probe failed: {reason}")
+            return
+        self._window.append(True)
+        if (
+            self._state == CLOSED
+            and len(self._window) >= self.min_calls
+            and self.failure_rate() >= self.failure_rate_threshold
+        ):
+            self._transition(OPEN, f"failure rate {self.failure_rate():.0%} ({reason})")
+
+    def record_abandoned(self) -> None:
+        """A permitted call was cancelled before it finished; count nothing."""
+        if self._state == HALF_OPEN:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state and recent transitions, for monitoring."""
+        state = self.state
+        remaining: Optional[float] = None
+        if state == OPEN:
+            remaining = max(0.0, self.cooldown_secs - (self._clock() - self._opened_at))
+        transitions: List[Dict[str, Any]] = list(self.transitions)[-10:]
+        return {
+            "name": self.name,
+            "state": state,
+            "failure_rate": round(self.failure_rate(), 3),
+            "window_calls": len(self._window),
+            "rejected": self.rejected,
+            "cooldown_remaining_secs": remaining,
+            "transitions": transitions,
+        }
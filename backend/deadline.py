@@ -0,0 +1,51 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+class Deadline:
+    """A fixed point in (monotonic) time by which a request's work must finish."""
+
+    def __init__(self, budget_secs: float) -> None:
+        self.budget_secs = budget_secs
+        self.expires_at = time.monotonic() + budget_secs
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("tohu_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def remaining_time(default: float) -> float:
+    """Seconds left on the current deadline, capped at `default` (used when there is none)."""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    return min(default, deadline.remaining())
+
+
+@contextmanager
+def deadline_scope(budget_secs: float) -> Iterator[Deadline]:
+    """
+    Bound all work started in this context (including tasks it spawns) by
+    `budget_secs`. A nested scope can only shorten an outer deadline.
+    """
+    deadline = Deadline(budget_secs)
+    outer = _current_deadline.get()
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline = outer
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
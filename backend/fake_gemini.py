@@ -0,0 +1,170 @@
+"""
+Local stand-in for the Gemini `generateContent` and `streamGenerateContent`
+REST methods, for load tests that must not spend real quota.
+
+    python -m backend.fake_gemini --port 8100 --image-latency-ms 3000 --quota-rate 0.05
+    GEMINI_BASE_URL=http://127.0.0.1:8100 uvicorn backend.app:app
+"""
+import argparse
+import asyncio
+import base64
+import io
+import json
+import random
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from .settings import settings
+
+
+@dataclass
+class FakeGeminiConfig:
+    """Latencies are log-normal around the given medians; rates are per call."""
+
+    text_latency_ms: float = 800.0
+    image_latency_ms: float = 3000.0
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    quota_rate: float = 0.0
+    retry_after_secs: float = 1.0
+    image_bytes: int = 200_000
+    image_model: str = settings.image_model
+    seed: Optional[int] = None
+
+
+@lru_cache(maxsize=8)
+def fake_png(approx_bytes: int) -> bytes:
+    """A noise PNG of roughly `approx_bytes`, so PDF rendering does real work."""
+    from PIL import Image
+
+    side = max(8, int((approx_bytes / 3) ** 0.5))
+    noise = random.Random(approx_bytes).randbytes(side * side * 3)
+    buffer = io.BytesIO()
+    Image.frombytes("RGB", (side, side), noise).save(buffer, format="PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def _fake_pack_json(prompt: str) -> str:
+    match = re.search(r'theme: "([^"]*)"', prompt)
+    theme = match.group(1) if match else "Birds"
+    return json.dumps(
+        {
+            "semantic_components": [
+                {"type": "noun", "label": theme, "nzsl_sign": "THEME_SIGN", "semantic_role": "Who"},
+                {"type": "verb", "label": "Play", "nzsl_sign": "PLAY", "semantic_role": "What"},
+                {"type": "location", "label": "Garden", "nzsl_sign": "GARDEN", "semantic_role": "Where"},
+            ],
+            "language_steps": [f"Noun: {theme} (THEME_SIGN)", "Verb: Play (PLAY)", "Location: Garden (GARDEN)"],
+        }
+    )
+
+
+def create_app(config: FakeGeminiConfig) -> FastAPI:
+    fake = FastAPI(title="Fake Gemini")
+    rng = random.Random(config.seed)
+    stats: Dict[str, int] = {"requests": 0, "errors": 0, "throttled": 0}
+
+    @fake.get("/healthz")
+    async def healthz() -> Dict[str, Any]:
+        return {"ok": True, **stats}
+
+    @fake.post("/v1beta/models/{model_action}")
+    async def generate_content(model_action: str, request: Request) -> Response:
+        model, _, action = model_action.partition(":")
+        if action not in ("generateContent", "streamGenerateContent"):
+            return JSONResponse({"error": {"message": f"Unsupported action {action}"}}, status_code=404)
+        streaming = action == "streamGenerateContent"
+        body = await request.json()
+        prompt = "".join(part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", []))
+        stats["requests"] += 1
+        is_image = model == config.image_model or "image" in model
+
+        if rng.random() < config.quota_rate:
+            stats["throttled"] += 1
+            return JSONResponse(
+                {"error": {"code": 429, "message": "Resource has been exhausted", "status": "RESOURCE_EXHAUSTED"}},
+                status_code=429,
+                headers={"Retry-After": str(config.retry_after_secs)},
+            )
+
+        median_ms = config.image_latency_ms if is_image else config.text_latency_ms
+        latency_secs = median_ms * rng.lognormvariate(0.0, config.latency_sigma) / 1000
+        if streaming and not is_image:
+            return _stream_text(prompt, latency_secs)
+        await asyncio.sleep(latency_secs)
+
+        if rng.random() < config.error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": {"code": 500, "message": "Internal error", "status": "INTERNAL"}}, status_code=500)
+
+        if is_image:
+            image = base64.b64encode(fake_png(config.image_bytes)).decode("ascii")
+            part: Dict[str, Any] = {"inlineData": {"mimeType": "image/png", "data": image}}
+            usage = {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": 1290}
+        else:
+            text = _fake_pack_json(prompt)
+            part = {"text": text}
+            usage = {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": len(text) // 4}
+        payload = {"candidates": [{"content": {"parts": [part]}}], "usageMetadata": usage}
+        if streaming:
+            return StreamingResponse(iter([f"data: {json.dumps(payload)}\r\n\r\n"]), media_type="text/event-stream")
+        return JSONResponse(payload)
+
+    def _stream_text(prompt: str, latency_secs: float, pieces: int = 8) -> StreamingResponse:
+        """Send the text in pieces: the first after a third of the latency, the rest spread evenly."""
+        text = _fake_pack_json(prompt)
+        size = -(-len(text) // pieces)
+
+        async def _events() -> AsyncIterator[str]:
+            await asyncio.sleep(latency_secs / 3)
+            for start in range(0, len(text), size):
+                chunk: Dict[str, Any] = {"candidates": [{"content": {"parts": [{"text": text[start : start + size]}]}}]}
+                if start + size >= len(text):
+                    chunk["usageMetadata"] = {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": len(text) // 4}
+                yield f"data: {json.dumps(chunk)}\r\n\r\n"
+                await asyncio.sleep(latency_secs * 2 / 3 / pieces)
+
+        return StreamingResponse(_events(), media_type="text/event-stream")
+
+    return fake
+
+
+def main() -> None:
+    defaults = FakeGeminiConfig()
+    parser = argparse.ArgumentParser(description="Serve a fake Gemini API for offline load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--text-latency-ms", type=float, default=defaults.text_latency_ms, help="Median text latency.")
+    parser.add_argument("--image-latency-ms", type=float, default=defaults.image_latency_ms, help="Median image latency.")
+    parser.add_argument("--latency-sigma", type=float, default=defaults.latency_sigma, help="Log-normal spread.")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Fraction of calls that 500.")
+    parser.add_argument("--quota-rate", type=float, default=defaults.quota_rate, help="Fraction of calls that 429.")
+    parser.add_argument("--retry-after-secs", type=float, default=defaults.retry_after_secs)
+    parser.add_argument("--image-bytes", type=int, default=defaults.image_bytes, help="Approximate PNG size.")
+    parser.add_argument("--image-model", default=defaults.image_model, help="Model name that returns images.")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = FakeGeminiConfig(
+        text_latency_ms=args.text_latency_ms,
+        image_latency_ms=args.image_latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        quota_rate=args.quota_rate,
+        retry_after_secs=args.retry_after_secs,
+        image_bytes=args.image_bytes,
+        image_model=args.image_model,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
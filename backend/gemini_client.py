@@ -0,0 +1,216 @@
+import asyncio
+import base64
+import binascii
+import json
+import logging
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from .settings import settings
+
+logger = logging.getLogger("tohu-kaiako")
+
+
+class GeminiError(RuntimeError):
+    """A non-success response from the Gemini API."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class GeminiClient:
+    """
+    Minimal interface `llm.py` needs from a model backend. Implementations
+    return the JSON body of the REST `generateContent` method, or for
+    `stream_generate_content` the sequence of partial bodies that
+    `streamGenerateContent` sends.
+    """
+
+    async def generate_content(self, model: str, prompt: str, generation_config: Dict[str, Any]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def stream_generate_content(
+        self, model: str, prompt: str, generation_config: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield partial responses; backends without streaming send one complete response."""
+        yield await self.generate_content(model, prompt, generation_config)
+
+    async def aclose(self) -> None:
+        return None
+
+
+class HttpxGeminiClient(GeminiClient):
+    """
+    Gemini REST client sharing one pooled `httpx.AsyncClient` (HTTP/2 with
+    keep-alive) across requests, so concurrency is bounded by connections
+    rather than executor threads.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        timeout_secs: float,
+        max_connections: int,
+        http2: bool = True,
+    ) -> None:
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout_secs = timeout_secs
+        self.max_connections = max_connections
+        self.http2 = http2
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        # Pooled connections belong to the loop that opened them
+        if self._client is None or self._loop is not loop:
+            if self._client is not None:
+                self._retire(self._client, self._loop)
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=self.http2,
+                timeout=httpx.Timeout(self.timeout_secs, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                headers={"x-goog-api-key": self.api_key},
+            )
+            self._loop = loop
+        return self._client
+
+    @staticmethod
+    def _retire(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Close a client left behind by another event loop, on that loop."""
+        if loop is None or loop.is_closed():
+            # Its loop is gone and cannot run aclose(); the sockets are freed with the client
+            return
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    async def generate_content(self, model: str, prompt: str, generation_config: Dict[str, Any]) -> Dict[str, Any]:
+        body = {
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "generationConfig": generation_config,
+        }
+        response = await self._get_client().post(f"/v1beta/models/{model}:generateContent", json=body)
+        if response.status_code >= 400:
+            raise _error_from_response(response)
+        return response.json()
+
+    async def stream_generate_content(
+        self, model: str, prompt: str, generation_config: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        body = {
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "generationConfig": generation_config,
+        }
+        url = f"/v1beta/models/{model}:streamGenerateContent"
+        async with self._get_client().stream("POST", url, params={"alt": "sse"}, json=body) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise _error_from_response(response)
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                try:
+                    yield json.loads(line[5:])
+                except ValueError:
+                    logger.warning(f"Skipping malformed stream event: {line[:80]}")
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+
+def _error_from_response(response: httpx.Response) -> GeminiError:
+    try:
+        message = response.json().get("error", {}).get("message", "")
+    except ValueError:
+        message = response.text[:200]
+    retry_after: Optional[float] = None
+    header = response.headers.get("retry-after")
+    if header:
+        try:
+            retry_after = float(header)
+        except ValueError:
+            retry_after = None
+    return GeminiError(
+        f"Gemini API error {response.status_code}: {message}",
+        status_code=response.status_code,
+        retry_after=retry_after,
+    )
+
+
+def response_text(payload: Dict[str, Any]) -> str:
+    """Concatenate the text parts of the first candidate."""
+    candidates = payload.get("candidates") or []
+    if not candidates:
+        return ""
+    parts = (candidates[0].get("content") or {}).get("parts") or []
+    return "".join(part.get("text", "") for part in parts if isinstance(part, dict))
+
+
+def response_images(payload: Dict[str, Any]) -> List[Tuple[bytes, str]]:
+    """Decode inline image parts of the first candidate as `(bytes, mime_type)`."""
+    images: List[Tuple[bytes, str]] = []
+    candidates = payload.get("candidates") or []
+    if not candidates:
+        return images
+    for part in (candidates[0].get("content") or {}).get("parts") or []:
+        inline = part.get("inlineData") or part.get("inline_data") if isinstance(part, dict) else None
+        if not inline:
+            continue
+        mime_type = inline.get("mimeType") or inline.get("mime_type") or ""
+        if "image" not in mime_type:
+            continue
+        try:
+            images.append((base64.b64decode(inline.get("data", "")), mime_type))
+        except (ValueError, binascii.Error):
+            logger.warning("Skipping undecodable inline image data")
+    return images
+
+
+_client: Optional[GeminiClient] = None
+
+
+def get_client() -> GeminiClient:
+    """Return the process-wide client, creating the HTTP client on first use."""
+    global _client
+    if _client is None:
+        mode = settings.gemini_fixture_mode
+        if mode == "replay":
+            from .replay import ReplayGeminiClient
+
+            _client = ReplayGeminiClient(Path(settings.gemini_fixture_dir), settings.gemini_replay_latency_scale)
+            return _client
+        _client = HttpxGeminiClient(
+            api_key=settings.google_api_key,
+            base_url=settings.gemini_base_url,
+            timeout_secs=settings.timeout_secs,
+            max_connections=settings.gemini_max_connections,
+            http2=settings.gemini_http2,
+        )
+        if mode == "record":
+            from .replay import RecordingGeminiClient
+
+            _client = RecordingGeminiClient(_client, Path(settings.gemini_fixture_dir))
+    return _client
+
+
+def set_client(client: Optional[GeminiClient]) -> None:
+    """Swap the process-wide client, e.g. for a local fake in tests."""
+    global _client
+    _client = client
+
+
+async def close_client() -> None:
+    if _client is not None:
+        await _client.aclose()
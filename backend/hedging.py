@@ -0,0 +1,70 @@
+import asyncio
+import threading
+from typing import Awaitable, Callable, Optional, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# What happened to a hedged call
+NOT_HEDGED = "not_hedged"  # answered before the hedge delay
+DENIED = "denied"  # slow, but the hedge budget was spent
+PRIMARY_WON = "primary_won"
+HEDGE_WON = "hedge_won"
+
+
+class HedgeBudget:
+    """
+    Cap hedges at `ratio` of calls: every call earns `ratio` of a token, up
+    to `burst` tokens, and a hedge spends a whole one.
+    """
+
+    def __init__(self, ratio: float, burst: float = 5.0) -> None:
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def record_call(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0 - 1e-9:  # ten calls at 0.1 earn a whole token
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+async def hedge(call: Callable[[], Awaitable[T]], delay: Optional[float], budget: HedgeBudget) -> Tuple[T, str]:
+    """
+    Await `call()`; if it has not finished after `delay` seconds and the
+    budget allows, start a second `call()` and take whichever succeeds first,
+    cancelling the other. Returns the result and what happened (see the
+    outcomes above). With no delay the call is simply awaited.
+    """
+    budget.record_call()
+    primary = asyncio.ensure_future(call())
+    tasks: Set["asyncio.Future[T]"] = {primary}
+    try:
+        if delay is None:
+            return await primary, NOT_HEDGED
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            return primary.result(), NOT_HEDGED
+        if not budget.try_spend():
+            return await primary, DENIED
+        backup = asyncio.ensure_future(call())
+        tasks.add(backup)
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), HEDGE_WON if task is backup else PRIMARY_WON
+                error = task.exception()
+        raise error  # type: ignore[misc]
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
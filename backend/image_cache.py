@@ -0,0 +1,206 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger("tohu-kaiako")
+
+
+def image_cache_key(model: str, prompt_text: str, generation_config: Dict[str, Any]) -> str:
+    """Derive a content address from everything that determines the rendered image."""
+    payload = json.dumps(
+        {"model": model, "prompt": prompt_text, "config": generation_config},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ImageCache:
+    """
+    Disk-backed image store keyed by `image_cache_key`.
+    Entries expire after `ttl_secs` and the least recently used entries are
+    evicted once the total stored bytes exceed `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: int,
+        ttl_secs: int,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl_secs = ttl_secs
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (size in bytes, created_at); ordered oldest access first
+        self._index: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._loaded = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def _load_index(self) -> None:
+        """Rebuild the in-memory LRU index from files already on disk."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.directory.exists():
+            return
+        entries = []
+        for path in self.directory.glob("*/*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.name, stat.st_size))
+        for _, key, size in sorted(entries):
+            header = self._read_header(self._path(key))
+            if header is None:
+                continue
+            self._index[key] = (size, float(header.get("created_at", 0)))
+            self._total_bytes += size
+
+    @staticmethod
+    def _read_header(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with path.open("rb") as handle:
+                return json.loads(handle.readline())
+        except (OSError, ValueError):
+            return None
+
+    def _drop(self, key: str) -> None:
+        size, _ = self._index.pop(key, (0, 0.0))
+        self._total_bytes -= size
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """Return `(image_bytes, mime_type)` for a fresh entry, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._load_index()
+            path = self._path(key)
+            try:
+                with path.open("rb") as handle:
+                    header = json.loads(handle.readline())
+                    data = handle.read()
+            except (OSError, ValueError):
+                # Another worker may have evicted the file underneath us
+                if key in self._index:
+                    self._drop(key)
+                self.misses += 1
+                return None
+
+            created_at = float(header.get("created_at", 0))
+            if self._clock() - created_at > self.ttl_secs:
+                self._index.setdefault(key, (path.stat().st_size, created_at))
+                self._drop(key)
+                self.misses += 1
+                return None
+
+            if key not in self._index:
+                # Written by another process sharing the cache directory
+                size = path.stat().st_size
+                self._index[key] = (size, created_at)
+                self._total_bytes += size
+            self._index.move_to_end(key)
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            self.hits += 1
+            return data, header.get("mime_type", "image/png")
+
+    def contains(self, key: str) -> bool:
+        """Return True for a fresh entry, checking the file without reading the image itself."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            self._load_index()
+            path = self._path(key)
+            try:
+                size = path.stat().st_size
+            except OSError:
+                if key in self._index:
+                    self._drop(key)
+                return False
+            if key in self._index:
+                created_at = self._index[key][1]
+            else:
+                header = self._read_header(path)
+                if header is None:
+                    return False
+                created_at = float(header.get("created_at", 0))
+                # Written by another process sharing the cache directory
+                self._index[key] = (size, created_at)
+                self._total_bytes += size
+            if self._clock() - created_at > self.ttl_secs:
+                return False
+            self._index.move_to_end(key)
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return True
+
+    def put(self, key: str, data: bytes, mime_type: str) -> None:
+        """Store an image, evicting least recently used entries to stay within budget."""
+        if not self.enabled:
+            return
+        header = json.dumps({"mime_type": mime_type, "created_at": self._clock()}).encode("utf-8") + b"\n"
+        size = len(header) + len(data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._load_index()
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            try:
+                with tmp_path.open("wb") as handle:
+                    handle.write(header)
+                    handle.write(data)
+                os.replace(tmp_path, path)
+            except OSError as exc:
+                logger.warning(f"Unable to write image cache entry {key}: {exc}")
+                return
+            if key in self._index:
+                self._total_bytes -= self._index.pop(key)[0]
+            self._index[key] = (size, self._clock())
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes and self._index:
+                oldest = next(iter(self._index))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current occupancy."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+            }
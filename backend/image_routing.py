@@ -0,0 +1,126 @@
+import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("tohu-kaiako")
+
+# Image roles a route can target; the noun card counts as "object" whether it shows an agent or a thing
+ROLES = ("scene", "object", "action", "setting", "number")
+ROLE_ALIASES = {"agent": "object", "noun": "object", "verb": "action", "location": "setting"}
+
+
+def image_role(name: str) -> str:
+    """Map an image job key (or role alias) to the role routes are configured by."""
+    return ROLE_ALIASES.get(name, name)
+
+
+@dataclass(frozen=True)
+class ImageTier:
+    """
+    One model an image role can be sent to. `timeout_secs` bounds each call
+    (default `timeout_secs` from settings); while the model's recent p95
+    latency exceeds `p95_budget_secs` the router skips to the next tier.
+    """
+
+    model: str
+    temperature: float = 0.7
+    image_size: Optional[str] = None
+    timeout_secs: Optional[float] = None
+    p95_budget_secs: Optional[float] = None
+
+    @property
+    def generation_config(self) -> Dict[str, Any]:
+        config: Dict[str, Any] = {"temperature": self.temperature}
+        if self.image_size:
+            config["imageConfig"] = {"imageSize": self.image_size}
+        return config
+
+
+def parse_routes(raw: str) -> Dict[str, List[ImageTier]]:
+    """
+    Parse `IMAGE_ROUTES`: a JSON object mapping a role to a tier or a list of
+    tiers, fastest fallback last, e.g.
+    `{"scene": {"model": "m-pro", "timeout_secs": 45}, "object": [{"model": "m", "p95_budget_secs": 12}, {"model": "m-lite"}]}`.
+    """
+    if not raw.strip():
+        return {}
+    routes: Dict[str, List[ImageTier]] = {}
+    for name, tiers in json.loads(raw).items():
+        role = image_role(name)
+        if role not in ROLES:
+            raise ValueError(f"Unknown image role in IMAGE_ROUTES: {name}")
+        if isinstance(tiers, dict):
+            tiers = [tiers]
+        if not tiers:
+            raise ValueError(f"IMAGE_ROUTES entry for {name} has no tiers")
+        routes[role] = [ImageTier(**tier) for tier in tiers]
+    return routes
+
+
+class LatencyWindow:
+    """Recent call latencies per model; samples older than `max_age_secs` are forgotten."""
+
+    def __init__(
+        self,
+        max_samples: int = 50,
+        max_age_secs: float = 300.0,
+        min_samples: int = 5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_samples = max_samples
+        self.max_age_secs = max_age_secs
+        self.min_samples = min_samples
+        self._clock = clock
+        self._samples: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, secs: float) -> None:
+        with self._lock:
+            samples = self._samples.setdefault(model, deque(maxlen=self.max_samples))
+            samples.append((self._clock(), secs))
+
+    def percentile(self, model: str, quantile: float) -> Optional[float]:
+        """Nearest-rank percentile of fresh samples, or None until there are `min_samples`."""
+        cutoff = self._clock() - self.max_age_secs
+        with self._lock:
+            values = sorted(secs for at, secs in self._samples.get(model, ()) if at >= cutoff)
+        if len(values) < self.min_samples:
+            return None
+        return values[max(0, math.ceil(quantile * len(values)) - 1)]
+
+
+class ImageRouter:
+    """
+    Pick the models an image role is tried on, in order. A role without a
+    route uses `default`. Tiers whose recent p95 is over budget are skipped
+    (the last tier is always kept); once their slow samples age out of the
+    window they are tried again.
+    """
+
+    def __init__(self, routes: Dict[str, List[ImageTier]], default: ImageTier, latencies: Optional[LatencyWindow] = None) -> None:
+        self.routes = routes
+        self.default = default
+        self.latencies = latencies or LatencyWindow()
+
+    def tiers(self, role: Optional[str]) -> List[ImageTier]:
+        return self.routes.get(image_role(role or ""), [self.default])
+
+    def over_budget(self, tier: ImageTier) -> bool:
+        if tier.p95_budget_secs is None:
+            return False
+        p95 = self.latencies.percentile(tier.model, 0.95)
+        return p95 is not None and p95 > tier.p95_budget_secs
+
+    def plan(self, role: Optional[str]) -> List[ImageTier]:
+        """The tiers to try for `role`, starting at the first one within its latency budget."""
+        tiers = self.tiers(role)
+        for index, tier in enumerate(tiers[:-1]):
+            if not self.over_budget(tier):
+                return tiers[index:]
+            logger.info(f"{tier.model} is over its p95 budget for {role} images; using a faster tier")
+        return tiers[-1:]
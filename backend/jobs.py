@@ -0,0 +1,213 @@
+import json
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import uuid4
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Lower values are claimed first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    stage TEXT NOT NULL DEFAULT 'queued',
+    progress REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    batch_id TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS batch_items (
+    batch_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    job_id TEXT NOT NULL,
+    PRIMARY KEY (batch_id, position)
+);
+"""
+
+# Columns added after the first release, for queue files created before them
+_ADDED_COLUMNS = {
+    "priority": "INTEGER NOT NULL DEFAULT 0",
+    "batch_id": "TEXT",
+}
+
+
+class JobQueue:
+    """
+    Durable pack-generation queue in a local SQLite file. The web process
+    enqueues and reads jobs; any number of worker processes claim them.
+    """
+
+    def __init__(self, path: Path, lease_secs: int = 600, max_attempts: int = 3) -> None:
+        self.path = Path(path)
+        self.lease_secs = lease_secs
+        self.max_attempts = max_attempts
+        self._initialised = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialised:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if not self._initialised:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, definition in _ADDED_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+            self._initialised = True
+        return conn
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "request": json.loads(row["request"]),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "stage": row["stage"],
+            "progress": row["progress"],
+            "attempts": row["attempts"],
+            "priority": row["priority"],
+            "batch_id": row["batch_id"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, request: Dict[str, Any], priority: int, batch_id: Optional[str]) -> str:
+        job_id = f"job-{uuid4().hex}"
+        now = time.time()
+        conn.execute(
+            "INSERT INTO jobs (id, status, request, created_at, updated_at, priority, batch_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, JOB_QUEUED, json.dumps(request), now, now, priority, batch_id),
+        )
+        return job_id
+
+    def enqueue(self, request: Dict[str, Any], priority: int = PRIORITY_INTERACTIVE) -> str:
+        """Add a job and return its id."""
+        with closing(self._connect()) as conn:
+            return self._insert(conn, request, priority, None)
+
+    def enqueue_batch(self, requests: Sequence[Dict[str, Any]], keys: Sequence[str]) -> str:
+        """
+        Queue a batch at batch priority and return its id. Items that share a
+        key (the same normalised request) share one job.
+        """
+        batch_id = f"batch-{uuid4().hex}"
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                job_for_key: Dict[str, str] = {}
+                for position, (request, key) in enumerate(zip(requests, keys)):
+                    if key not in job_for_key:
+                        job_for_key[key] = self._insert(conn, request, PRIORITY_BATCH, batch_id)
+                    conn.execute(
+                        "INSERT INTO batch_items (batch_id, position, job_id) VALUES (?, ?, ?)",
+                        (batch_id, position, job_for_key[key]),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return batch_id
+
+    def get_batch(self, batch_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the batch's jobs in submission order (repeated for shared items), or None."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT jobs.* FROM batch_items JOIN jobs ON jobs.id = batch_items.job_id "
+                "WHERE batch_items.batch_id = ? ORDER BY batch_items.position",
+                (batch_id,),
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows] or None
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def claim(self, worker: str, max_priority: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Atomically take the most urgent, then oldest, queued job, optionally
+        ignoring jobs less urgent than `max_priority`. Running jobs whose
+        lease has expired (their worker died) are requeued or failed first.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = 'Worker stopped responding', updated_at = ? "
+                    "WHERE status = ? AND updated_at < ? AND attempts >= ?",
+                    (JOB_FAILED, now, JOB_RUNNING, now - self.lease_secs, self.max_attempts),
+                )
+                conn.execute(
+                    "UPDATE jobs SET status = ?, stage = 'queued', progress = 0, updated_at = ? "
+                    "WHERE status = ? AND updated_at < ?",
+                    (JOB_QUEUED, now, JOB_RUNNING, now - self.lease_secs),
+                )
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND priority <= ? ORDER BY priority, created_at LIMIT 1",
+                    (JOB_QUEUED, PRIORITY_BATCH if max_priority is None else max_priority),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = ?, stage = 'starting', worker = ?, attempts = attempts + 1, updated_at = ? "
+                    "WHERE id = ?",
+                    (JOB_RUNNING, worker, now, row["id"]),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"])
+
+    def update_progress(self, job_id: str, stage: str, progress: float) -> None:
+        """Record progress; this also renews the job's lease."""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET stage = ?, progress = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (stage, progress, time.time(), job_id, JOB_RUNNING),
+            )
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, stage = 'done', progress = 1, result = ?, error = NULL, updated_at = ? "
+                "WHERE id = ?",
+                (JOB_DONE, json.dumps(result), time.time(), job_id),
+            )
+
+    def fail(self, job_id: str, error: str) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (JOB_FAILED, error, time.time(), job_id),
+            )
+
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (JOB_QUEUED,)).fetchone()
+        return int(row[0])
@@ -0,0 +1,127 @@
+import json
+import logging
+import re
+from typing import Any, List, Tuple
+
+from .metrics import JSON_REPAIRS
+
+logger = logging.getLogger("tohu-kaiako")
+
+_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+_MAX_TRUNCATION_CUTS = 20
+
+
+def _strip_trailing_commas(text: str) -> str:
+    """Drop commas directly before `}` or `]`, leaving string contents alone."""
+    out: List[str] = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+        out.append(char)
+    return "".join(out)
+
+
+def _scan(text: str) -> Tuple[List[str], bool, List[Tuple[int, List[str]]]]:
+    """Return the open brackets, whether a string is open, and each comma with the brackets open there."""
+    stack: List[str] = []
+    commas: List[Tuple[int, List[str]]] = []
+    in_string = escaped = False
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+        elif char == ",":
+            commas.append((index, list(stack)))
+    return stack, in_string, commas
+
+
+def _close_truncated(text: str) -> Any:
+    """
+    Complete a response cut off mid-way: close the open string and brackets,
+    and if the last member is itself incomplete, drop members from the end
+    until the rest parses.
+    """
+    stack, in_string, commas = _scan(text)
+    candidate = text + ('"' if in_string else "") + "".join(reversed(stack))
+    try:
+        return json.loads(_strip_trailing_commas(candidate))
+    except ValueError:
+        pass
+    for index, open_brackets in list(reversed(commas))[:_MAX_TRUNCATION_CUTS]:
+        candidate = text[:index] + "".join(reversed(open_brackets))
+        try:
+            return json.loads(_strip_trailing_commas(candidate))
+        except ValueError:
+            continue
+    raise ValueError("Unable to repair truncated JSON")
+
+
+def _attempt(content: str, repairs: List[str]) -> Any:
+    parsed = json.loads(content)
+    for repair in repairs:
+        JSON_REPAIRS.inc(repair=repair)
+    if repairs:
+        logger.info(f"Repaired text model JSON: {', '.join(repairs)}")
+    return parsed
+
+
+def parse_model_json(text: str) -> Any:
+    """
+    Parse JSON written by a model, repairing the usual slips locally rather
+    than failing the request: markdown fences, prose around the object,
+    trailing commas and output truncated mid-object. Raises ValueError if
+    nothing usable can be recovered.
+    """
+    content = text.strip()
+    repairs: List[str] = []
+    if content.startswith("```"):
+        content = _FENCE.sub("", content).strip()
+        repairs.append("fence")
+    try:
+        return _attempt(content, repairs)
+    except ValueError:
+        pass
+
+    start = content.find("{")
+    if start == -1:
+        raise ValueError("No JSON object in the text model response")
+    if start > 0:
+        content = content[start:]
+        repairs.append("prose")
+    end = content.rfind("}")
+    if end != -1 and content[end + 1 :].strip():
+        trimmed = repairs if "prose" in repairs else repairs + ["prose"]
+        try:
+            return _attempt(_strip_trailing_commas(content[: end + 1]), trimmed)
+        except ValueError:
+            pass  # perhaps not trailing prose but a cut-off response
+    try:
+        return _attempt(_strip_trailing_commas(content), repairs + ["trailing_comma"])
+    except ValueError:
+        pass
+
+    parsed = _close_truncated(content)
+    return _attempt(json.dumps(parsed), repairs + ["truncated"])
@@ -0,0 +1,91 @@
+import json
+import logging
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger("tohu-kaiako")
+
+FieldCallback = Callable[[str, Any], None]
+
+
+class JsonFieldStream:
+    """
+    Incremental reader for a JSON object that arrives in pieces. Feed it text
+    as it streams in; `on_field(key, value)` is called for each top-level
+    field as soon as its value is complete, long before the object closes.
+    Anything before the opening brace (a markdown fence, say) is skipped.
+    The full text should still be parsed at the end: this reader tolerates
+    malformed input by simply not reporting the affected fields.
+    """
+
+    def __init__(self, on_field: FieldCallback) -> None:
+        self.on_field = on_field
+        self.fields: Dict[str, Any] = {}
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._state = "start"  # start, key, colon, value, done
+        self._key_start = 0
+        self._key = ""
+        self._value_start = 0
+
+    def feed(self, chunk: str) -> None:
+        self._text += chunk
+        text = self._text
+        for index in range(self._pos, len(text)):
+            char = text[index]
+            if self._state == "done":
+                break
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._state == "key":
+                        try:
+                            self._key = self._decode(self._key_start, index + 1)
+                        except ValueError:
+                            self._key = ""
+                        self._state = "colon"
+                continue
+            if self._state == "start":
+                if char == "{":
+                    self._depth = 1
+                    self._state = "key"
+                continue
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._state == "key":
+                    self._key_start = index
+            elif char == ":" and self._depth == 1 and self._state == "colon":
+                self._value_start = index + 1
+                self._state = "value"
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    if self._state == "value":
+                        self._emit(index)
+                    self._state = "done"
+            elif char == "," and self._depth == 1 and self._state == "value":
+                self._emit(index)
+                self._state = "key"
+        self._pos = len(text)
+
+    def _decode(self, start: int, end: int) -> Any:
+        return json.loads(self._text[start:end])
+
+    def _emit(self, end: int) -> None:
+        try:
+            value = self._decode(self._value_start, end)
+        except ValueError:
+            return
+        self.fields[self._key] = value
+        try:
+            self.on_field(self._key, value)
+        except Exception as exc:  # a listener must never break the text call
+            logger.warning(f"Streamed field handler failed for {self._key}: {exc}")
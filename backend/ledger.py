@@ -0,0 +1,140 @@
+"""
+Per-pack cost ledger: one row per generated pack with its timings, image
+bytes and model usage.
+
+Summarise the slowest themes and most expensive request patterns with:
+
+    python -m backend.ledger --limit 10
+"""
+import argparse
+import json
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .settings import settings
+from .timing import PackTimings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS packs (
+    pack_id TEXT PRIMARY KEY,
+    recorded_at REAL NOT NULL,
+    theme TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    level TEXT NOT NULL,
+    activity TEXT,
+    total_ms REAL NOT NULL,
+    text_ms REAL NOT NULL,
+    slowest_image_ms REAL NOT NULL,
+    image_bytes INTEGER NOT NULL,
+    model_images INTEGER NOT NULL,
+    placeholders INTEGER NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    pdf_ms REAL,
+    detail TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS packs_theme ON packs (theme);
+"""
+
+
+class CostLedger:
+    """Append-only SQLite record of what each generated pack cost."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._initialised = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialised:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if not self._initialised:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialised = True
+        return conn
+
+    def append(self, pack_id: str, request: Dict[str, Any], timings: PackTimings, placeholders: int) -> None:
+        images = timings.images
+        usage = timings.usage.values()
+        detail = {"stages": timings.stages, "images": images, "usage": timings.usage}
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO packs (pack_id, recorded_at, theme, subject, level, activity, total_ms,"
+                " text_ms, slowest_image_ms, image_bytes, model_images, placeholders, prompt_tokens,"
+                " output_tokens, detail) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    pack_id,
+                    time.time(),
+                    " ".join(str(request.get("theme", "")).split()).casefold(),
+                    request.get("subject") or "language",
+                    request.get("level") or "",
+                    request.get("activity"),
+                    timings.elapsed_ms(),
+                    timings.stage_ms("text"),
+                    max((image["ms"] for image in images), default=0.0),
+                    sum(image["bytes"] for image in images),
+                    sum(1 for image in images if image["source"] == "model"),
+                    placeholders,
+                    sum(totals["prompt_tokens"] for totals in usage),
+                    sum(totals["output_tokens"] for totals in usage),
+                    json.dumps(detail),
+                ),
+            )
+
+    def record_pdf(self, pack_id: str, secs: float) -> None:
+        """Attach the (lazily rendered) PDF's render time to its pack."""
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE packs SET pdf_ms = ? WHERE pack_id = ?", (round(secs * 1000, 1), pack_id))
+
+    def get(self, pack_id: str) -> Optional[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM packs WHERE pack_id = ?", (pack_id,)).fetchone()
+        if row is None:
+            return None
+        record = dict(row)
+        record["detail"] = json.loads(record["detail"])
+        return record
+
+    def slowest_themes(self, limit: int = 10) -> List[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT theme, COUNT(*) AS packs, ROUND(AVG(total_ms), 1) AS avg_total_ms,"
+                " ROUND(MAX(total_ms), 1) AS max_total_ms, ROUND(AVG(slowest_image_ms), 1) AS avg_slowest_image_ms,"
+                " SUM(placeholders) AS placeholders FROM packs GROUP BY theme ORDER BY avg_total_ms DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def most_expensive_patterns(self, limit: int = 10) -> List[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT subject, level, activity, COUNT(*) AS packs,"
+                " ROUND(AVG(prompt_tokens + output_tokens), 1) AS avg_tokens,"
+                " ROUND(AVG(model_images), 2) AS avg_model_images, ROUND(AVG(image_bytes)) AS avg_image_bytes"
+                " FROM packs GROUP BY subject, level, activity"
+                " ORDER BY avg_tokens DESC, avg_model_images DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Summarise the Tohu Kaiako per-pack cost ledger.")
+    parser.add_argument("--path", default=settings.cost_ledger_path, help="Ledger SQLite file.")
+    parser.add_argument("--limit", type=int, default=10, help="Rows per summary.")
+    args = parser.parse_args()
+    ledger = CostLedger(Path(args.path))
+    summary = {
+        "slowest_themes": ledger.slowest_themes(args.limit),
+        "most_expensive_patterns": ledger.most_expensive_patterns(args.limit),
+    }
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
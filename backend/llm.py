@@ -1,112 +1,324 @@
 import asyncio
-import json
 import logging
-import base64
+import time
+import zlib
+from contextvars import ContextVar
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 from uuid import uuid4
 
-import google.generativeai as genai
-
-from .prompts import component_image_prompt, scene_image_prompt, text_system_prompt
+from .assets import ImageAsset, ImageValue
+from .circuit_breaker import CircuitBreaker
+from .deadline import current_deadline, remaining_time
+from .gemini_client import GeminiError, get_client, response_images, response_text
+from .hedging import NOT_HEDGED, HedgeBudget, hedge
+from .image_cache import ImageCache, image_cache_key
+from .image_routing import ImageRouter, ImageTier, image_role, parse_routes
+from .json_repair import parse_model_json
+from .json_stream import FieldCallback, JsonFieldStream
+from .metrics import CACHE_LOOKUPS, IMAGE_FALLBACKS, IMAGE_HEDGES, JSON_PARSE_FAILURES, MODEL_SECONDS, PLACEHOLDERS, SPECULATIVE_IMAGES, STAGE_SECONDS
+from .timing import record_image, record_usage, timed_stage
+from .progress import report_progress
+from .pack_cache import SingleFlight
+from .rate_limit import RateLimiter, current_reserve
+from .prompts import component_image_prompt, scene_image_prompt, setting_image_prompt, text_response_schema, text_system_prompt
 from .settings import settings
 
 logger = logging.getLogger("tohu-kaiako")
 
-# Configure Google Generative AI
-genai.configure(api_key=settings.google_api_key)
+TEXT_GENERATION_CONFIG: Dict[str, Any] = {"temperature": 0.3}
+IMAGE_GENERATION_CONFIG: Dict[str, Any] = {"temperature": 0.7}
+
+image_cache = ImageCache(
+    Path(settings.cache_dir) / "images",
+    max_bytes=settings.image_cache_max_bytes,
+    ttl_secs=settings.image_cache_ttl_secs,
+)
+
+rate_limiter = RateLimiter(
+    Path(settings.rate_limit_path),
+    budgets={
+        "text": (settings.text_rpm, settings.rate_limit_burst),
+        "image": (settings.image_rpm, settings.rate_limit_burst),
+    },
+    backoff_base_secs=settings.quota_backoff_base_secs,
+    backoff_max_secs=settings.quota_backoff_max_secs,
+)
+
+image_breaker = CircuitBreaker(
+    "image",
+    window_size=settings.image_breaker_window,
+    min_calls=settings.image_breaker_min_calls,
+    failure_rate_threshold=settings.image_breaker_failure_rate,
+    slow_call_secs=settings.image_breaker_slow_call_secs,
+    cooldown_secs=settings.image_breaker_cooldown_secs,
+    probe_ratio=settings.image_breaker_probe_ratio,
+)
+
+# Which model (and size and timeout) each image role goes to; by default every role uses `image_model`
+image_router = ImageRouter(
+    parse_routes(settings.image_routes),
+    default=ImageTier(settings.image_model, temperature=IMAGE_GENERATION_CONFIG["temperature"]),
+)
+
+# Duplicate image calls stuck past the hedge percentile, up to `image_hedge_budget` extra calls
+image_hedge_budget = HedgeBudget(settings.image_hedge_budget)
+
+# Packs that share an image prompt (a batch of related themes, say) share one model call
+image_flights = SingleFlight()
+
+# Told about each top-level field of the text response as soon as it has streamed in
+_text_field_listener: ContextVar[Optional[FieldCallback]] = ContextVar("tohu_text_field_listener", default=None)
+
+
+async def _collect_stream(
+    model: str, prompt: str, generation_config: Dict[str, Any], on_text: Callable[[str], None]
+) -> Dict[str, Any]:
+    """Stream a response, passing each text piece to `on_text`, and return it as one body."""
+    pieces: List[str] = []
+    usage = None
+    async for chunk in get_client().stream_generate_content(model, prompt, generation_config):
+        text = response_text(chunk)
+        if text:
+            pieces.append(text)
+            on_text(text)
+        usage = chunk.get("usageMetadata") or usage
+    return {"candidates": [{"content": {"parts": [{"text": "".join(pieces)}]}}], "usageMetadata": usage}
+
+
+def _inline_image_count(response: Dict[str, Any]) -> int:
+    """Count the images in a response without decoding them."""
+    candidates = response.get("candidates") or [{}]
+    count = 0
+    for part in (candidates[0].get("content") or {}).get("parts") or []:
+        inline = (part.get("inlineData") or part.get("inline_data") or {}) if isinstance(part, dict) else {}
+        if "image" in str(inline.get("mimeType") or inline.get("mime_type") or ""):
+            count += 1
+    return count
+
+
+async def _call_model(
+    bucket: str,
+    model: str,
+    prompt: str,
+    generation_config: Dict[str, Any],
+    on_text: Optional[Callable[[str], None]] = None,
+    timeout_secs: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Call the model within the shared per-bucket quota, retrying 429 responses
+    after the backoff `rate_limiter` imposes on every worker. Waiting and the
+    call itself are bounded by the current request deadline, and the call by
+    `timeout_secs` if given. With `on_text` the response is streamed and text
+    is handed over as it arrives.
+    """
+    attempt = 0
+    streamed = False
+    
+    def _forward(text: str) -> None:
+        nonlocal streamed
+        streamed = True
+        on_text(text)
+    
+    while True:
+        await rate_limiter.acquire(bucket, max_wait=remaining_time(settings.timeout_secs), reserve=current_reserve())
+        started = time.perf_counter()
+        try:
+            if on_text is None:
+                call = get_client().generate_content(model, prompt, generation_config)
+            else:
+                call = _collect_stream(model, prompt, generation_config, _forward)
+            response = await asyncio.wait_for(call, timeout=remaining_time(timeout_secs or settings.timeout_secs))
+        except asyncio.TimeoutError:
+            MODEL_SECONDS.observe(time.perf_counter() - started, model=model, outcome="timeout")
+            raise
+        except GeminiError as exc:
+            outcome = "quota" if exc.status_code == 429 else "error"
+            MODEL_SECONDS.observe(time.perf_counter() - started, model=model, outcome=outcome)
+            # Text already handed over cannot be taken back, so a broken stream is not retried
+            if exc.status_code != 429 or attempt >= settings.quota_max_retries or streamed:
+                raise
+            attempt += 1
+            await asyncio.to_thread(rate_limiter.record_throttle, bucket, exc.retry_after)
+            continue
+        MODEL_SECONDS.observe(time.perf_counter() - started, model=model, outcome="ok")
+        record_usage(model, response.get("usageMetadata"), images=_inline_image_count(response) if bucket == "image" else 0)
+        await asyncio.to_thread(rate_limiter.record_success, bucket)
+        return response
 
 
 async def call_text(theme: str, level: str, keywords: str, subject: str = "language", activity: Optional[str] = None) -> Dict[str, Any]:
     """Call Google Gemini API for text generation."""
     try:
-        model = genai.GenerativeModel(settings.text_model)
         prompt = text_system_prompt(theme, level, keywords, subject, activity)
         
         logger.info(f"Calling Google Gemini with model: {settings.text_model}")
         logger.info(f"API Key present: {bool(settings.google_api_key)}")
         
-        # Generate content
-        response = await asyncio.to_thread(
-            model.generate_content,
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.3,
-            )
-        )
-        
-        content = response.text.strip()
+        # Stream when someone wants fields early (see `_text_and_plan`)
+        listener = _text_field_listener.get()
+        on_text = JsonFieldStream(listener).feed if listener is not None and settings.text_streaming else None
+        config = TEXT_GENERATION_CONFIG
+        if settings.text_structured_output:
+            config = {
+                **TEXT_GENERATION_CONFIG,
+                "responseMimeType": "application/json",
+                "responseSchema": text_response_schema(subject, activity),
+            }
+        with timed_stage("text"):
+            response = await _call_model("text", settings.text_model, prompt, config, on_text)
         
-        # Strip markdown code blocks if present
-        if content.startswith("```"):
-            lines = content.split("\n")
-            lines = lines[1:]  # Remove first line with ```
-            if lines and lines[-1].strip() == "```":
-                lines = lines[:-1]  # Remove last line with ```
-            content = "\n".join(lines)
-        
-        logger.info(f"Stripped content to parse: {content[:300]}...")
-        return json.loads(content)
+        content = response_text(response)
+        logger.info(f"Text content to parse: {content[:300]}...")
+        try:
+            text_json = parse_model_json(content)
+            if not isinstance(text_json, dict):
+                raise ValueError(f"Expected a JSON object, got {type(text_json).__name__}")
+        except ValueError:
+            JSON_PARSE_FAILURES.inc()
+            raise
+        return text_json
         
     except Exception as exc:
         logger.error(f"Failed to generate text: {exc}", exc_info=True)
+        if isinstance(exc, asyncio.TimeoutError):
+            raise RuntimeError("Text generation error: timeout waiting for the model") from exc
         raise RuntimeError(f"Text generation error: {str(exc)}") from exc
 
 
-async def _generate_image(prompt_text: str, placeholder_label: str) -> str:
+async def _generate_image(prompt_text: str, placeholder_label: str, role: Optional[str] = None) -> ImageAsset:
     """
-    Generate an image using Google Gemini's image generation model.
-    Falls back to SVG placeholder if generation fails.
+    Generate an image using the Gemini model routed for `role` (see
+    `image_router`). Falls back to SVG placeholder if generation fails.
     """
     logger.info(f"Generating image for: {placeholder_label}")
+    requested = time.perf_counter()
     
-    try:
-        model = genai.GenerativeModel(settings.image_model)
-        
-        logger.info(f"Calling {settings.image_model} with prompt: {prompt_text[:100]}...")
+    # An image any tier of the route already made is as good as a new one
+    tiers = image_router.tiers(role)
+    cache_keys = [image_cache_key(tier.model, prompt_text, tier.generation_config) for tier in tiers]
+    cached = None
+    for cache_key in cache_keys:
+        cached = await asyncio.to_thread(image_cache.get, cache_key)
+        if cached is not None:
+            break
+    CACHE_LOOKUPS.inc(cache="image", result="miss" if cached is None else "hit")
+    if cached is not None:
+        image_bytes, mime_type = cached
+        logger.info(f"Image cache hit for: {placeholder_label}")
+        record_image(placeholder_label, time.perf_counter() - requested, len(image_bytes), "cache")
+        return ImageAsset(image_bytes, mime_type)
+    
+    flight_key = cache_keys[0]
+    joined = flight_key in image_flights
+    image = await image_flights.do(flight_key, lambda: _fetch_image(prompt_text, placeholder_label, role))
+    if joined:
+        record_image(placeholder_label, time.perf_counter() - requested, len(image.data), "shared")
+    return image
+
+
+def _hedge_delay(tier: ImageTier) -> Optional[float]:
+    """
+    How long an image call may run before it is hedged: the configured
+    percentile of the model's recent latencies. Batch work (which runs with
+    a rate-limit reserve) is never hedged.
+    """
+    if not settings.image_hedging or current_reserve() > 0:
+        return None
+    return image_router.latencies.percentile(tier.model, settings.image_hedge_percentile)
+
+
+async def _fetch_image(prompt_text: str, placeholder_label: str, role: Optional[str] = None) -> ImageAsset:
+    """
+    Call the image model for a cache miss, through the circuit breaker. A
+    tier that times out or fails hands over to the next (faster) one while
+    the request deadline allows.
+    """
+    requested = time.perf_counter()
+    role_name = image_role(role or "default")
+    
+    def _placeholder(reason: str) -> ImageAsset:
+        PLACEHOLDERS.inc(reason=reason)
+        placeholder = _generate_svg_placeholder(placeholder_label)
+        record_image(placeholder_label, time.perf_counter() - requested, len(placeholder.data), "placeholder")
+        return placeholder
+    
+    if not image_breaker.allow_request():
+        logger.info(f"Image circuit {image_breaker.state}; using placeholder for {placeholder_label}")
+        return _placeholder("circuit_open")
+    
+    tiers = image_router.plan(role)
+    if len(tiers) < len(image_router.tiers(role)):
+        IMAGE_FALLBACKS.inc(role=role_name, reason="p95")
+    started = time.monotonic()
+    failure = "no image in response"
+    throttled = False
+    for index, tier in enumerate(tiers):
+        if index > 0:
+            deadline = current_deadline()
+            if deadline is not None and deadline.expired:
+                break
+            IMAGE_FALLBACKS.inc(role=role_name, reason="timeout" if failure == "TimeoutError" else "error")
+            logger.info(f"Retrying {placeholder_label} on {tier.model} after {failure}")
+        tier_started = time.monotonic()
+        try:
+            logger.info(f"Calling {tier.model} with prompt: {prompt_text[:100]}...")
+            
+            with STAGE_SECONDS.time(stage="image"):
+                response, hedged = await hedge(
+                    lambda: _call_model("image", tier.model, prompt_text, tier.generation_config, timeout_secs=tier.timeout_secs),
+                    _hedge_delay(tier),
+                    image_hedge_budget,
+                )
+            if hedged != NOT_HEDGED:
+                IMAGE_HEDGES.inc(outcome=hedged)
+        except asyncio.CancelledError:
+            image_breaker.record_abandoned()
+            raise
+        except Exception as exc:
+            logger.warning(f"Image generation on {tier.model} failed for {placeholder_label}: {exc}")
+            if isinstance(exc, asyncio.TimeoutError):
+                # A timeout is a lower bound on the latency, but it still counts against the p95
+                image_router.latencies.record(tier.model, time.monotonic() - tier_started)
+            failure = type(exc).__name__
+            # Quota rejections (ours or Gemini's) say nothing about the model's health
+            throttled = isinstance(exc, GeminiError) and exc.status_code == 429
+            continue
+        image_router.latencies.record(tier.model, time.monotonic() - tier_started)
         
-        response = await asyncio.to_thread(
-            model.generate_content,
-            prompt_text,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
+        for image_bytes, mime_type in response_images(response):
+            image_breaker.record_success(time.monotonic() - started)
+            logger.info(
+                "Successfully generated image",
+                extra={"size": len(image_bytes), "type": mime_type, "label": placeholder_label, "model": tier.model},
             )
-        )
+            cache_key = image_cache_key(tier.model, prompt_text, tier.generation_config)
+            await asyncio.to_thread(image_cache.put, cache_key, image_bytes, mime_type)
+            record_image(placeholder_label, time.perf_counter() - requested, len(image_bytes), "model")
+            return ImageAsset(image_bytes, mime_type)
         
-        if response.candidates:
-            candidate = response.candidates[0]
-            for part in candidate.content.parts:
-                if hasattr(part, "inline_data"):
-                    data = part.inline_data
-                    if data.mime_type and "image" in data.mime_type:
-                        base64_image = base64.b64encode(data.data).decode("utf-8")
-                        data_url = f"data:{data.mime_type};base64,{base64_image}"
-                        
-                        logger.info(
-                            "Successfully generated image",
-                            extra={"size": len(data.data), "type": data.mime_type, "label": placeholder_label},
-                        )
-                        return data_url
-        
-        logger.warning("No image data found in response, using placeholder")
-        return _generate_svg_placeholder(placeholder_label)
-        
-    except Exception as exc:
-        logger.warning(f"Image generation failed for {placeholder_label}: {exc}, using placeholder")
-        return _generate_svg_placeholder(placeholder_label)
+        logger.warning(f"No image data found in {tier.model} response")
+        failure = "no image in response"
+        throttled = False
+    
+    logger.warning(f"Image generation failed for {placeholder_label}: {failure}, using placeholder")
+    if throttled:
+        image_breaker.record_abandoned()
+        return _placeholder("quota")
+    image_breaker.record_failure(failure)
+    return _placeholder("empty_response" if failure == "no image in response" else "error")
 
 
-def _generate_svg_placeholder(label: str) -> str:
+def _generate_svg_placeholder(label: str) -> ImageAsset:
     """Generate a simple SVG placeholder image."""
-    import urllib.parse
-    
     # Create a color based on the theme for visual variety
     color_code = abs(hash(label)) % 0xFFFFFF
     bg_color = f"#{color_code:06x}"
     
     theme_text = label[:50]  # Limit length
     
-    # Create an SVG data URL
+    # Create an SVG image
     svg = f'''<svg xmlns="http://www.w3.org/2000/svg" width="400" height="300">
         <rect width="400" height="300" fill="{bg_color}" opacity="0.3"/>
         <text x="50%" y="50%" font-family="Arial, sans-serif" font-size="24" 
@@ -119,8 +331,14 @@ def _generate_svg_placeholder(label: str) -> str:
         </text>
     </svg>'''
     
-    encoded_svg = urllib.parse.quote(svg)
-    return f"data:image/svg+xml,{encoded_svg}"
+    return ImageAsset(svg.encode("utf-8"), "image/svg+xml")
+
+
+def is_placeholder_image(image: ImageValue) -> bool:
+    """Return True for images produced by `_generate_svg_placeholder`, raw or encoded."""
+    if isinstance(image, ImageAsset):
+        return image.mime_type == "image/svg+xml"
+    return str(image or "").startswith("data:image/svg+xml")
 
 
 def _index_components(components: Any) -> Dict[str, Dict[str, Any]]:
@@ -192,8 +410,11 @@ def _select_teacher_tip(theme: str, subject: str) -> str:
     return base_tips[index]
 
 
-def _build_pack_item(order: int, phase: str, image_role: str, prompt_text: str, purpose: str, focus: str, image_data: str) -> Dict[str, Any]:
-    """Assemble a pack item payload for the response."""
+def _build_pack_item(order: int, phase: str, image_role: str, prompt_text: str, purpose: str, focus: str, image_key: str) -> Dict[str, Any]:
+    """
+    Assemble a pack item payload for the response.
+    `image_key` names the image job whose result fills `image_data_url`.
+    """
     return {
         "order": order,
         "phase": phase,
@@ -201,15 +422,42 @@ def _build_pack_item(order: int, phase: str, image_role: str, prompt_text: str,
         "image_description": prompt_text,
         "pedagogical_purpose": purpose,
         "language_focus": focus,
-        "image_data_url": image_data,
+        "image_key": image_key,
+        "image_data_url": None,
     }
 
 
-async def generate_pack(theme: str, level: str, keywords: str, subject: str = "language", activity: Optional[str] = None) -> Dict[str, Any]:
-    text_json = await call_text(theme, level, keywords, subject, activity)
-    
+def _image_job(key: str, prompt_text: str, label: str, scene_slot: str) -> Dict[str, str]:
+    """Describe one image to generate, the `scene_images` slot it fills and the role it is routed by."""
+    return {"key": key, "prompt": prompt_text, "label": label, "scene_slot": scene_slot, "role": image_role(key)}
+
+
+def _scene_seed(theme: str) -> int:
+    # The seed is part of every image prompt, so it must be stable across
+    # processes for the image cache to hit.
+    return zlib.crc32(theme.encode("utf-8")) % 100000
+
+
+def _request_only_jobs(theme: str, keywords: str, subject: str, activity: Optional[str]) -> List[Dict[str, str]]:
+    """
+    Speculative image jobs built from the request alone, before the text
+    response exists. The plan's own prompts use the model's components, so
+    these are only reused when a prompt happens to match.
+    """
+    prompt = setting_image_prompt(theme, keywords or "", _scene_seed(theme))
+    if subject == "math" and activity == "name_the_number":
+        return [_image_job("setting", prompt, f"{theme} setting", "setting")]
+    return [_image_job("location", prompt, f"{theme} location", "setting")]
+
+
+def _plan_pack(text_json: Dict[str, Any], theme: str, keywords: str, subject: str = "language", activity: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Derive everything that depends only on the text response: language steps,
+    sentences, image prompts and the pack layout. Images are filled in later by
+    `_assemble_pack`.
+    """
     # Generate scene seed for visual coherence
-    scene_seed = abs(hash(theme)) % 100000
+    scene_seed = _scene_seed(theme)
     
     # Ensure learning prompts stay simple and ordered
     default_learning_prompts = [
@@ -347,21 +595,12 @@ async def generate_pack(theme: str, level: str, keywords: str, subject: str = "l
         )
         scene_prompt = scene_image_prompt(theme, keywords or "", component_list, scene_seed)
         
-        number_task = asyncio.create_task(_generate_image(number_prompt, f"{theme} number"))
-        object_task = asyncio.create_task(_generate_image(object_prompt, f"{theme} objects"))
-        setting_task = asyncio.create_task(_generate_image(setting_prompt, f"{theme} setting"))
-        scene_task = asyncio.create_task(_generate_image(scene_prompt, f"{theme} scene"))
-        
-        number_image, object_image, setting_image, scene_image = await asyncio.gather(
-            number_task, object_task, setting_task, scene_task
-        )
-        
-        scene_images = {
-            "object": object_image,  # Show the counted objects
-            "action": number_image,  # Show the number
-            "setting": setting_image,
-            "scene": scene_image,
-        }
+        image_jobs = [
+            _image_job("number", number_prompt, f"{theme} number", "action"),  # Show the number
+            _image_job("object", object_prompt, f"{theme} objects", "object"),  # Show the counted objects
+            _image_job("setting", setting_prompt, f"{theme} setting", "setting"),
+            _image_job("scene", scene_prompt, f"{theme} scene", "scene"),
+        ]
         image_prompts = {
             "scene": scene_prompt,
             "number": number_prompt,
@@ -396,21 +635,12 @@ async def generate_pack(theme: str, level: str, keywords: str, subject: str = "l
         )
         scene_prompt = scene_image_prompt(theme, keywords or "", component_list, scene_seed)
         
-        noun_task = asyncio.create_task(_generate_image(noun_prompt, f"{theme} noun"))
-        action_task = asyncio.create_task(_generate_image(action_prompt, f"{theme} verb"))
-        location_task = asyncio.create_task(_generate_image(location_prompt, f"{theme} location"))
-        scene_task = asyncio.create_task(_generate_image(scene_prompt, f"{theme} scene"))
-        
-        noun_image, action_image, location_image, scene_image = await asyncio.gather(
-            noun_task, action_task, location_task, scene_task
-        )
-        
-        scene_images = {
-            "object": noun_image,
-            "action": action_image,
-            "setting": location_image,
-            "scene": scene_image,
-        }
+        image_jobs = [
+            _image_job("noun", noun_prompt, f"{theme} noun", "object"),
+            _image_job("verb", action_prompt, f"{theme} verb", "action"),
+            _image_job("location", location_prompt, f"{theme} location", "setting"),
+            _image_job("scene", scene_prompt, f"{theme} scene", "scene"),
+        ]
         image_prompts = {
             "scene": scene_prompt,
             "noun": noun_prompt,
@@ -480,7 +710,7 @@ async def generate_pack(theme: str, level: str, keywords: str, subject: str = "l
                     prompt_text=image_prompts.get("scene", ""),
                     purpose="Build shared meaning before introducing the counting language.",
                     focus="Ask tamariki what is happening in the picture before introducing the number sign.",
-                    image_data=scene_image,
+                    image_key="scene",
                 ),
                 _build_pack_item(
                     order=2,
@@ -489,7 +719,7 @@ async def generate_pack(theme: str, level: str, keywords: str, subject: str = "l
                     prompt_text=image_prompts.get("number", ""),
                     purpose="Highlight the target number clearly and link it to the gesture.",
                     focus=f"Model the NZSL sign {number_sign} and hold up {number_label} fingers.",
-                    image_data=number_image,
+                    image_key="number",
                 ),
                 _build_pack_item(
                     order=3,
@@ -498,7 +728,7 @@ async def generate_pack(theme: str, level: str, keywords: str, subject: str = "l
                     prompt_text=image_prompts.get("object", ""),
                     purpose="Show the counted items on their own to reinforce quantity.",
                     focus=f"Name the objects as you sign {object_sign} together.",
-                    image_data=object_image,
+                    image_key="object",
                 ),
                 _build_pack_item(
                     order=4,
@@ -507,7 +737,7 @@ async def generate_pack(theme: str, level: str, keywords: str, subject: str = "l
                     prompt_text=image_prompts.get("setting", ""),
                     purpose="Anchor the counting scene in a familiar place.",
                     focus=f"Sign {setting_sign} and describe where the counting happens.",
-                    image_data=setting_image,
+                    image_key="setting",
                 ),
                 _build_pack_item(
                     order=5,
@@ -516,7 +746,7 @@ async def generate_pack(theme: str, level: str, keywords: str, subject: str = "l
                     prompt_text=image_prompts.get("scene", ""),
                     purpose="Recombine WHO, WHAT, and WHERE for fluent counting language.",
                     focus=f"Sign the full sentence together: {sentence_payload['sentence_nzsl']}.",
-                    image_data=scene_image,
+                    image_key="scene",
                 ),
             ]
         )
@@ -530,7 +760,7 @@ async def generate_pack(theme: str, level: str, keywords: str, subject: str = "l
                     prompt_text=image_prompts.get("scene", ""),
                     purpose="Build shared meaning before introducing the target language.",
                     focus="Ask tamariki what they notice happening in the scene.",
-                    image_data=scene_image,
+                    image_key="scene",
                 ),
                 _build_pack_item(
                     order=2,
@@ -539,7 +769,7 @@ async def generate_pack(theme: str, level: str, keywords: str, subject: str = "l
                     prompt_text=image_prompts.get("noun", ""),
                     purpose="Isolate the key person or object for clear naming.",
                     focus=f"Model the NZSL sign {noun_sign} while saying '{noun_label}'.",
-                    image_data=noun_image,
+                    image_key="noun",
                 ),
                 _build_pack_item(
                     order=3,
@@ -548,7 +778,7 @@ async def generate_pack(theme: str, level: str, keywords: str, subject: str = "l
                     prompt_text=image_prompts.get("verb", ""),
                     purpose="Show the action to link meaning, movement, and language.",
                     focus=f"Sign {verb_sign} and invite tamariki to copy the action.",
-                    image_data=action_image,
+                    image_key="verb",
                 ),
                 _build_pack_item(
                     order=4,
@@ -557,7 +787,7 @@ async def generate_pack(theme: str, level: str, keywords: str, subject: str = "l
                     prompt_text=image_prompts.get("location", ""),
                     purpose="Ground the language in a familiar place or space.",
                     focus=f"Sign {location_sign} and point to where it happens.",
-                    image_data=location_image,
+                    image_key="location",
                 ),
                 _build_pack_item(
                     order=5,
@@ -566,12 +796,12 @@ async def generate_pack(theme: str, level: str, keywords: str, subject: str = "l
                     prompt_text=image_prompts.get("scene", ""),
                     purpose="Recombine WHO, WHAT, and WHERE for a fluent sentence.",
                     focus=f"Sign the full sentence together: {sentence_payload['sentence_nzsl']}.",
-                    image_data=scene_image,
+                    image_key="scene",
                 ),
             ]
         )
     
-    response_payload: Dict[str, Any] = {
+    return {
         "pack_id": f"pack-{uuid4().hex}",
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "theme": text_json.get("theme", theme),
@@ -580,7 +810,207 @@ async def generate_pack(theme: str, level: str, keywords: str, subject: str = "l
         "sentence_en": sentence_payload["sentence_en"],
         "teacher_tip": teacher_tip,
         "pack_content": pack_content,
-        "scene_images": scene_images,
+        "image_jobs": image_jobs,
+    }
+
+
+def _text_payload(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """The part of a pack that can be shown before any image is ready."""
+    return {
+        key: plan[key]
+        for key in (
+            "pack_id",
+            "generated_at",
+            "theme",
+            "language_steps",
+            "sentence_nzsl",
+            "sentence_en",
+            "teacher_tip",
+            "pack_content",
+        )
+    }
+
+
+def _assemble_pack(plan: Dict[str, Any], images: Dict[str, ImageAsset]) -> Dict[str, Any]:
+    """
+    Combine a pack plan with generated images, keyed by image job. Image
+    fields hold raw `ImageAsset`s; the API encodes them for the client.
+    """
+    response_payload = _text_payload(plan)
+    response_payload["pack_content"] = [
+        {**item, "image_data_url": images.get(item["image_key"])}
+        for item in plan["pack_content"]
+    ]
+    response_payload["scene_images"] = {
+        job["scene_slot"]: images.get(job["key"]) for job in plan["image_jobs"]
     }
-    
     return response_payload
+
+
+# Prompt -> (kind, task) for images started before the final plan is known
+Speculation = Dict[str, Tuple[str, "asyncio.Task[ImageAsset]"]]
+
+
+def _start_speculation(theme: str, keywords: str, subject: str, activity: Optional[str]) -> Speculation:
+    """
+    Start the images in `speculative_image_slots` before the text call
+    returns, from prompts built on the request alone (only the setting has
+    one). The image is used only if the plan's prompt turns out to match;
+    otherwise it is discarded and counted as cancelled or wasted. Batch
+    work (which runs with a rate-limit reserve) never speculates.
+    """
+    slots = {slot.strip() for slot in settings.speculative_image_slots.split(",") if slot.strip()}
+    if not slots or current_reserve() > 0:
+        return {}
+    return {
+        job["prompt"]: ("predicted", asyncio.create_task(_generate_image(job["prompt"], job["label"], role=job["role"])))
+        for job in _request_only_jobs(theme, keywords, subject, activity)
+        if job["scene_slot"] in slots
+    }
+
+
+def _claim_speculation(speculative: Speculation, job: Dict[str, str]) -> Optional["asyncio.Task[ImageAsset]"]:
+    """Hand over an early image whose prompt the real plan turned out to use."""
+    entry = speculative.pop(job["prompt"], None)
+    if entry is None:
+        return None
+    kind, task = entry
+    SPECULATIVE_IMAGES.inc(kind=kind, outcome="hit")
+    return task
+
+
+def _discard_speculation(speculative: Speculation) -> None:
+    """Cancel early images the plan did not use, counting the ones already paid for."""
+    for kind, task in speculative.values():
+        if task.done():
+            SPECULATIVE_IMAGES.inc(kind=kind, outcome="wasted")
+        else:
+            task.cancel()
+            SPECULATIVE_IMAGES.inc(kind=kind, outcome="cancelled")
+    speculative.clear()
+
+
+async def _text_and_plan(
+    theme: str, level: str, keywords: str, subject: str, activity: Optional[str]
+) -> Tuple[Dict[str, Any], Dict[str, "asyncio.Task[ImageAsset]"]]:
+    """
+    Run the text call with early image work alongside it: predicted images
+    from the start, then, as soon as the streamed response has its
+    `semantic_components` (and `math_details` for name_the_number), every
+    image those fields determine. Returns the plan and, keyed by image job,
+    the early tasks it can reuse.
+    """
+    speculative = _start_speculation(theme, keywords, subject, activity)
+    needed = {"semantic_components"}
+    if subject == "math" and activity == "name_the_number":
+        needed.add("math_details")
+    fields: Dict[str, Any] = {}
+    
+    def _on_field(key: str, value: Any) -> None:
+        if needed <= fields.keys():
+            return
+        fields[key] = value
+        if not needed <= fields.keys():
+            return
+        early_plan = _plan_pack(dict(fields), theme, keywords, subject, activity)
+        for job in early_plan["image_jobs"]:
+            if job["prompt"] not in speculative:
+                speculative[job["prompt"]] = ("streamed", asyncio.create_task(_generate_image(job["prompt"], job["label"], role=job["role"])))
+        logger.info(f"Started images for {theme} before the text response finished")
+    
+    token = _text_field_listener.set(_on_field)
+    try:
+        text_json = await call_text(theme, level, keywords, subject, activity)
+        plan = _plan_pack(text_json, theme, keywords, subject, activity)
+        reused = {}
+        for job in plan["image_jobs"]:
+            task = _claim_speculation(speculative, job)
+            if task is not None:
+                reused[job["key"]] = task
+        return plan, reused
+    finally:
+        _text_field_listener.reset(token)
+        _discard_speculation(speculative)
+
+
+async def generate_pack(theme: str, level: str, keywords: str, subject: str = "language", activity: Optional[str] = None) -> Dict[str, Any]:
+    plan, speculated = await _text_and_plan(theme, level, keywords, subject, activity)
+    report_progress("text", 0.2)
+    image_jobs = plan["image_jobs"]
+    finished = 0
+    
+    async def _tracked(job: Dict[str, str]) -> ImageAsset:
+        nonlocal finished
+        if job["key"] in speculated:
+            image = await speculated[job["key"]]
+        else:
+            image = await _generate_image(job["prompt"], job["label"], role=job["role"])
+        finished += 1
+        report_progress("images", 0.2 + 0.6 * finished / len(image_jobs))
+        return image
+    
+    tasks = [asyncio.create_task(_tracked(job)) for job in image_jobs]
+    deadline = current_deadline()
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=deadline.remaining() if deadline else None)
+    finally:
+        # Stop paying for images nobody will see, whether we ran out of time
+        # or the caller was cancelled.
+        for task in list(tasks) + list(speculated.values()):
+            if not task.done():
+                task.cancel()
+    if pending:
+        logger.warning(f"Deadline reached with {len(pending)} image(s) outstanding for {theme}; using placeholders")
+        PLACEHOLDERS.inc(len(pending), reason="deadline")
+    images = {
+        job["key"]: task.result() if task in done else _generate_svg_placeholder(job["label"])
+        for job, task in zip(image_jobs, tasks)
+    }
+    return _assemble_pack(plan, images)
+
+
+async def stream_pack(theme: str, level: str, keywords: str, subject: str = "language", activity: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Generate a pack incrementally. Yields a `text` event as soon as the text
+    call returns, an `image` event as each image finishes, then a final `pack`
+    event carrying the same payload `generate_pack` would return.
+    """
+    plan, speculated = await _text_and_plan(theme, level, keywords, subject, activity)
+    tasks = {
+        speculated.get(job["key"]) or asyncio.create_task(_generate_image(job["prompt"], job["label"], role=job["role"])): job
+        for job in plan["image_jobs"]
+    }
+    images: Dict[str, ImageAsset] = {}
+    deadline = current_deadline()
+    try:
+        yield {"event": "text", "data": _text_payload(plan)}
+        pending = set(tasks)
+        while pending:
+            timeout = deadline.remaining() if deadline else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            finished = [(task, task.result()) for task in done]
+            if not done:
+                logger.warning(f"Deadline reached with {len(pending)} image(s) outstanding for {theme}; using placeholders")
+                PLACEHOLDERS.inc(len(pending), reason="deadline")
+                for task in pending:
+                    task.cancel()
+                finished = [(task, _generate_svg_placeholder(tasks[task]["label"])) for task in pending]
+                pending = set()
+            for task, image in finished:
+                job = tasks[task]
+                images[job["key"]] = image
+                yield {
+                    "event": "image",
+                    "data": {
+                        "image_key": job["key"],
+                        "scene_slot": job["scene_slot"],
+                        "orders": [item["order"] for item in plan["pack_content"] if item["image_key"] == job["key"]],
+                        "image_data_url": images[job["key"]],
+                    },
+                }
+    finally:
+        # The consumer may stop early (e.g. the client disconnected)
+        for task in tasks:
+            task.cancel()
+    
+    yield {"event": "pack", "data": _assemble_pack(plan, images)}
@@ -0,0 +1,223 @@
+"""
+Open-loop load generator for `/api/generate_pack`.
+
+Against a running server:
+
+    python -m backend.loadtest --url http://127.0.0.1:8000 --rps 2 --duration 60
+
+Or start the fake Gemini server and the app itself, so nothing touches real
+quota (fake-server options are passed through after `--`):
+
+    python -m backend.loadtest --spawn --rps 2 --duration 60 --output load.json -- --quota-rate 0.05
+
+Results are printed and optionally written as JSON for comparing builds.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+
+DEFAULT_THEMES = ("Birds", "Beach", "Kai time", "Rain", "Playground", "Marae visit", "Bugs", "Trains")
+
+
+def percentile(values: Sequence[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile; None for no samples."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def peak_rss_bytes(pid: int) -> Optional[int]:
+    """High-water resident set size of a process, where /proc is available."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+def summarise(
+    latencies: List[float],
+    outcomes: "Counter[str]",
+    elapsed_secs: float,
+    config: Dict[str, Any],
+    peak_rss: Optional[int] = None,
+) -> Dict[str, Any]:
+    ok = outcomes.get("200", 0)
+    total = sum(outcomes.values())
+
+    def _ms(value: Optional[float]) -> Optional[float]:
+        return None if value is None else round(value * 1000, 1)
+
+    return {
+        "config": config,
+        "requests": total,
+        "succeeded": ok,
+        "elapsed_secs": round(elapsed_secs, 2),
+        "throughput_rps": round(ok / elapsed_secs, 3) if elapsed_secs else 0.0,
+        "latency_ms": {
+            "p50": _ms(percentile(latencies, 0.50)),
+            "p95": _ms(percentile(latencies, 0.95)),
+            "p99": _ms(percentile(latencies, 0.99)),
+            "max": _ms(max(latencies) if latencies else None),
+        },
+        "outcomes": dict(sorted(outcomes.items())),
+        "error_rate": round((total - ok) / total, 4) if total else 0.0,
+        "peak_rss_bytes": peak_rss,
+    }
+
+
+async def run_load(
+    base_url: str,
+    rps: float,
+    duration_secs: float,
+    themes: Sequence[str] = DEFAULT_THEMES,
+    unique: bool = True,
+    timeout_secs: float = 120.0,
+) -> Dict[str, Any]:
+    """
+    Fire requests on a fixed schedule regardless of how fast earlier ones
+    finish, so queueing inside the app shows up as latency.
+    """
+    latencies: List[float] = []
+    outcomes: "Counter[str]" = Counter()
+    interval = 1.0 / rps
+    total_requests = max(1, int(rps * duration_secs))
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout_secs) as client:
+
+        async def _one(index: int) -> None:
+            theme = themes[index % len(themes)]
+            # A unique suffix defeats the pack and image caches
+            payload = {"theme": f"{theme} {index}" if unique else theme, "level": "ECE"}
+            started = time.perf_counter()
+            try:
+                response = await client.post("/api/generate_pack", json=payload)
+                outcomes[str(response.status_code)] += 1
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - started)
+            except httpx.HTTPError as exc:
+                outcomes[type(exc).__name__] += 1
+
+        started = time.perf_counter()
+        tasks = []
+        for index in range(total_requests):
+            delay = started + index * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(_one(index)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    config = {"base_url": base_url, "rps": rps, "duration_secs": duration_secs, "unique_themes": unique}
+    return summarise(latencies, outcomes, elapsed, config)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(url: str, timeout_secs: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout_secs
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout_secs}s")
+
+
+def _spawn_and_run(args: argparse.Namespace, fake_args: List[str]) -> Dict[str, Any]:
+    fake_port, app_port = _free_port(), _free_port()
+    with tempfile.TemporaryDirectory(prefix="tohu-load-") as cache_dir:
+        env = {
+            **os.environ,
+            "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "load-test"),
+            "GEMINI_BASE_URL": f"http://127.0.0.1:{fake_port}",
+            "GEMINI_HTTP2": "false",
+            "CACHE_DIR": cache_dir,
+            "RATE_LIMIT_PATH": str(Path(cache_dir) / "ratelimit.sqlite3"),
+            "JOB_QUEUE_PATH": str(Path(cache_dir) / "jobs.sqlite3"),
+            "COST_LEDGER_PATH": str(Path(cache_dir) / "ledger.sqlite3"),
+            # Measure the app, not our own client-side quota
+            "TEXT_RPM": os.environ.get("TEXT_RPM", "100000"),
+            "IMAGE_RPM": os.environ.get("IMAGE_RPM", "100000"),
+            "RATE_LIMIT_BURST": os.environ.get("RATE_LIMIT_BURST", "1000"),
+        }
+        fake = subprocess.Popen(
+            [sys.executable, "-m", "backend.fake_gemini", "--port", str(fake_port), *fake_args], env=env
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.app:app", "--port", str(app_port), "--log-level", "warning"],
+            env=env,
+        )
+        try:
+            _wait_until_up(f"http://127.0.0.1:{fake_port}/healthz")
+            _wait_until_up(f"http://127.0.0.1:{app_port}/")
+            result = asyncio.run(
+                run_load(f"http://127.0.0.1:{app_port}", args.rps, args.duration, unique=not args.repeat_themes)
+            )
+            result["peak_rss_bytes"] = peak_rss_bytes(server.pid)
+            result["config"]["fake_gemini_args"] = fake_args
+            return result
+        finally:
+            for process in (server, fake):
+                process.terminate()
+            for process in (server, fake):
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+
+def main() -> None:
+    argv = sys.argv[1:]
+    fake_args: List[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, fake_args = argv[:split], argv[split + 1 :]
+    parser = argparse.ArgumentParser(description="Load test /api/generate_pack.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="App to drive when not using --spawn.")
+    parser.add_argument("--spawn", action="store_true", help="Start the fake Gemini server and the app locally.")
+    parser.add_argument("--rps", type=float, default=1.0, help="Target requests per second.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to keep sending requests.")
+    parser.add_argument("--repeat-themes", action="store_true", help="Reuse themes so caches can hit.")
+    parser.add_argument("--pid", type=int, default=None, help="App process to read peak RSS from.")
+    parser.add_argument("--output", default=None, help="Write the JSON result to this file.")
+    args = parser.parse_args(argv)
+
+    if args.spawn:
+        result = _spawn_and_run(args, fake_args)
+    else:
+        result = asyncio.run(run_load(args.url, args.rps, args.duration, unique=not args.repeat_themes))
+        if args.pid is not None:
+            result["peak_rss_bytes"] = peak_rss_bytes(args.pid)
+
+    report = json.dumps(result, indent=2)
+    print(report)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
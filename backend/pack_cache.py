@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import os
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from . import prompts
+from .schemas import GenerateRequest
+from .settings import settings
+
+logger = logging.getLogger("tohu-kaiako")
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=1)
+def prompt_fingerprint() -> str:
+    """
+    Fingerprint everything that shapes a pack besides the request itself.
+    Editing prompts.py or switching models invalidates previously cached packs.
+    """
+    digest = hashlib.sha256()
+    digest.update(inspect.getsource(prompts).encode("utf-8"))
+    digest.update(settings.text_model.encode("utf-8"))
+    digest.update(settings.image_model.encode("utf-8"))
+    digest.update(settings.image_routes.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _normalise_text(value: Optional[str]) -> str:
+    return " ".join((value or "").split()).casefold()
+
+
+def normalise_request(req: GenerateRequest) -> Dict[str, Any]:
+    """Reduce a request to the fields that affect the generated pack."""
+    return {
+        "theme": _normalise_text(req.theme),
+        "level": _normalise_text(req.level),
+        "keywords": _normalise_text(req.keywords),
+        "subject": _normalise_text(req.subject),
+        "activity": _normalise_text(req.activity) or None,
+    }
+
+
+def pack_cache_key(req: GenerateRequest) -> str:
+    """Key a pack on the normalised request plus the prompt-version fingerprint."""
+    payload = json.dumps(
+        {"request": normalise_request(req), "fingerprint": prompt_fingerprint()},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PackCache:
+    """Disk-backed store of finished pack payloads, one JSON file per cache key."""
+
+    def __init__(self, directory: Path, ttl_secs: int, clock: Callable[[], float] = time.time) -> None:
+        self.directory = Path(directory)
+        self.ttl_secs = ttl_secs
+        self._clock = clock
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_secs > 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached payload if it exists and has not expired."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                record = json.load(handle)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if self._clock() - float(record.get("stored_at", 0)) > self.ttl_secs:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            self.misses += 1
+            return None
+        self.hits += 1
+        return record.get("payload")
+
+    def put(self, key: str, payload: Dict[str, Any]) -> None:
+        """Persist a payload atomically so concurrent readers never see partial files."""
+        if not self.enabled:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as handle:
+                json.dump({"stored_at": self._clock(), "payload": payload}, handle)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            logger.warning(f"Unable to write pack cache entry {key}: {exc}")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key onto one in-flight task.
+    Waiters are shielded, so a caller going away never cancels work others
+    wait on; the shared task is cancelled only when its last waiter leaves.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+        self._waiters: Dict[str, int] = {}
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+
+            def _forget(done: "asyncio.Task[Any]") -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+
+            task.add_done_callback(_forget)
+        else:
+            logger.info(f"Joining in-flight generation for {key[:12]}")
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters.get(key) == 1 and not task.done():
+                logger.info(f"Cancelling abandoned generation for {key[:12]}")
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
@@ -0,0 +1,120 @@
+"""
+Producing, storing and caching finished packs. The API (`app.py`) and the
+pregeneration CLI (`pregen.py`) both go through these stores and helpers, so
+a pack warmed overnight is the one an interactive request is served.
+"""
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .assets import AssetStore, map_pack_images
+from .gemini_client import GeminiError
+from .ledger import CostLedger
+from .llm import generate_pack, is_placeholder_image
+from .metrics import CACHE_LOOKUPS
+from .pack_cache import PackCache, SingleFlight, pack_cache_key
+from .pack_store import PackStore
+from .progress import report_progress
+from .schemas import GenerateRequest
+from .settings import settings
+from .timing import PackTimings, collect_timings, timed_stage
+
+logger = logging.getLogger("tohu-kaiako")
+
+pack_cache = PackCache(Path(settings.cache_dir) / "packs", ttl_secs=settings.pack_cache_ttl_secs)
+pack_flights = SingleFlight()
+pack_store = PackStore(Path(settings.cache_dir) / "packs_by_id", ttl_secs=settings.pack_store_ttl_secs)
+asset_store = AssetStore(
+    Path(settings.cache_dir) / "assets",
+    max_bytes=settings.asset_store_max_bytes,
+    ttl_secs=settings.asset_store_ttl_secs,
+)
+cost_ledger = CostLedger(Path(settings.cost_ledger_path))
+
+
+def is_cacheable(pack_payload: Dict[str, Any]) -> bool:
+    # Packs with placeholder art are served but not cached, so the next
+    # request gets another chance at real images.
+    images = (pack_payload.get("scene_images") or {}).values()
+    return not any(is_placeholder_image(image) for image in images)
+
+
+async def finalise_pack(key: str, pack_payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Store a freshly generated pack so its PDF can be rendered on demand, and
+    cache it for identical requests.
+    """
+    pack_payload["pdf_url"] = f"/api/packs/{pack_payload['pack_id']}/pdf"
+    stored = await asyncio.to_thread(map_pack_images, pack_payload, asset_store.dehydrate)
+    await asyncio.to_thread(pack_store.save, stored)
+    if is_cacheable(pack_payload):
+        await asyncio.to_thread(pack_cache.put, key, stored)
+    report_progress("stored", 0.95)
+    return pack_payload
+
+
+def hydrate_pack(stored: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Resolve a stored pack's image references; None if any image has been evicted."""
+    if stored is None:
+        return None
+    try:
+        return map_pack_images(stored, asset_store.hydrate)
+    except KeyError as exc:
+        logger.info(f"Stored pack {stored.get('pack_id')} is missing image {str(exc)[:14]}")
+        return None
+
+
+def load_cached_pack(key: str) -> Optional[Dict[str, Any]]:
+    return hydrate_pack(pack_cache.get(key))
+
+
+def load_stored_pack(pack_id: str) -> Optional[Dict[str, Any]]:
+    return hydrate_pack(pack_store.load(pack_id))
+
+
+async def record_cost(req: GenerateRequest, pack_payload: Dict[str, Any], timings: PackTimings) -> None:
+    """Append a generated pack to the cost ledger; bookkeeping never fails a pack."""
+    images = (pack_payload.get("scene_images") or {}).values()
+    placeholders = sum(1 for image in images if is_placeholder_image(image))
+    try:
+        await asyncio.to_thread(cost_ledger.append, pack_payload["pack_id"], req.model_dump(), timings, placeholders)
+    except Exception as exc:
+        logger.warning(f"Unable to record cost ledger entry for {pack_payload.get('pack_id')}: {exc}")
+
+
+async def build_pack_payload(req: GenerateRequest) -> Dict[str, Any]:
+    """Run the generation pipeline: text and images. The PDF is rendered lazily."""
+    return await generate_pack(req.theme, req.level, req.keywords or "", req.subject, req.activity)
+
+
+async def cached_pack_payload(req: GenerateRequest) -> Dict[str, Any]:
+    """
+    Serve identical requests from the pack cache, and let concurrent identical
+    requests share a single in-flight generation.
+    """
+    key = pack_cache_key(req)
+    cached = await asyncio.to_thread(load_cached_pack, key)
+    CACHE_LOOKUPS.inc(cache="pack", result="miss" if cached is None else "hit")
+    if cached is not None:
+        logger.info(f"Pack cache hit for theme: {req.theme}")
+        return cached
+
+    async def _produce() -> Dict[str, Any]:
+        with collect_timings() as timings:
+            with timed_stage("pack"):
+                pack_payload = await build_pack_payload(req)
+                pack_payload = await finalise_pack(key, pack_payload)
+            await record_cost(req, pack_payload, timings)
+            return pack_payload
+
+    return await pack_flights.do(key, _produce)
+
+
+def quota_error(exc: Optional[BaseException]) -> Optional[GeminiError]:
+    """Find a model quota rejection (HTTP 429) anywhere in the exception chain."""
+    while exc is not None:
+        if isinstance(exc, GeminiError) and exc.status_code == 429:
+            return exc
+        exc = exc.__cause__
+    return None
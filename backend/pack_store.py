@@ -0,0 +1,73 @@
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("tohu-kaiako")
+
+_PACK_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,80}$")
+
+
+def is_valid_pack_id(pack_id: str) -> bool:
+    return bool(_PACK_ID_PATTERN.match(pack_id))
+
+
+class PackStore:
+    """
+    Finished packs addressed by `pack_id`, so artefacts such as the PDF can be
+    produced on demand after the generation request has returned.
+    """
+
+    def __init__(self, directory: Path, ttl_secs: int, clock: Callable[[], float] = time.time) -> None:
+        self.directory = Path(directory)
+        self.ttl_secs = ttl_secs
+        self._clock = clock
+
+    def _path(self, pack_id: str, suffix: str) -> Path:
+        if not is_valid_pack_id(pack_id):
+            raise ValueError(f"Invalid pack id: {pack_id!r}")
+        return self.directory / f"{pack_id}{suffix}"
+
+    def _write(self, path: Path, data: bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            logger.warning(f"Unable to write {path.name}: {exc}")
+
+    def _read(self, path: Path) -> Optional[bytes]:
+        try:
+            if self._clock() - path.stat().st_mtime > self.ttl_secs:
+                path.unlink()
+                return None
+            return path.read_bytes()
+        except OSError:
+            return None
+
+    def save(self, pack_payload: Dict[str, Any]) -> None:
+        pack_id = pack_payload["pack_id"]
+        self._write(self._path(pack_id, ".json"), json.dumps(pack_payload).encode("utf-8"))
+
+    def load(self, pack_id: str) -> Optional[Dict[str, Any]]:
+        if not is_valid_pack_id(pack_id):
+            return None
+        raw = self._read(self._path(pack_id, ".json"))
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    def save_pdf(self, pack_id: str, pdf_bytes: bytes) -> None:
+        self._write(self._path(pack_id, ".pdf"), pdf_bytes)
+
+    def load_pdf(self, pack_id: str) -> Optional[bytes]:
+        if not is_valid_pack_id(pack_id):
+            return None
+        return self._read(self._path(pack_id, ".pdf"))
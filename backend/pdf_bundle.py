@@ -0,0 +1,220 @@
+import io
+import logging
+import unicodedata
+import zlib
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+from fpdf.fonts import CORE_FONTS_CHARWIDTHS
+
+from .assets import ImageAsset
+from .renditions import RENDITIONS, transcode
+
+logger = logging.getLogger("tohu-kaiako")
+
+# A4 in points; layout below is in millimetres to match pdf_utils
+PAGE_WIDTH = 595.28
+PAGE_HEIGHT = 841.89
+MM = 72 / 25.4
+
+_FONTS = {"regular": ("F1", "Helvetica", "helvetica"), "bold": ("F2", "Helvetica-Bold", "helveticaB")}
+
+
+def _encode_text(text: str) -> bytes:
+    """Encode for the standard fonts' WinAnsi encoding, dropping macrons and other marks it lacks."""
+    try:
+        return text.encode("cp1252")
+    except UnicodeEncodeError:
+        stripped = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+        return stripped.encode("cp1252", errors="replace")
+
+
+def _escape(data: bytes) -> bytes:
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _text_width(data: bytes, weight: str, size: float) -> float:
+    widths = CORE_FONTS_CHARWIDTHS[_FONTS[weight][2]]
+    return sum(widths.get(chr(byte), 500) for byte in data) * size / 1000
+
+
+def _wrap(text: str, weight: str, size: float, max_width: float) -> List[bytes]:
+    lines: List[bytes] = []
+    current = b""
+    for word in _encode_text(text).split():
+        candidate = current + b" " + word if current else word
+        if current and _text_width(candidate, weight, size) > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _jpeg_for_pdf(asset: ImageAsset) -> Optional[Tuple[bytes, int, int, str]]:
+    """Return `(jpeg, width, height, colour space)` for embedding, re-encoding other formats."""
+    from PIL import Image
+
+    data = asset.data
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            fmt, mode = image.format, image.mode
+        if fmt != "JPEG" or mode not in ("RGB", "L"):
+            data, _ = transcode(data, RENDITIONS["pdf"])
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+            mode = image.mode
+    except Exception as exc:
+        logger.warning(f"Skipping unreadable image in PDF bundle: {exc}")
+        return None
+    return data, width, height, "DeviceGray" if mode == "L" else "DeviceRGB"
+
+
+class PdfBundleWriter:
+    """
+    Write a multi-page handout PDF incrementally: every call returns the
+    bytes to send next, so a bundle can be streamed while later pages are
+    still being prepared. Images are embedded once per key and shared by
+    every page that shows them; the writer keeps only object offsets, never
+    image data. Pages use the same layout as `build_single_page_pdf`.
+    """
+
+    def __init__(self) -> None:
+        self._offsets: Dict[int, int] = {}
+        self._position = 0
+        self._next_object = 5  # 1 catalog, 2 page tree, 3-4 fonts
+        self._images: Dict[str, Tuple[str, int]] = {}
+        self._pages: List[int] = []
+        self._placed: Set[str] = set()
+        self.images_embedded = 0
+        self.images_reused = 0
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def _allocate(self) -> int:
+        number = self._next_object
+        self._next_object += 1
+        return number
+
+    def _emit(self, chunks: List[bytes], data: bytes) -> None:
+        chunks.append(data)
+        self._position += len(data)
+
+    def _object(self, chunks: List[bytes], number: int, body: bytes, stream: Optional[bytes] = None) -> None:
+        self._offsets[number] = self._position
+        if stream is None:
+            self._emit(chunks, b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        else:
+            self._emit(chunks, b"%d 0 obj\n%s\nstream\n%s\nendstream\nendobj\n" % (number, body, stream))
+
+    def start(self) -> bytes:
+        chunks: List[bytes] = []
+        self._emit(chunks, b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        for number, (_, base_font, _) in zip((3, 4), _FONTS.values()):
+            self._object(
+                chunks,
+                number,
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % base_font.encode(),
+            )
+        return b"".join(chunks)
+
+    def has_image(self, key: str) -> bool:
+        return key in self._images
+
+    def add_image(self, key: str, asset: ImageAsset) -> bytes:
+        """Embed an image under `key` (its digest, say) unless it already is. Returns the bytes to send."""
+        if key in self._images:
+            return b""
+        prepared = _jpeg_for_pdf(asset)
+        if prepared is None:
+            return b""
+        jpeg, width, height, colour_space = prepared
+        number = self._allocate()
+        chunks: List[bytes] = []
+        self._object(
+            chunks,
+            number,
+            b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /%s "
+            b"/BitsPerComponent 8 /Filter /DCTDecode /Length %d >>" % (width, height, colour_space.encode(), len(jpeg)),
+            jpeg,
+        )
+        self._images[key] = (f"I{len(self._images) + 1}", number)
+        self.images_embedded += 1
+        return b"".join(chunks)
+
+    def add_page(self, theme: str, image_keys: Mapping[str, Optional[str]], sentence_nzsl: str, sentence_en: str) -> bytes:
+        """
+        Add a handout page. `image_keys` maps the object, action, setting and
+        scene slots to keys passed to `add_image`; unknown keys leave the slot empty.
+        """
+        ops: List[bytes] = []
+        used: Dict[str, int] = {}
+
+        def _text_line(line: bytes, weight: str, size: float, top_mm: float, height_mm: float) -> None:
+            # Centre across the 190 mm text column, baseline placed the way fpdf places it
+            x = 10 * MM + (190 * MM - _text_width(line, weight, size)) / 2
+            baseline = PAGE_HEIGHT - (top_mm + height_mm / 2) * MM - 0.3 * size
+            ops.append(b"BT /%s %.2f Tf %.2f %.2f Td (%s) Tj ET" % (_FONTS[weight][0].encode(), size, x, baseline, _escape(line)))
+
+        _text_line(_encode_text(theme), "bold", 22, 10, 12)
+
+        margin, image_height, spacing = 12, 55, 4
+        image_width = (210 - 2 * margin - 3 * spacing) / 4
+        y_start = 24
+        x = margin
+        for slot in ["object", "action", "setting", "scene"]:
+            key = image_keys.get(slot)
+            if key is not None and key in self._images:
+                name, number = self._images[key]
+                used[name] = number
+                ops.append(
+                    b"q %.2f 0 0 %.2f %.2f %.2f cm /%s Do Q"
+                    % (image_width * MM, image_height * MM, x * MM, PAGE_HEIGHT - (y_start + image_height) * MM, name.encode())
+                )
+                if key in self._placed:
+                    self.images_reused += 1
+                self._placed.add(key)
+            x += image_width + spacing
+
+        y = y_start + image_height + 10
+        for line in _wrap(sentence_nzsl, "bold", 28, 188 * MM):
+            _text_line(line, "bold", 28, y, 14)
+            y += 14
+        y += 2
+        for line in _wrap(sentence_en, "regular", 20, 188 * MM):
+            _text_line(line, "regular", 20, y, 12)
+            y += 12
+
+        content = zlib.compress(b"\n".join(ops))
+        content_number = self._allocate()
+        page_number = self._allocate()
+        xobjects = b" ".join(b"/%s %d 0 R" % (name.encode(), number) for name, number in used.items())
+        chunks: List[bytes] = []
+        self._object(chunks, content_number, b"<< /Filter /FlateDecode /Length %d >>" % len(content), content)
+        self._object(
+            chunks,
+            page_number,
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> /XObject << %s >> >> >>"
+            % (PAGE_WIDTH, PAGE_HEIGHT, content_number, xobjects),
+        )
+        self._pages.append(page_number)
+        return b"".join(chunks)
+
+    def finish(self) -> bytes:
+        """Write the page tree, catalog and cross-reference table."""
+        chunks: List[bytes] = []
+        kids = b" ".join(b"%d 0 R" % number for number in self._pages)
+        self._object(chunks, 2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._pages)))
+        self._object(chunks, 1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref_offset = self._position
+        size = self._next_object
+        lines = [b"xref\n0 %d\n" % size, b"0000000000 65535 f \n"]
+        for number in range(1, size):
+            lines.append(b"%010d 00000 n \n" % self._offsets[number])
+        self._emit(chunks, b"".join(lines))
+        self._emit(chunks, b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref_offset))
+        return b"".join(chunks)
@@ -0,0 +1,93 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Optional
+
+from .assets import ImageAsset
+from .pdf_utils import build_single_page_pdf
+
+logger = logging.getLogger("tohu-kaiako")
+
+
+class PdfRenderQueueFull(RuntimeError):
+    """Raised when too many PDF renders are already running or waiting."""
+
+
+class PdfRenderPool:
+    """
+    Run `build_single_page_pdf` in a bounded pool of worker processes so that
+    CPU-bound fpdf work never blocks the event loop. At most `max_workers`
+    renders run at once and at most `max_queue` more may wait; beyond that
+    `render` fails fast with `PdfRenderQueueFull`.
+    With `max_workers=0` renders run in a thread instead (useful for tests).
+    """
+
+    def __init__(self, max_workers: int, max_queue: int) -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self.renders = 0
+        self.rejected = 0
+        self.total_render_ms = 0.0
+        self.last_render_ms = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        """Renders running or waiting for a worker process."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Renders waiting for a worker process."""
+        return max(0, self._in_flight - max(self.max_workers, 1))
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn keeps children free of the parent's event loop and threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def render(self, theme: str, images: Dict[str, ImageAsset], sentence_nzsl: str, sentence_en: str) -> bytes:
+        job = functools.partial(
+            build_single_page_pdf,
+            theme=theme,
+            images=images,
+            sentence_nzsl=sentence_nzsl,
+            sentence_en=sentence_en,
+        )
+        return await self._run(job, theme)
+
+    async def _run(self, job: Callable[[], bytes], label: str) -> bytes:
+        if self._in_flight >= max(self.max_workers, 1) + self.max_queue:
+            self.rejected += 1
+            raise PdfRenderQueueFull("PDF render queue is full")
+        self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            if self.max_workers > 0:
+                pdf_bytes = await asyncio.get_running_loop().run_in_executor(self._get_executor(), job)
+            else:
+                pdf_bytes = await asyncio.to_thread(job)
+        finally:
+            self._in_flight -= 1
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.renders += 1
+        self.total_render_ms += elapsed_ms
+        self.last_render_ms = elapsed_ms
+        logger.info(
+            f"Rendered PDF for {label} in {elapsed_ms:.0f} ms",
+            extra={"render_ms": round(elapsed_ms, 1), "pdf_bytes": len(pdf_bytes), "queue_depth": self.queue_depth},
+        )
+        return pdf_bytes
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -1,36 +1,22 @@
-import base64
-import os
-import tempfile
-from typing import Dict, Optional
+import io
+import logging
+from typing import Mapping
 
 from fpdf import FPDF
 
+from .assets import ImageAsset
 
-def _data_url_to_bytes(data_url: str) -> Optional[bytes]:
-    """Extract raw image bytes from a data URL."""
-    if not data_url or not data_url.startswith("data:"):
-        return None
-    try:
-        _, _, encoded = data_url.partition(",")
-        if not encoded:
-            return None
-        return base64.b64decode(encoded)
-    except (ValueError, base64.binascii.Error):
-        return None
+logger = logging.getLogger("tohu-kaiako")
 
 
-def build_single_page_pdf(
+def _draw_pack_page(
+    pdf: FPDF,
     theme: str,
-    images: Dict[str, str],
+    images: Mapping[str, ImageAsset],
     sentence_nzsl: str,
     sentence_en: str,
-) -> bytes:
-    """
-    Create a one-page PDF handout with four images and bilingual sentences.
-    Images should be provided as data URLs in the order object, action, setting, scene.
-    """
-    pdf = FPDF("P", "mm", "A4")
-    pdf.set_auto_page_break(False)
+) -> None:
+    """Add one handout page: the theme, four images and the bilingual sentences."""
     pdf.add_page()
     
     # Header
@@ -44,18 +30,15 @@ def build_single_page_pdf(
     available_width = pdf.w - 2 * margin - 3 * spacing
     image_width = available_width / 4
     
-    temp_paths = []
     y_start = pdf.get_y()
     x = margin
     for key in ["object", "action", "setting", "scene"]:
-        img_bytes = _data_url_to_bytes(images.get(key, ""))
-        if img_bytes:
-            tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-            tmp_file.write(img_bytes)
-            tmp_file.flush()
-            tmp_file.close()
-            temp_paths.append(tmp_file.name)
-            pdf.image(tmp_file.name, x=x, y=y_start, w=image_width, h=image_height)
+        image = images.get(key)
+        if image is not None and image.data and image.mime_type != "image/svg+xml":
+            try:
+                pdf.image(io.BytesIO(image.data), x=x, y=y_start, w=image_width, h=image_height)
+            except Exception as exc:  # one bad image should not cost the whole handout
+                logger.warning(f"Skipping unreadable {key} image in PDF: {exc}")
         x += image_width + spacing
     
     pdf.set_y(y_start + image_height + 10)
@@ -66,17 +49,29 @@ def build_single_page_pdf(
     pdf.ln(2)
     pdf.set_font("Helvetica", "", 20)
     pdf.multi_cell(0, 12, sentence_en, align="C")
-    
-    # Clean up temp files
-    for path in temp_paths:
-        try:
-            os.unlink(path)
-        except OSError:
-            pass
-    
+
+
+def _output_bytes(pdf: FPDF) -> bytes:
     output = pdf.output(dest="S")
     if isinstance(output, str):
         return output.encode("latin1")
     if isinstance(output, bytearray):
         return bytes(output)
     return output
+
+
+def build_single_page_pdf(
+    theme: str,
+    images: Mapping[str, ImageAsset],
+    sentence_nzsl: str,
+    sentence_en: str,
+) -> bytes:
+    """
+    Create a one-page PDF handout with four images and bilingual sentences.
+    Images are raw `ImageAsset`s keyed object, action, setting, scene and are
+    read straight from memory; placeholders (SVG) leave their slot empty.
+    """
+    pdf = FPDF("P", "mm", "A4")
+    pdf.set_auto_page_break(False)
+    _draw_pack_page(pdf, theme, images, sentence_nzsl, sentence_en)
+    return _output_bytes(pdf)
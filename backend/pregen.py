@@ -0,0 +1,186 @@
+"""
+Warm the pack cache for a catalogue of common themes, e.g. overnight:
+
+    python -m backend.pregen themes.csv --levels ECE,Y1-2 --subjects language,science
+
+The CSV needs a `theme` column; optional `level`, `subject`, `keywords` and
+`activity` columns pin a row, otherwise it is expanded across `--levels`
+and `--subjects`. Finished requests are appended to a checkpoint file, so
+an interrupted run picks up where it stopped. Entries older than the pack
+cache TTL are ignored, so a nightly rerun regenerates packs whose cache
+entries have expired. Packs go through the same
+pipeline and stores as the API, at batch priority.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from .deadline import deadline_scope
+from .gemini_client import close_client
+from .pack_cache import pack_cache_key
+from .pack_service import cached_pack_payload, is_cacheable, quota_error
+from .rate_limit import yield_to_interactive
+from .schemas import GenerateRequest
+from .settings import settings
+
+logger = logging.getLogger("tohu-kaiako")
+
+# Checkpoint statuses; anything else is retried on the next run
+DONE_STATUSES = {"generated", "cached"}  # "cached" is only in checkpoints from older runs
+
+
+def load_catalogue(path: Path, levels: Sequence[str], subjects: Sequence[str]) -> List[GenerateRequest]:
+    """Expand a theme CSV into distinct requests, in file order."""
+    requests: List[GenerateRequest] = []
+    seen: Set[str] = set()
+    with Path(path).open(newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            theme = (row.get("theme") or "").strip()
+            if not theme:
+                continue
+            for level in [row["level"].strip()] if (row.get("level") or "").strip() else levels:
+                for subject in [row["subject"].strip()] if (row.get("subject") or "").strip() else subjects:
+                    req = GenerateRequest(
+                        theme=theme,
+                        level=level,
+                        subject=subject,
+                        keywords=(row.get("keywords") or "").strip(),
+                        activity=(row.get("activity") or "").strip() or None,
+                    )
+                    key = pack_cache_key(req)
+                    if key not in seen:
+                        seen.add(key)
+                        requests.append(req)
+    return requests
+
+
+def read_checkpoint(path: Path, max_age_secs: Optional[float] = None) -> Set[str]:
+    """Return the cache keys a previous run finished within `max_age_secs` (default: the pack cache TTL)."""
+    if max_age_secs is None:
+        max_age_secs = settings.pack_cache_ttl_secs
+    cutoff = time.time() - max_age_secs
+    done: Set[str] = set()
+    try:
+        with Path(path).open(encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interrupted run
+                if entry.get("status") in DONE_STATUSES and entry.get("stored_at", 0) >= cutoff:
+                    done.add(entry["key"])
+    except OSError:
+        pass
+    return done
+
+
+class Pregenerator:
+    """
+    Generate a catalogue with at most `concurrency` packs in flight. A quota
+    rejection pauses every worker for the server's Retry-After (or the
+    configured backoff) and the request is retried, up to `max_quota_retries`.
+    """
+
+    def __init__(self, checkpoint_path: Path, concurrency: int = 2, max_quota_retries: int = 5) -> None:
+        self.checkpoint_path = Path(checkpoint_path)
+        self.concurrency = concurrency
+        self.max_quota_retries = max_quota_retries
+        self.counts: Dict[str, int] = {}
+        self._resume_at = 0.0
+
+    def _checkpoint(self, req: GenerateRequest, key: str, status: str, detail: Optional[str] = None) -> None:
+        self.counts[status] = self.counts.get(status, 0) + 1
+        entry: Dict[str, Any] = {
+            "key": key,
+            "theme": req.theme,
+            "level": req.level,
+            "subject": req.subject,
+            "status": status,
+            "stored_at": time.time(),
+        }
+        if detail:
+            entry["detail"] = detail
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.checkpoint_path.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    async def _wait_for_quota(self) -> None:
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _generate(self, req: GenerateRequest, key: str) -> None:
+        for attempt in range(self.max_quota_retries + 1):
+            await self._wait_for_quota()
+            try:
+                with deadline_scope(settings.batch_item_timeout_secs), yield_to_interactive(settings.batch_reserve_tokens):
+                    pack_payload = await cached_pack_payload(req)
+            except Exception as exc:
+                quota = quota_error(exc)
+                if quota is None or attempt == self.max_quota_retries:
+                    logger.warning(f"Pregeneration failed for {req.theme} ({req.level}, {req.subject}): {exc}")
+                    self._checkpoint(req, key, "failed", str(exc))
+                    return
+                pause = quota.retry_after or settings.quota_backoff_max_secs
+                self._resume_at = max(self._resume_at, time.monotonic() + pause)
+                logger.info(f"Model quota exhausted; pausing pregeneration for {pause:.0f}s")
+                continue
+            # Packs with placeholder art are not cached, so try them again next run
+            self._checkpoint(req, key, "generated" if is_cacheable(pack_payload) else "placeholder")
+            return
+
+    async def run(self, requests: Sequence[GenerateRequest]) -> Dict[str, int]:
+        """Generate every request not already finished in the checkpoint; return counts by status."""
+        done = await asyncio.to_thread(read_checkpoint, self.checkpoint_path)
+        pending = [(req, key) for req in requests if (key := pack_cache_key(req)) not in done]
+        self.counts["skipped"] = len(requests) - len(pending)
+        logger.info(f"Pregenerating {len(pending)} packs ({self.counts['skipped']} already done)")
+        queue: "asyncio.Queue[Any]" = asyncio.Queue()
+        for item in pending:
+            queue.put_nowait(item)
+
+        async def _worker() -> None:
+            while not queue.empty():
+                req, key = queue.get_nowait()
+                await self._generate(req, key)
+
+        await asyncio.gather(*(_worker() for _ in range(max(1, self.concurrency))))
+        return self.counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pregenerate Tohu Kaiako packs for a theme catalogue.")
+    parser.add_argument("catalogue", type=Path, help="CSV with a theme column (and optional level, subject, keywords, activity).")
+    parser.add_argument("--levels", default="ECE", help="Comma-separated levels for rows without a level.")
+    parser.add_argument("--subjects", default="language", help="Comma-separated subjects for rows without a subject.")
+    parser.add_argument("--concurrency", type=int, default=2, help="Packs to generate at once.")
+    parser.add_argument("--checkpoint", type=Path, help="Progress file (default: <catalogue>.checkpoint.jsonl).")
+    parser.add_argument("--max-quota-retries", type=int, default=5, help="Retries per pack after quota rejections.")
+    args = parser.parse_args()
+
+    levels = [level.strip() for level in args.levels.split(",") if level.strip()]
+    subjects = [subject.strip() for subject in args.subjects.split(",") if subject.strip()]
+    requests = load_catalogue(args.catalogue, levels, subjects)
+    checkpoint = args.checkpoint or args.catalogue.with_suffix(".checkpoint.jsonl")
+    pregenerator = Pregenerator(checkpoint, concurrency=args.concurrency, max_quota_retries=args.max_quota_retries)
+
+    async def _run() -> Dict[str, int]:
+        try:
+            return await pregenerator.run(requests)
+        finally:
+            await close_client()
+
+    try:
+        counts = asyncio.run(_run())
+    except KeyboardInterrupt:
+        counts = pregenerator.counts
+    print(json.dumps({"requests": len(requests), **counts}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
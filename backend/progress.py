@@ -0,0 +1,31 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+logger = logging.getLogger("tohu-kaiako")
+
+ProgressCallback = Callable[[str, float], None]
+
+_progress_callback: ContextVar[Optional[ProgressCallback]] = ContextVar("tohu_progress_callback", default=None)
+
+
+def report_progress(stage: str, fraction: float) -> None:
+    """Report pipeline progress (0.0–1.0) to whoever is listening in this context."""
+    callback = _progress_callback.get()
+    if callback is None:
+        return
+    try:
+        callback(stage, max(0.0, min(1.0, fraction)))
+    except Exception as exc:  # progress must never break generation
+        logger.warning(f"Progress callback failed at stage {stage}: {exc}")
+
+
+@contextmanager
+def progress_reporter(callback: ProgressCallback) -> Iterator[None]:
+    """Route `report_progress` calls made in this context (and tasks it spawns) to `callback`."""
+    token = _progress_callback.set(callback)
+    try:
+        yield
+    finally:
+        _progress_callback.reset(token)
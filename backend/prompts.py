@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 def unified_image_prompt(theme: str, role: str, detail: str, seed: int) -> str:
     """
@@ -63,6 +63,13 @@ def component_image_prompt(theme: str, component_type: str, label: str, nzsl_sig
     detail = specs.get(role, f"{label} (NZSL: {nzsl_sign})")
     return unified_image_prompt(theme, role, detail, scene_seed)
 
+def setting_image_prompt(theme: str, keywords: str, scene_seed: int) -> str:
+    """Generate prompt for the place card from the request alone, so it can start before the text call returns."""
+    detail = f"A familiar everyday place where {theme} belongs, with no people or characters."
+    if keywords:
+        detail += f" Context keywords: {keywords}."
+    return unified_image_prompt(theme, "SETTING", detail, scene_seed)
+
 def scene_image_prompt(theme: str, keywords: str, components: List[Dict[str, str]], scene_seed: int) -> str:
     """Generate prompt for full scene (noun+verb+where)."""
     component_list = ", ".join([c['label'] for c in components])
@@ -234,3 +241,46 @@ Subject: {subject}
 Activity: {activity if activity else "General"}
 """.strip()
 
+
+
+def text_response_schema(subject: str = "language", activity: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Response schema for structured text output: only the fields the pack
+    planner reads, with semantic_components early so images can start while
+    the rest is still streaming.
+    """
+    string_list = {"type": "ARRAY", "items": {"type": "STRING"}}
+    component = {
+        "type": "OBJECT",
+        "properties": {
+            "type": {"type": "STRING"},
+            "label": {"type": "STRING"},
+            "nzsl_sign": {"type": "STRING"},
+            "semantic_role": {"type": "STRING"},
+        },
+        "required": ["type", "label", "nzsl_sign"],
+        "propertyOrdering": ["type", "label", "nzsl_sign", "semantic_role"],
+    }
+    properties: Dict[str, Any] = {
+        "nzsl_story_prompt": {
+            "type": "OBJECT",
+            "properties": {"key_signs": string_list},
+            "required": ["key_signs"],
+        },
+        "semantic_components": {"type": "ARRAY", "items": component},
+    }
+    if subject == "math" and activity == "name_the_number":
+        properties["math_details"] = {
+            "type": "OBJECT",
+            "properties": {"number": {"type": "INTEGER"}},
+            "required": ["number"],
+        }
+    properties["language_steps"] = string_list
+    properties["learning_prompts"] = string_list
+    properties["teacher_tip"] = {"type": "STRING"}
+    return {
+        "type": "OBJECT",
+        "properties": properties,
+        "required": [key for key in properties if key != "teacher_tip"],
+        "propertyOrdering": list(properties),
+    }
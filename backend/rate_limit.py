@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import random
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from .gemini_client import GeminiError
+
+logger = logging.getLogger("tohu-kaiako")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    blocked_until REAL NOT NULL DEFAULT 0,
+    penalty REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+_reserve: ContextVar[float] = ContextVar("tohu_rate_limit_reserve", default=0.0)
+
+
+def current_reserve() -> float:
+    """Tokens that calls made in this context must leave in the bucket."""
+    return _reserve.get()
+
+
+@contextmanager
+def yield_to_interactive(reserve: float) -> Iterator[None]:
+    """
+    Make model calls in this context (and tasks it spawns) wait until the
+    bucket holds `reserve` tokens beyond their own, so background work never
+    drains the budget that interactive requests draw on.
+    """
+    token = _reserve.set(reserve)
+    try:
+        yield
+    finally:
+        _reserve.reset(token)
+
+
+class QuotaExceededError(GeminiError):
+    """Raised when a call cannot be made within the model quota."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(message, status_code=429, retry_after=retry_after)
+
+
+class RateLimiter:
+    """
+    Token buckets stored in a SQLite file, so every web and worker process
+    pointing at the same file draws from one shared budget per bucket.
+
+    A 429 from the API blocks the whole bucket for an exponentially growing,
+    jittered backoff (or the server's Retry-After), which slows all processes
+    together; successes halve the backoff again.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        budgets: Dict[str, Tuple[float, float]],
+        backoff_base_secs: float = 1.0,
+        backoff_max_secs: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        # bucket -> (requests per minute, burst capacity); 0 rpm disables the bucket
+        self.path = Path(path)
+        self.budgets = budgets
+        self.backoff_base_secs = backoff_base_secs
+        self.backoff_max_secs = backoff_max_secs
+        self._clock = clock
+        self._initialised = False
+        self.throttles = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialised:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        if not self._initialised:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialised = True
+        return conn
+
+    def _load(self, conn: sqlite3.Connection, name: str, now: float) -> Tuple[float, float, float]:
+        """Return refilled `(tokens, blocked_until, penalty)` for a bucket."""
+        rpm, capacity = self.budgets[name]
+        row = conn.execute(
+            "SELECT tokens, updated_at, blocked_until, penalty FROM buckets WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            return capacity, 0.0, 0.0
+        tokens, updated_at, blocked_until, penalty = row
+        refill_from = max(updated_at, blocked_until) if blocked_until <= now else now
+        tokens = min(capacity, tokens + max(0.0, now - refill_from) * rpm / 60.0)
+        return tokens, blocked_until, penalty
+
+    def _store(self, conn: sqlite3.Connection, name: str, tokens: float, now: float, blocked_until: float, penalty: float) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO buckets (name, tokens, updated_at, blocked_until, penalty) VALUES (?, ?, ?, ?, ?)",
+            (name, tokens, now, blocked_until, penalty),
+        )
+
+    def try_acquire(self, name: str, reserve: float = 0.0) -> float:
+        """
+        Take a token if one is available with `reserve` tokens to spare.
+        Returns 0, or the seconds to wait before retrying.
+        """
+        rpm, capacity = self.budgets.get(name, (0, 0))
+        if rpm <= 0:
+            return 0.0
+        # A full bucket always admits the call, so a reserve cannot starve it
+        needed = 1 + min(reserve, max(0.0, capacity - 1))
+        now = self._clock()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, blocked_until, penalty = self._load(conn, name, now)
+                if blocked_until > now:
+                    wait = blocked_until - now
+                elif tokens >= needed:
+                    tokens -= 1
+                    wait = 0.0
+                else:
+                    wait = (needed - tokens) * 60.0 / rpm
+                self._store(conn, name, tokens, now, blocked_until, penalty)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    async def acquire(self, name: str, max_wait: float, reserve: float = 0.0) -> None:
+        """Wait for a token, giving up with QuotaExceededError after `max_wait` seconds."""
+        deadline = self._clock() + max_wait
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, name, reserve)
+            if wait <= 0:
+                return
+            remaining = deadline - self._clock()
+            if wait > remaining:
+                raise QuotaExceededError(f"Rate limit exceeded for {name} model calls", retry_after=wait)
+            # Jitter so processes released by the same backoff do not stampede
+            await asyncio.sleep(wait + random.uniform(0, min(1.0, wait * 0.1)))
+
+    def record_throttle(self, name: str, retry_after: Optional[float] = None) -> float:
+        """Block the bucket for every process after a 429. Returns the backoff applied."""
+        if name not in self.budgets:
+            return 0.0
+        self.throttles += 1
+        now = self._clock()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                _, blocked_until, penalty = self._load(conn, name, now)
+                penalty = min(self.backoff_max_secs, max(self.backoff_base_secs, penalty * 2))
+                delay = retry_after if retry_after else penalty * random.uniform(0.8, 1.2)
+                self._store(conn, name, 0.0, now, max(blocked_until, now + delay), penalty)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        logger.warning(f"Model quota hit for {name}; backing off {delay:.1f}s across workers")
+        return delay
+
+    def record_success(self, name: str) -> None:
+        """Relax the shared backoff after a successful call."""
+        if name not in self.budgets:
+            return
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE buckets SET penalty = CASE WHEN penalty / 2 < ? THEN 0 ELSE penalty / 2 END "
+                "WHERE name = ? AND penalty > 0",
+                (self.backoff_base_secs, name),
+            )
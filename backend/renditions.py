@@ -0,0 +1,90 @@
+import hashlib
+import io
+import logging
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Tuple
+
+from .assets import content_digest
+from .image_cache import ImageCache
+from .settings import settings
+
+logger = logging.getLogger("tohu-kaiako")
+
+
+class RenditionSpec(NamedTuple):
+    max_px: int
+    format: str  # Pillow format name
+    mime_type: str
+    quality: int
+
+
+# Cards and history show small thumbnails; the PDF prints images 55 mm tall
+RENDITIONS: Dict[str, RenditionSpec] = {
+    "thumb": RenditionSpec(settings.thumbnail_max_px, "WEBP", "image/webp", 78),
+    "pdf": RenditionSpec(settings.pdf_image_max_px, "JPEG", "image/jpeg", 85),
+}
+
+# Bump when transcoding changes so stale renditions are not served
+_RENDITION_VERSION = "1"
+
+_RASTER_MIME_TYPES = {"image/png", "image/jpeg", "image/webp", "image/gif", "image/bmp"}
+
+
+def transcode(data: bytes, spec: RenditionSpec) -> Tuple[bytes, str]:
+    """Downscale and re-encode an image; CPU-bound, so call it off the event loop."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image.thumbnail((spec.max_px, spec.max_px), Image.LANCZOS)
+        if spec.format == "JPEG" and image.mode != "RGB":
+            # JPEG has no alpha; flatten transparent areas onto white like the page
+            background = Image.new("RGB", image.size, "white")
+            converted = image.convert("RGBA")
+            background.paste(converted, mask=converted.getchannel("A"))
+            image = background
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        options: Dict[str, Any] = {"quality": spec.quality}
+        if spec.format == "WEBP":
+            options["method"] = 4
+        else:
+            options["optimize"] = True
+        buffer = io.BytesIO()
+        image.save(buffer, format=spec.format, **options)
+    return buffer.getvalue(), spec.mime_type
+
+
+class RenditionCache:
+    """
+    Size-appropriate copies of generated images, cached on disk under the
+    source image's content digest so each original is transcoded once.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, ttl_secs: int) -> None:
+        self.cache = ImageCache(directory, max_bytes=max_bytes, ttl_secs=ttl_secs)
+
+    @staticmethod
+    def _key(source_digest: str, name: str) -> str:
+        return hashlib.sha256(f"{source_digest}:{name}:{_RENDITION_VERSION}".encode("ascii")).hexdigest()
+
+    def get_or_create(self, data: bytes, mime_type: str, name: str) -> Tuple[bytes, str]:
+        """
+        Return the named rendition of `data`. Non-raster images (such as SVG
+        placeholders) and images that would not get smaller are returned as-is.
+        """
+        if mime_type not in _RASTER_MIME_TYPES:
+            return data, mime_type
+        key = self._key(content_digest(data), name)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            rendered, rendered_mime = transcode(data, RENDITIONS[name])
+        except Exception as exc:  # undecodable input is served untouched
+            logger.warning(f"Unable to make {name} rendition: {exc}")
+            return data, mime_type
+        if len(rendered) >= len(data):
+            rendered, rendered_mime = data, mime_type
+        self.cache.put(key, rendered, rendered_mime)
+        return rendered, rendered_mime
+
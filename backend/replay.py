@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from .gemini_client import GeminiClient, GeminiError
+
+logger = logging.getLogger("tohu-kaiako")
+
+
+def fixture_key(model: str, prompt: str, generation_config: Dict[str, Any]) -> str:
+    """Address a recorded response by everything that was sent to the model."""
+    payload = json.dumps({"model": model, "prompt": prompt, "config": generation_config}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _fixture_path(directory: Path, key: str) -> Path:
+    return directory / f"{key}.json"
+
+
+class RecordingGeminiClient(GeminiClient):
+    """Pass calls through to a real client and save each successful response."""
+
+    def __init__(self, inner: GeminiClient, directory: Path) -> None:
+        self.inner = inner
+        self.directory = Path(directory)
+
+    async def generate_content(self, model: str, prompt: str, generation_config: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        response = await self.inner.generate_content(model, prompt, generation_config)
+        record = {
+            "model": model,
+            "prompt_preview": prompt[:200],
+            "latency_secs": round(time.perf_counter() - started, 4),
+            "response": response,
+        }
+        await asyncio.to_thread(self._write, fixture_key(model, prompt, generation_config), record)
+        return response
+
+    def _write(self, key: str, record: Dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = _fixture_path(self.directory, key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as handle:
+                json.dump(record, handle, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            logger.warning(f"Unable to record model fixture {key[:12]}: {exc}")
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class ReplayGeminiClient(GeminiClient):
+    """
+    Serve previously recorded responses without touching the network.
+    `latency_scale` replays the recorded latency scaled by that factor
+    (0 for none). Unrecorded prompts fail with a 404 `GeminiError`.
+    """
+
+    def __init__(self, directory: Path, latency_scale: float = 0.0) -> None:
+        self.directory = Path(directory)
+        self.latency_scale = latency_scale
+        self.misses = 0
+
+    async def generate_content(self, model: str, prompt: str, generation_config: Dict[str, Any]) -> Dict[str, Any]:
+        key = fixture_key(model, prompt, generation_config)
+        try:
+            record = await asyncio.to_thread(self._read, key)
+        except (OSError, ValueError) as exc:
+            self.misses += 1
+            raise GeminiError(f"No recorded response for {model} prompt {key[:12]}", status_code=404) from exc
+        if self.latency_scale > 0:
+            await asyncio.sleep(float(record.get("latency_secs", 0)) * self.latency_scale)
+        return record["response"]
+
+    def _read(self, key: str) -> Dict[str, Any]:
+        with _fixture_path(self.directory, key).open("r", encoding="utf-8") as handle:
+            return json.load(handle)
@@ -23,6 +23,7 @@ class PackContentItem(BaseModel):
     language_focus: str
     image_description: str
     image_data_url: Optional[str] = None
+    image_original_url: Optional[str] = None  # full-size asset when image_data_url is a thumbnail
     order: int = 0
 
 
@@ -148,3 +149,67 @@ class GenerateResponse(BaseModel):
     pack_content: List[PackContentItem]
     scene_images: Optional[SceneImages] = None
     pdf_base64: Optional[str] = None
+    pdf_url: Optional[str] = None  # rendered on first request by /api/packs/{pack_id}/pdf
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+
+class JobStatus(BaseModel):
+    """State of an asynchronous pack-generation job."""
+    job_id: str
+    status: str  # queued, running, done, failed
+    stage: str
+    progress: float = 0.0
+    error: Optional[str] = None
+    result: Optional[GenerateResponse] = None
+
+
+class BatchRequest(BaseModel):
+    """A term plan: several packs generated together and exported as one bundle."""
+    model_config = ConfigDict(extra='forbid')
+    
+    items: List[GenerateRequest] = Field(..., min_length=1)
+
+
+class BundleRequest(BaseModel):
+    """Stored packs to combine into one PDF, a page each, in this order."""
+    model_config = ConfigDict(extra='forbid')
+    
+    pack_ids: List[str] = Field(..., min_length=1)
+
+
+class BatchAccepted(BaseModel):
+    batch_id: str
+    status: str
+    status_url: str
+    total: int
+    unique: int  # identical requests share one job
+
+
+class BatchItemStatus(BaseModel):
+    position: int
+    job_id: str
+    theme: str
+    status: str  # queued, running, done, failed
+    stage: str
+    progress: float = 0.0
+    pack_id: Optional[str] = None
+    pdf_url: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchStatus(BaseModel):
+    """Per-item progress of a batch; exports are available once status is done."""
+    batch_id: str
+    status: str  # queued, running, done
+    total: int
+    completed: int
+    failed: int
+    progress: float = 0.0
+    items: List[BatchItemStatus]
+    pdf_url: Optional[str] = None
+    zip_url: Optional[str] = None
@@ -1,6 +1,7 @@
 import os
 from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 # Load .env file
@@ -16,10 +17,54 @@ class Settings(BaseSettings):
     google_api_key: str
     text_model: str = "gemini-2.0-flash-exp"
     image_model: str = "gemini-2.5-flash-image"
+    image_routes: str = ""
     timeout_secs: int = 60
+    text_streaming: bool = True
+    text_structured_output: bool = True
+    gemini_base_url: str = "https://generativelanguage.googleapis.com"
+    gemini_max_connections: int = 20
+    gemini_http2: bool = True
+    gemini_fixture_mode: Literal["off", "record", "replay"] = "off"
+    gemini_fixture_dir: str = "fixtures/gemini"
+    gemini_replay_latency_scale: float = 0.0
     firebase_config_json: str = ""
     firebase_app_id: str = ""
     firebase_initial_token: str = ""
+    text_rpm: int = 60
+    image_rpm: int = 30
+    rate_limit_burst: int = 8
+    rate_limit_path: str = ".cache/ratelimit.sqlite3"
+    quota_max_retries: int = 3
+    quota_backoff_base_secs: float = 1.0
+    quota_backoff_max_secs: float = 30.0
+    image_breaker_window: int = 20
+    image_breaker_min_calls: int = 8
+    image_breaker_failure_rate: float = 0.5
+    image_breaker_slow_call_secs: float = 30.0
+    image_breaker_cooldown_secs: float = 30.0
+    image_breaker_probe_ratio: float = 0.1
+    speculative_image_slots: str = ""
+    image_hedging: bool = False
+    image_hedge_percentile: float = 0.95
+    image_hedge_budget: float = 0.1
+    cache_dir: str = ".cache"
+    image_cache_max_bytes: int = 512 * 1024 * 1024
+    image_cache_ttl_secs: int = 7 * 24 * 60 * 60
+    pack_cache_ttl_secs: int = 24 * 60 * 60
+    pack_store_ttl_secs: int = 30 * 24 * 60 * 60
+    asset_store_max_bytes: int = 1024 * 1024 * 1024
+    asset_store_ttl_secs: int = 30 * 24 * 60 * 60
+    thumbnail_max_px: int = 384
+    pdf_image_max_px: int = 768
+    rendition_cache_max_bytes: int = 256 * 1024 * 1024
+    pdf_workers: int = 2
+    pdf_max_queue: int = 8
+    job_queue_path: str = ".cache/jobs.sqlite3"
+    job_lease_secs: int = 600
+    batch_max_items: int = 40
+    batch_item_timeout_secs: int = 300
+    batch_reserve_tokens: float = 2.0
+    cost_ledger_path: str = ".cache/ledger.sqlite3"
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,36 @@
+import pytest
+
+from backend import app as app_module
+from backend import llm
+from backend import pack_service
+from backend.assets import AssetStore
+from backend.circuit_breaker import CircuitBreaker
+from backend.image_cache import ImageCache
+from backend.jobs import JobQueue
+from backend.ledger import CostLedger
+from backend.pack_cache import PackCache
+from backend.pack_store import PackStore
+from backend.pdf_pool import PdfRenderPool
+from backend.rate_limit import RateLimiter
+from backend.renditions import RenditionCache
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """Keep test runs from reading or writing the developer's local caches."""
+    monkeypatch.setattr(llm, "image_cache", ImageCache(tmp_path / "images", max_bytes=10_000_000, ttl_secs=60))
+    monkeypatch.setattr(
+        llm,
+        "rate_limiter",
+        RateLimiter(tmp_path / "ratelimit.sqlite3", budgets={"text": (6000, 100), "image": (6000, 100)}, backoff_base_secs=0.01),
+    )
+    monkeypatch.setattr(llm, "image_breaker", CircuitBreaker("image"))
+    monkeypatch.setattr(app_module, "image_breaker", llm.image_breaker)
+    monkeypatch.setattr(pack_service, "pack_cache", PackCache(tmp_path / "packs", ttl_secs=60))
+    monkeypatch.setattr(pack_service, "pack_store", PackStore(tmp_path / "packs_by_id", ttl_secs=60))
+    monkeypatch.setattr(pack_service, "asset_store", AssetStore(tmp_path / "assets", max_bytes=10_000_000, ttl_secs=60))
+    monkeypatch.setattr(app_module, "rendition_cache", RenditionCache(tmp_path / "renditions", max_bytes=10_000_000, ttl_secs=60))
+    monkeypatch.setattr(app_module, "job_queue", JobQueue(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(pack_service, "cost_ledger", CostLedger(tmp_path / "ledger.sqlite3"))
+    # Render PDFs in a thread rather than spawning worker processes per test
+    monkeypatch.setattr(app_module, "pdf_pool", PdfRenderPool(max_workers=0, max_queue=4))
@@ -1,8 +1,13 @@
+import base64
+import json
 from typing import Dict
 
 from fastapi.testclient import TestClient
 
+from backend import app as app_module
+from backend import pack_service
 from backend.app import app
+from backend.metrics import STAGE_SECONDS
 
 client = TestClient(app)
 
@@ -77,7 +82,7 @@ def test_generate_success(monkeypatch) -> None:
             },
         }
 
-    monkeypatch.setattr("backend.app.generate_pack", fake_generate_pack)
+    monkeypatch.setattr("backend.pack_service.generate_pack", fake_generate_pack)
 
     payload: Dict[str, str] = {"theme": "Birds", "level": "ECE", "keywords": ""}
     response = client.post("/api/generate_pack", json=payload)
@@ -87,5 +92,234 @@ def test_generate_success(monkeypatch) -> None:
     assert data["pack_id"] == "pack-test-123"
     assert data["scene_images"]["scene"] == "https://example.com/scene.png"
     assert len(data["pack_content"]) == 5
-    assert data["pdf_base64"]  # pdf injected by route
+    assert data["pdf_base64"] is None  # pdf is rendered on demand
+    assert data["pdf_url"] == "/api/packs/pack-test-123/pdf"
     assert data["sentence_nzsl"] == "NEST FLY FOREST"
+
+    pdf = client.get(data["pdf_url"])
+    assert pdf.status_code == 200
+    assert pdf.headers["content-type"] == "application/pdf"
+    assert pdf.content.startswith(b"%PDF")
+
+    partial = client.get(data["pdf_url"], headers={"Range": "bytes=0-3"})
+    assert partial.status_code == 206
+    assert partial.content == b"%PDF"
+    assert partial.headers["content-range"] == f"bytes 0-3/{len(pdf.content)}"
+    assert client.get(data["pdf_url"], headers={"If-None-Match": pdf.headers["etag"]}).status_code == 304
+    assert client.get("/api/packs/pack-missing/pdf").status_code == 404
+
+
+def test_generate_stream_emits_text_before_images(monkeypatch) -> None:
+    async def fake_call_text(theme: str, level: str, keywords: str, subject: str = "language", activity=None):
+        return {
+            "semantic_components": [
+                {"type": "agent", "label": "Bird", "nzsl_sign": "BIRD", "semantic_role": "Who"},
+                {"type": "action", "label": "Fly", "nzsl_sign": "FLY", "semantic_role": "What"},
+                {"type": "setting", "label": "Forest", "nzsl_sign": "FOREST", "semantic_role": "Where"},
+            ],
+        }
+
+    in_flight = []
+
+    async def fake_generate_image(prompt: str, label: str, role=None):
+        in_flight.append(app_module.pack_streams_in_flight)
+        return f"https://example.com/{label.replace(' ', '-')}.png"
+
+    monkeypatch.setattr("backend.llm.call_text", fake_call_text)
+    monkeypatch.setattr("backend.llm._generate_image", fake_generate_image)
+    packs_timed = STAGE_SECONDS.count(stage="pack")
+
+    response = client.post("/api/generate_pack/stream", json={"theme": "Birds"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        name_line, data_line = block.split("\n", 1)
+        events.append((name_line.removeprefix("event: "), json.loads(data_line.removeprefix("data: "))))
+
+    names = [name for name, _ in events]
+    assert names == ["text", "image", "image", "image", "image", "pack"]
+    assert events[0][1]["sentence_nzsl"] == "BIRD FLY FOREST"
+    scene_event = next(data for name, data in events if name == "image" and data["image_key"] == "scene")
+    assert scene_event["orders"] == [1, 5]
+    assert events[5][1]["scene_images"]["scene"] == "https://example.com/Birds-scene.png"
+    assert events[5][1]["pdf_url"].endswith("/pdf")
+    assert in_flight == [1, 1, 1, 1]
+    assert app_module.pack_streams_in_flight == 0
+    assert STAGE_SECONDS.count(stage="pack") == packs_timed + 1
+
+
+def test_generate_ref_mode_serves_assets(monkeypatch) -> None:
+    png_base64 = "iVBORw0KGgoAAAANSUhEUgAAAAIAAAACCAIAAAD91JpzAAAAFklEQVR4nGM8YWTEwMDAxMDAwMDAAAAO0AEwUN+6GAAAAABJRU5ErkJggg=="
+    scene_url = f"data:image/png;base64,{png_base64}"
+
+    async def fake_generate_pack(theme: str, level: str, keywords: str, subject: str = "language", activity=None):
+        item = {
+            "phase": "Whole Scene",
+            "image_role": "scene_intro",
+            "pedagogical_purpose": "Purpose",
+            "language_focus": "Focus",
+            "image_description": "Scene prompt",
+            "image_data_url": scene_url,
+        }
+        return {
+            "pack_id": "pack-ref-1",
+            "generated_at": "2024-01-01T00:00:00+00:00",
+            "theme": theme,
+            "sentence_nzsl": "BIRD FLY",
+            "sentence_en": "The Bird flies.",
+            "teacher_tip": "Tip",
+            "pack_content": [{**item, "order": 1}, {**item, "order": 5}],
+            "scene_images": {"object": scene_url, "action": scene_url, "setting": scene_url, "scene": scene_url},
+        }
+
+    monkeypatch.setattr("backend.pack_service.generate_pack", fake_generate_pack)
+
+    response = client.post("/api/generate_pack?image_mode=ref", json={"theme": "Birds"})
+
+    assert response.status_code == 200
+    data = response.json()
+    scene_asset = data["scene_images"]["scene"]
+    assert scene_asset.startswith("/api/assets/")
+    assert data["pack_content"][0]["image_original_url"] == scene_asset
+    thumbnail = client.get(data["pack_content"][0]["image_data_url"])
+    assert thumbnail.headers["content-type"] == "image/webp"
+
+    asset = client.get(scene_asset)
+    assert asset.status_code == 200
+    assert asset.content == base64.b64decode(png_base64)
+    assert asset.headers["content-type"] == "image/png"
+    assert "immutable" in asset.headers["cache-control"]
+    assert client.get(scene_asset, headers={"If-None-Match": asset.headers["etag"]}).status_code == 304
+    assert client.get(data["pdf_url"]).content.startswith(b"%PDF")
+
+
+def test_generate_inline_mode_returns_images_unchanged(monkeypatch) -> None:
+    from backend import llm
+    from backend.assets import ImageAsset
+    from backend.fake_gemini import fake_png
+
+    png = fake_png(50_000)
+
+    async def fake_call_text(theme: str, level: str, keywords: str, subject: str = "language", activity=None):
+        return {"semantic_components": []}
+
+    async def fake_generate_image(prompt: str, label: str, role=None):
+        return ImageAsset(png, "image/png")
+
+    monkeypatch.setattr(llm, "call_text", fake_call_text)
+    monkeypatch.setattr(llm, "_generate_image", fake_generate_image)
+    monkeypatch.setattr("backend.pack_service.generate_pack", llm.generate_pack)
+
+    data = client.post("/api/generate_pack", json={"theme": "Inline"}).json()
+
+    # The default is still the original bytes as a data URL: no thumbnail, no asset link
+    data_url = f"data:image/png;base64,{base64.b64encode(png).decode()}"
+    assert {item["image_data_url"] for item in data["pack_content"]} == {data_url}
+    assert {item["image_original_url"] for item in data["pack_content"]} == {None}
+    assert set(data["scene_images"].values()) == {data_url}
+
+
+def test_inline_stream_encodes_each_image_once(monkeypatch) -> None:
+    from backend import llm
+    from backend.assets import ImageAsset
+
+    png = base64.b64decode("iVBORw0KGgoAAAANSUhEUgAAAAIAAAACCAIAAAD91JpzAAAAFklEQVR4nGM8YWTEwMDAxMDAwMDAAAAO0AEwUN+6GAAAAABJRU5ErkJggg==")
+    encoded = []
+    to_data_url = ImageAsset.to_data_url
+
+    async def fake_call_text(theme: str, level: str, keywords: str, subject: str = "language", activity=None):
+        return {"semantic_components": []}
+
+    async def fake_generate_image(prompt: str, label: str, role=None):
+        return ImageAsset(png, "image/png")
+
+    def counting_to_data_url(self: ImageAsset) -> str:
+        encoded.append(self.digest)
+        return to_data_url(self)
+
+    def no_externalise(*args, **kwargs):
+        raise AssertionError("inline mode must not make asset URLs or thumbnails")
+
+    monkeypatch.setattr(llm, "call_text", fake_call_text)
+    monkeypatch.setattr(llm, "_generate_image", fake_generate_image)
+    monkeypatch.setattr(ImageAsset, "to_data_url", counting_to_data_url)
+    monkeypatch.setattr(app_module, "_externalise_image", no_externalise)
+
+    response = client.post("/api/generate_pack/stream?image_mode=inline", json={"theme": "Once"})
+
+    # Four image events and the final pack all share one encoding of the one image
+    assert response.text.count("event: image") == 4
+    assert "event: pack" in response.text
+    assert len(encoded) == 1
+
+
+def test_metrics_endpoint_reports_stages_and_cache_lookups(monkeypatch) -> None:
+    from backend.metrics import STAGE_SECONDS
+
+    async def fake_generate_pack(theme: str, level: str, keywords: str, subject: str = "language", activity=None):
+        item = {
+            "order": 1,
+            "phase": "Whole Scene",
+            "image_role": "scene_intro",
+            "pedagogical_purpose": "Purpose",
+            "language_focus": "Focus",
+            "image_description": "Scene prompt",
+            "image_data_url": "https://example.com/scene.png",
+        }
+        return {
+            "pack_id": "pack-metrics-1",
+            "generated_at": "2024-01-01T00:00:00+00:00",
+            "theme": theme,
+            "sentence_nzsl": "BIRD FLY",
+            "sentence_en": "The Bird flies.",
+            "teacher_tip": "Tip",
+            "pack_content": [item],
+            "scene_images": {slot: "https://example.com/scene.png" for slot in ("object", "action", "setting", "scene")},
+        }
+
+    monkeypatch.setattr("backend.pack_service.generate_pack", fake_generate_pack)
+    packs_before = STAGE_SECONDS.count(stage="pack")
+
+    assert client.post("/api/generate_pack", json={"theme": "Metrics"}).status_code == 200
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "# TYPE tohu_stage_duration_seconds histogram" in body
+    assert 'tohu_stage_duration_seconds_bucket{stage="pack",le="+Inf"}' in body
+    assert 'tohu_cache_lookups_total{cache="pack",result="miss"}' in body
+    assert "tohu_packs_in_flight 0" in body
+    assert STAGE_SECONDS.count(stage="pack") == packs_before + 1
+
+
+def test_raw_images_are_encoded_only_at_the_boundary(monkeypatch) -> None:
+    from backend import llm
+    from backend.assets import ImageAsset
+
+    png = base64.b64decode("iVBORw0KGgoAAAANSUhEUgAAAAIAAAACCAIAAAD91JpzAAAAFklEQVR4nGM8YWTEwMDAxMDAwMDAAAAO0AEwUN+6GAAAAABJRU5ErkJggg==")
+
+    async def fake_call_text(theme: str, level: str, keywords: str, subject: str = "language", activity=None):
+        return {"semantic_components": []}
+
+    async def fake_generate_image(prompt: str, label: str, role=None):
+        return ImageAsset(png, "image/png")
+
+    monkeypatch.setattr(llm, "call_text", fake_call_text)
+    monkeypatch.setattr(llm, "_generate_image", fake_generate_image)
+    monkeypatch.setattr("backend.pack_service.generate_pack", llm.generate_pack)
+
+    response = client.post("/api/generate_pack", json={"theme": "Raw"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["scene_images"]["scene"] == f"data:image/png;base64,{base64.b64encode(png).decode()}"
+    stored = (pack_service.pack_store.directory / f"{data['pack_id']}.json").read_text()
+    assert "base64" not in stored  # images are stored once, by digest
+
+    again = client.post("/api/generate_pack", json={"theme": "Raw"}).json()
+    assert again["pack_id"] == data["pack_id"]
+    assert again["scene_images"] == data["scene_images"]
+    assert client.get(data["pdf_url"]).content.startswith(b"%PDF")
@@ -0,0 +1,115 @@
+import pytest
+
+from backend import llm
+from backend.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from backend.gemini_client import GeminiError, set_client
+from backend.rate_limit import QuotaExceededError
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_breaker(clock: FakeClock) -> CircuitBreaker:
+    return CircuitBreaker(
+        "image",
+        window_size=4,
+        min_calls=4,
+        failure_rate_threshold=0.5,
+        slow_call_secs=5.0,
+        cooldown_secs=10.0,
+        probe_ratio=1.0,
+        probe_successes=2,
+        clock=clock,
+    )
+
+
+def test_breaker_opens_on_failure_rate_and_slow_calls() -> None:
+    breaker = make_breaker(FakeClock())
+    breaker.record_success(0.1)
+    breaker.record_failure()
+    breaker.record_success(0.2)
+    assert breaker.state == CLOSED  # only three calls so far
+
+    breaker.record_success(9.0)  # slow, so it counts as a failure
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_breaker_half_opens_after_cooldown_and_recovers() -> None:
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now += 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # one probe at a time
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now += 10
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert [t["to"] for t in breaker.snapshot()["transitions"]] == [OPEN, HALF_OPEN, OPEN, HALF_OPEN, CLOSED]
+
+
+class FailingClient:
+    def __init__(self, status_code: int = 503) -> None:
+        self.status_code = status_code
+        self.calls = 0
+
+    async def generate_content(self, model, prompt, generation_config):
+        self.calls += 1
+        raise GeminiError("upstream unavailable", status_code=self.status_code)
+
+    async def aclose(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_skips_image_model(monkeypatch) -> None:
+    client = FailingClient()
+    set_client(client)
+    monkeypatch.setattr(llm, "image_breaker", make_breaker(FakeClock()))
+    try:
+        for index in range(6):
+            image = await llm._generate_image(f"prompt {index}", "Kiwi")
+            assert llm.is_placeholder_image(image)
+    finally:
+        set_client(None)
+
+    assert client.calls == 4
+    assert llm.image_breaker.state == OPEN
+
+
+@pytest.mark.asyncio
+async def test_quota_rejections_leave_breaker_closed(monkeypatch) -> None:
+    client = FailingClient(status_code=429)
+    set_client(client)
+    monkeypatch.setattr(llm, "image_breaker", make_breaker(FakeClock()))
+    monkeypatch.setattr(llm.settings, "quota_max_retries", 0)
+    try:
+        for index in range(6):
+            assert llm.is_placeholder_image(await llm._generate_image(f"throttled {index}", "Kiwi"))
+
+        async def exhausted(*args, **kwargs):
+            raise QuotaExceededError("local image quota exhausted", retry_after=1.0)
+
+        monkeypatch.setattr(llm.rate_limiter, "acquire", exhausted)
+        for index in range(6):
+            assert llm.is_placeholder_image(await llm._generate_image(f"limited {index}", "Kiwi"))
+    finally:
+        set_client(None)
+
+    assert client.calls == 6
+    assert llm.image_breaker.state == CLOSED
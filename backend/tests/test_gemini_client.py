@@ -0,0 +1,119 @@
+import asyncio
+import base64
+import json
+import threading
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+import respx
+
+from backend import llm
+from backend.assets import ImageAsset
+from backend.gemini_client import GeminiClient, GeminiError, HttpxGeminiClient, response_text, set_client
+from backend.timing import collect_timings
+
+
+class FakeGeminiClient(GeminiClient):
+    """Local stand-in that answers text prompts with JSON and image prompts with bytes."""
+
+    def __init__(self) -> None:
+        self.calls: List[str] = []
+
+    async def generate_content(self, model: str, prompt: str, generation_config: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls.append(model)
+        if model == llm.settings.image_model:
+            part = {"inlineData": {"mimeType": "image/png", "data": base64.b64encode(b"fake-png").decode()}}
+        else:
+            part = {"text": '```json\n{"theme": "Birds", "semantic_components": []}\n```'}
+        return {"candidates": [{"content": {"parts": [part]}}]}
+
+
+@pytest.fixture
+def fake_client():
+    client = FakeGeminiClient()
+    set_client(client)
+    yield client
+    set_client(None)
+
+
+@pytest.mark.asyncio
+async def test_llm_uses_swappable_client(fake_client) -> None:
+    with collect_timings() as timings:
+        text_json = await llm.call_text("Birds", "ECE", "")
+        image = await llm._generate_image("A bird", "Birds scene")
+
+    assert text_json["theme"] == "Birds"
+    assert image == ImageAsset(b"fake-png", "image/png")
+    assert fake_client.calls == [llm.settings.text_model, llm.settings.image_model]
+    assert timings.usage[llm.settings.image_model]["images"] == 1
+    assert timings.usage[llm.settings.text_model]["images"] == 0
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_httpx_client_posts_generate_content_and_maps_errors() -> None:
+    client = HttpxGeminiClient("test-key", "https://gemini.test", timeout_secs=5, max_connections=4, http2=False)
+    route = respx.post("https://gemini.test/v1beta/models/text-model:generateContent").mock(
+        return_value=httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": "hi"}]}}]})
+    )
+    respx.post("https://gemini.test/v1beta/models/busy-model:generateContent").mock(
+        return_value=httpx.Response(429, json={"error": {"message": "quota"}}, headers={"Retry-After": "3"})
+    )
+
+    payload = await client.generate_content("text-model", "Hello", {"temperature": 0.3})
+
+    assert payload["candidates"][0]["content"]["parts"][0]["text"] == "hi"
+    request = route.calls.last.request
+    assert request.headers["x-goog-api-key"] == "test-key"
+    with pytest.raises(GeminiError) as excinfo:
+        await client.generate_content("busy-model", "Hello", {})
+    assert excinfo.value.status_code == 429
+    assert excinfo.value.retry_after == 3.0
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_httpx_client_closes_the_pool_it_leaves_on_another_loop() -> None:
+    client = HttpxGeminiClient("test-key", "https://gemini.test", timeout_secs=5, max_connections=4, http2=False)
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever)
+    thread.start()
+    try:
+        async def open_pool() -> httpx.AsyncClient:
+            return client._get_client()
+
+        old = asyncio.run_coroutine_threadsafe(open_pool(), other_loop).result(timeout=5)
+        current = client._get_client()
+        for _ in range(100):
+            if old.is_closed:
+                break
+            await asyncio.sleep(0.01)
+
+        assert current is not old
+        assert old.is_closed
+        assert not current.is_closed
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join()
+        other_loop.close()
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_httpx_client_streams_server_sent_events() -> None:
+    client = HttpxGeminiClient("test-key", "https://gemini.test", timeout_secs=5, max_connections=4, http2=False)
+    pieces = ['{"a"', ": 1}"]
+    events = "".join(
+        "data: " + json.dumps({"candidates": [{"content": {"parts": [{"text": piece}]}}]}) + "\r\n\r\n" for piece in pieces
+    )
+    route = respx.post("https://gemini.test/v1beta/models/text-model:streamGenerateContent").mock(
+        return_value=httpx.Response(200, text=events, headers={"content-type": "text/event-stream"})
+    )
+
+    chunks = [chunk async for chunk in client.stream_generate_content("text-model", "Hello", {})]
+
+    assert [response_text(chunk) for chunk in chunks] == pieces
+    assert route.calls.last.request.url.params["alt"] == "sse"
+    await client.aclose()
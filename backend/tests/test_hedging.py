@@ -0,0 +1,89 @@
+import asyncio
+import base64
+from typing import Any, Dict, List
+
+import pytest
+
+from backend import llm
+from backend.fake_gemini import fake_png
+from backend.gemini_client import GeminiClient, set_client
+from backend.hedging import DENIED, HEDGE_WON, NOT_HEDGED, PRIMARY_WON, HedgeBudget, hedge
+from backend.image_routing import ImageRouter, ImageTier
+from backend.metrics import IMAGE_HEDGES
+
+
+def test_hedge_budget_allows_a_fraction_of_calls() -> None:
+    budget = HedgeBudget(0.1)
+    allowed = 0
+    for _ in range(100):
+        budget.record_call()
+        allowed += budget.try_spend()
+
+    assert allowed == 10
+
+
+@pytest.mark.asyncio
+async def test_hedge_takes_the_first_answer_and_cancels_the_other() -> None:
+    delays = [1.0, 0.0]
+    attempts: List[int] = []
+    cancelled: List[int] = []
+
+    async def call() -> int:
+        attempt = len(attempts)
+        attempts.append(attempt)
+        try:
+            await asyncio.sleep(delays[attempt])
+        except asyncio.CancelledError:
+            cancelled.append(attempt)
+            raise
+        return attempt
+
+    budget = HedgeBudget(1.0)
+    assert await hedge(call, 0.02, budget) == (1, HEDGE_WON)
+    await asyncio.sleep(0)
+    assert cancelled == [0]
+
+    cases = [
+        ([0.05, 1.0], budget, (0, PRIMARY_WON)),
+        ([0.0], budget, (0, NOT_HEDGED)),
+        ([0.05], HedgeBudget(0.0), (0, DENIED)),
+    ]
+    for case_delays, case_budget, expected in cases:
+        delays[:] = case_delays
+        attempts.clear()
+        assert await hedge(call, 0.02, case_budget) == expected
+
+
+class StallingClient(GeminiClient):
+    """The first image call stalls; any later one answers at once."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def generate_content(self, model: str, prompt: str, generation_config: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls += 1
+        if self.calls == 1:
+            await asyncio.sleep(5)
+        data = base64.b64encode(fake_png(1_500)).decode()
+        return {"candidates": [{"content": {"parts": [{"inlineData": {"mimeType": "image/png", "data": data}}]}}]}
+
+
+@pytest.mark.asyncio
+async def test_slow_image_call_is_hedged(monkeypatch) -> None:
+    router = ImageRouter({}, ImageTier("hedge-image"))
+    for secs in (0.01, 0.01, 0.02, 0.02, 0.03):
+        router.latencies.record("hedge-image", secs)
+    monkeypatch.setattr(llm, "image_router", router)
+    monkeypatch.setattr(llm, "image_hedge_budget", HedgeBudget(1.0))
+    monkeypatch.setattr(llm.settings, "image_hedging", True)
+    client = StallingClient()
+    set_client(client)
+    wins = IMAGE_HEDGES.value(outcome=HEDGE_WON)
+    try:
+        image = await asyncio.wait_for(llm._generate_image("A kererū", "Kererū noun", role="noun"), timeout=2)
+    finally:
+        set_client(None)
+
+    assert not llm.is_placeholder_image(image)
+    assert client.calls == 2
+    assert IMAGE_HEDGES.value(outcome=HEDGE_WON) == wins + 1
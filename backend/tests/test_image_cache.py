@@ -0,0 +1,65 @@
+import pytest
+
+from backend.image_cache import ImageCache, image_cache_key
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_image_cache_key_depends_on_model_prompt_and_config() -> None:
+    base = image_cache_key("model-a", "A kererū", {"temperature": 0.7})
+    assert base == image_cache_key("model-a", "A kererū", {"temperature": 0.7})
+    assert base != image_cache_key("model-b", "A kererū", {"temperature": 0.7})
+    assert base != image_cache_key("model-a", "A tūī", {"temperature": 0.7})
+    assert base != image_cache_key("model-a", "A kererū", {"temperature": 0.2})
+
+
+def test_image_cache_hits_misses_and_ttl(tmp_path) -> None:
+    clock = FakeClock()
+    cache = ImageCache(tmp_path, max_bytes=10_000, ttl_secs=60, clock=clock)
+
+    assert cache.get("abc123") is None
+    cache.put("abc123", b"png-bytes", "image/png")
+    assert cache.get("abc123") == (b"png-bytes", "image/png")
+
+    clock.now += 61
+    assert cache.get("abc123") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_image_cache_contains_checks_freshness_without_reading(tmp_path, monkeypatch) -> None:
+    clock = FakeClock()
+    cache = ImageCache(tmp_path, max_bytes=10_000, ttl_secs=60, clock=clock)
+    cache.put("abc123", b"png-bytes", "image/png")
+    # Another process sees the entry through the shared directory
+    other = ImageCache(tmp_path, max_bytes=10_000, ttl_secs=60, clock=clock)
+    monkeypatch.setattr(ImageCache, "get", lambda self, key: pytest.fail("contains() must not read the image"))
+
+    assert cache.contains("abc123") and other.contains("abc123")
+    assert not cache.contains("missing")
+    clock.now += 61
+    assert not cache.contains("abc123")
+
+
+def test_image_cache_evicts_least_recently_used(tmp_path) -> None:
+    cache = ImageCache(tmp_path, max_bytes=400, ttl_secs=60)
+    cache.put("aa01", b"x" * 100, "image/png")
+    cache.put("bb02", b"y" * 100, "image/png")
+    assert cache.get("aa01") is not None  # aa01 is now most recently used
+
+    cache.put("cc03", b"z" * 100, "image/png")
+
+    assert cache.get("bb02") is None
+    assert cache.get("aa01") is not None
+    assert cache.get("cc03") is not None
+    assert cache.stats()["evictions"] == 1
+
+    reopened = ImageCache(tmp_path, max_bytes=400, ttl_secs=60)
+    assert reopened.get("cc03") == (b"z" * 100, "image/png")
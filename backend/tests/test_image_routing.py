@@ -0,0 +1,85 @@
+import asyncio
+import base64
+from typing import Any, Dict, List
+
+import pytest
+
+from backend import llm
+from backend.fake_gemini import fake_png
+from backend.gemini_client import GeminiClient, set_client
+from backend.image_cache import image_cache_key
+from backend.image_routing import ImageRouter, ImageTier, LatencyWindow, parse_routes
+from backend.metrics import IMAGE_FALLBACKS
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_parse_routes_accepts_single_tiers_and_aliases() -> None:
+    routes = parse_routes('{"scene": {"model": "pro", "timeout_secs": 45}, "agent": [{"model": "flash", "image_size": "1K"}, {"model": "lite"}]}')
+
+    assert routes["scene"] == [ImageTier("pro", timeout_secs=45)]
+    assert [tier.model for tier in routes["object"]] == ["flash", "lite"]
+    assert routes["object"][0].generation_config == {"temperature": 0.7, "imageConfig": {"imageSize": "1K"}}
+    assert parse_routes("") == {}
+    with pytest.raises(ValueError):
+        parse_routes('{"sky": {"model": "pro"}}')
+
+
+def test_router_skips_tier_over_p95_budget_until_samples_age_out() -> None:
+    clock = FakeClock()
+    primary, fallback = ImageTier("flash", p95_budget_secs=10), ImageTier("lite")
+    router = ImageRouter({"action": [primary, fallback]}, ImageTier("default"), LatencyWindow(max_age_secs=60, min_samples=3, clock=clock))
+
+    assert router.plan("verb") == [primary, fallback]
+    assert router.plan("scene") == [ImageTier("default")]
+    for secs in (4, 12, 15):
+        router.latencies.record("flash", secs)
+    assert router.plan("action") == [fallback]
+
+    clock.now = 61
+    assert router.plan("action") == [primary, fallback]
+
+
+class TieredClient(GeminiClient):
+    """Image models that answer after a per-model delay, each with distinct bytes."""
+
+    def __init__(self, delays: Dict[str, float]) -> None:
+        self.delays = delays
+        self.calls: List[str] = []
+
+    async def generate_content(self, model: str, prompt: str, generation_config: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls.append(model)
+        await asyncio.sleep(self.delays[model])
+        data = base64.b64encode(fake_png(1_000 + len(model))).decode()
+        return {"candidates": [{"content": {"parts": [{"inlineData": {"mimeType": "image/png", "data": data}}]}}]}
+
+
+@pytest.mark.asyncio
+async def test_image_roles_route_to_their_tiers_and_fall_back_on_timeout(monkeypatch) -> None:
+    routes = parse_routes(
+        '{"scene": {"model": "pro-image"}, "action": [{"model": "flash-image", "timeout_secs": 0.05}, {"model": "lite-image"}]}'
+    )
+    monkeypatch.setattr(llm, "image_router", ImageRouter(routes, ImageTier("default-image")))
+    client = TieredClient({"pro-image": 0.0, "flash-image": 1.0, "lite-image": 0.0, "default-image": 0.0})
+    set_client(client)
+    timeouts = IMAGE_FALLBACKS.value(role="action", reason="timeout")
+    try:
+        scene = await llm._generate_image("A whole scene", "Birds scene", role="scene")
+        verb = await llm._generate_image("A bird flying", "Birds verb", role="verb")
+        noun = await llm._generate_image("A bird", "Birds noun", role="noun")
+        assert await llm._generate_image("A bird flying", "Birds verb", role="verb") == verb
+    finally:
+        set_client(None)
+
+    assert client.calls == ["pro-image", "flash-image", "lite-image", "default-image"]
+    assert not any(llm.is_placeholder_image(image) for image in (scene, verb, noun))
+    assert IMAGE_FALLBACKS.value(role="action", reason="timeout") == timeouts + 1
+    # The fallback's image is cached under the tier that made it, and found again from the route
+    assert llm.image_cache.get(image_cache_key("lite-image", "A bird flying", {"temperature": 0.7})) is not None
+    assert llm.image_router.latencies.percentile("flash-image", 0.95) is None
@@ -0,0 +1,124 @@
+import asyncio
+import io
+import zipfile
+
+from fastapi.testclient import TestClient
+
+from backend import app as app_module
+from backend.assets import ImageAsset
+from backend.fake_gemini import fake_png
+from backend.jobs import JOB_DONE, JOB_QUEUED, JOB_RUNNING, PRIORITY_BATCH, PRIORITY_INTERACTIVE, JobQueue
+
+client = TestClient(app_module.app)
+
+
+def test_job_queue_claims_oldest_and_recovers_expired_leases(tmp_path) -> None:
+    queue = JobQueue(tmp_path / "jobs.sqlite3", lease_secs=0)
+    first = queue.enqueue({"theme": "Birds"})
+    second = queue.enqueue({"theme": "Kai"})
+
+    claimed = queue.claim("worker-a")
+    assert claimed["job_id"] == first
+    assert claimed["status"] == JOB_RUNNING
+
+    # With a zero-second lease the first job is immediately considered abandoned
+    reclaimed = queue.claim("worker-b")
+    assert reclaimed["job_id"] == first
+    assert reclaimed["attempts"] == 2
+    assert queue.get(second)["status"] == JOB_QUEUED
+
+
+def test_interactive_jobs_are_claimed_before_batch_jobs(tmp_path) -> None:
+    queue = JobQueue(tmp_path / "jobs.sqlite3")
+    batch_id = queue.enqueue_batch([{"theme": "Birds"}, {"theme": "Kai"}, {"theme": "Birds"}], ["k1", "k2", "k1"])
+    interactive = queue.enqueue({"theme": "Weather"})
+
+    items = queue.get_batch(batch_id)
+    assert [item["request"]["theme"] for item in items] == ["Birds", "Kai", "Birds"]
+    assert items[0]["job_id"] == items[2]["job_id"]  # identical requests share a job
+
+    assert queue.claim("worker", max_priority=PRIORITY_INTERACTIVE)["job_id"] == interactive
+    assert queue.claim("worker", max_priority=PRIORITY_INTERACTIVE) is None
+    assert queue.claim("worker")["priority"] == PRIORITY_BATCH
+    assert queue.get_batch("batch-missing") is None
+
+
+def test_job_api_round_trip(monkeypatch) -> None:
+    async def fake_generate_pack(theme, level, keywords, subject="language", activity=None):
+        return {
+            "pack_id": "pack-job-1",
+            "generated_at": "2024-01-01T00:00:00+00:00",
+            "theme": theme,
+            "sentence_nzsl": "KAI EAT TABLE",
+            "sentence_en": "The Kai eats in the table.",
+            "teacher_tip": "Tip",
+            "pack_content": [],
+            "scene_images": {"object": "", "action": "", "setting": "", "scene": ""},
+        }
+
+    monkeypatch.setattr("backend.pack_service.generate_pack", fake_generate_pack)
+
+    accepted = client.post("/api/jobs", json={"theme": "Kai"})
+    assert accepted.status_code == 202
+    job_id = accepted.json()["job_id"]
+    assert client.get(f"/api/jobs/{job_id}").json()["status"] == JOB_QUEUED
+    assert "tohu_job_queue_depth 1" in client.get("/metrics").text
+
+    job = app_module.job_queue.claim("test-worker")
+    assert "tohu_job_queue_depth 0" in client.get("/metrics").text
+    asyncio.run(app_module.run_job(job))
+
+    status = client.get(f"/api/jobs/{job_id}").json()
+    assert status["status"] == JOB_DONE
+    assert status["progress"] == 1
+    assert status["result"]["pack_id"] == "pack-job-1"
+    assert client.get("/api/jobs/job-missing").status_code == 404
+
+
+def test_batch_api_runs_items_and_exports_bundle(monkeypatch) -> None:
+    image = ImageAsset(fake_png(2_000), "image/png")
+
+    async def fake_generate_pack(theme, level, keywords, subject="language", activity=None):
+        return {
+            "pack_id": f"pack-{theme.lower()}",
+            "generated_at": "2024-01-01T00:00:00+00:00",
+            "theme": theme,
+            "sentence_nzsl": "BIRD FLY",
+            "sentence_en": "The bird flies.",
+            "teacher_tip": "Tip",
+            "pack_content": [],
+            "scene_images": {"object": image, "action": image, "setting": image, "scene": image},
+        }
+
+    monkeypatch.setattr("backend.pack_service.generate_pack", fake_generate_pack)
+
+    too_many = [{"theme": f"Theme {n}"} for n in range(app_module.settings.batch_max_items + 1)]
+    assert client.post("/api/batches", json={"items": too_many}).status_code == 422
+
+    accepted = client.post("/api/batches", json={"items": [{"theme": "Birds"}, {"theme": "Kai"}, {"theme": "Birds"}]})
+    assert accepted.status_code == 202
+    assert accepted.json()["unique"] == 2
+    status_url = accepted.json()["status_url"]
+    assert client.get(status_url).json()["status"] == "queued"
+    batch_id = accepted.json()["batch_id"]
+    assert client.get(f"/api/batches/{batch_id}/pdf").status_code == 409
+
+    while (job := app_module.job_queue.claim("test-worker")) is not None:
+        asyncio.run(app_module.run_job(job))
+
+    status = client.get(status_url).json()
+    assert status["status"] == "done"
+    assert [item["pack_id"] for item in status["items"]] == ["pack-birds", "pack-kai", "pack-birds"]
+    assert status["progress"] == 1
+
+    pdf = client.get(status["pdf_url"])
+    assert pdf.content.startswith(b"%PDF")
+    assert pdf.content.count(b"/Type /Page ") == 3
+    assert pdf.content.count(b"/Subtype /Image") == 1  # one image shared by every page
+
+    archive = zipfile.ZipFile(io.BytesIO(client.get(status["zip_url"]).content))
+    names = archive.namelist()
+    assert "term-plan.pdf" in names
+    assert sum(name.startswith("packs/") for name in names) == 3
+    assert [name for name in names if name.startswith("images/")] == [f"images/{image.digest}.png"]
+    assert client.get("/api/batches/batch-missing").status_code == 404
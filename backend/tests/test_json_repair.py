@@ -0,0 +1,63 @@
+from typing import Any, Dict
+
+import pytest
+
+from backend import llm
+from backend.gemini_client import GeminiClient, set_client
+from backend.json_repair import parse_model_json
+from backend.metrics import JSON_PARSE_FAILURES, JSON_REPAIRS
+
+
+@pytest.mark.parametrize(
+    "text, expected, repair",
+    [
+        ('```json\n{"a": [1, 2]}\n```', {"a": [1, 2]}, "fence"),
+        ('Here is your pack:\n{"a": "x"}\nHope this helps!', {"a": "x"}, "prose"),
+        ('{"a": [1, 2,], "b": {"c": "d",},}', {"a": [1, 2], "b": {"c": "d"}}, "trailing_comma"),
+        ('{"a": "keep, this]", "b": [1, 2, 3', {"a": "keep, this]", "b": [1, 2, 3]}, "truncated"),
+        ('{"a": ["x", "y"], "b": {"c": "half-writ', {"a": ["x", "y"], "b": {"c": "half-writ"}}, "truncated"),
+        ('{"a": 1, "b": [{"c": 2}, {"d": ', {"a": 1, "b": [{"c": 2}]}, "truncated"),
+    ],
+)
+def test_parse_model_json_repairs_common_slips(text: str, expected: Any, repair: str) -> None:
+    before = JSON_REPAIRS.value(repair=repair)
+
+    assert parse_model_json(text) == expected
+    assert JSON_REPAIRS.value(repair=repair) == before + 1
+
+
+def test_parse_model_json_rejects_unrecoverable_text() -> None:
+    assert parse_model_json('{"a": 1}') == {"a": 1}
+    with pytest.raises(ValueError):
+        parse_model_json("Sorry, I can't help with that.")
+
+
+class RecordingClient(GeminiClient):
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.configs = []
+
+    async def generate_content(self, model: str, prompt: str, generation_config: Dict[str, Any]) -> Dict[str, Any]:
+        self.configs.append(generation_config)
+        return {"candidates": [{"content": {"parts": [{"text": self.text}]}}]}
+
+
+@pytest.mark.asyncio
+async def test_call_text_requests_schema_and_repairs_response() -> None:
+    client = RecordingClient('{"semantic_components": [{"type": "agent", "label": "Bird", "nzsl_sign": "BIRD"},], "math_details": {"number": 4')
+    set_client(client)
+    try:
+        text_json = await llm.call_text("Birds", "ECE", "", "math", "name_the_number")
+        config = client.configs[0]
+        assert config["responseMimeType"] == "application/json"
+        assert config["responseSchema"]["propertyOrdering"][:3] == ["nzsl_story_prompt", "semantic_components", "math_details"]
+        assert text_json["math_details"] == {"number": 4}
+        assert text_json["semantic_components"][0]["label"] == "Bird"
+
+        client.text = "[1, 2]"
+        failures = JSON_PARSE_FAILURES.value()
+        with pytest.raises(RuntimeError):
+            await llm.call_text("Birds", "ECE", "")
+        assert JSON_PARSE_FAILURES.value() == failures + 1
+    finally:
+        set_client(None)
@@ -0,0 +1,28 @@
+from backend.json_stream import JsonFieldStream
+
+
+def test_fields_are_reported_as_soon_as_they_are_complete() -> None:
+    seen = []
+    stream = JsonFieldStream(lambda key, value: seen.append((key, value)))
+    text = '```json\n{"steps": ["a, b", "c]"], "nested": {"x": {"y": "}"}}, "tip": "say \\"kia ora\\"", "n": 3}\n```'
+
+    split = text.index('"nested"')
+    stream.feed(text[:split])
+    assert seen == [("steps", ["a, b", "c]"])]
+    for index in range(split, len(text), 7):
+        stream.feed(text[index : index + 7])
+
+    assert seen == [
+        ("steps", ["a, b", "c]"]),
+        ("nested", {"x": {"y": "}"}}),
+        ("tip", 'say "kia ora"'),
+        ("n", 3),
+    ]
+    assert stream.fields["n"] == 3
+
+
+def test_malformed_values_are_skipped() -> None:
+    seen = []
+    stream = JsonFieldStream(lambda key, value: seen.append(key))
+    stream.feed('{"bad": [1, 2,], "good": true}')
+    assert seen == ["good"]
@@ -0,0 +1,105 @@
+from fastapi.testclient import TestClient
+
+from backend import app as app_module
+from backend import pack_service
+from backend.ledger import CostLedger
+from backend.timing import PackTimings
+
+PNG_URL = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAIAAAACCAIAAAD91JpzAAAAFklEQVR4nGM8YWTEwMDAxMDAwMDAAAAO0AEwUN+6GAAAAABJRU5ErkJggg=="
+
+
+def test_server_timing_lists_stages_and_images() -> None:
+    timings = PackTimings()
+    timings.add_stage("text", 1.2345)
+    timings.add_image("Kiwi", 0.5, 2048, "model")
+    timings.add_image('Tūī "bird"\nscene', 0.1, 10, "cache")
+
+    header = timings.server_timing()
+
+    assert header.startswith("text;dur=1234.5, ")
+    assert 'image-0;dur=500.0;desc="Kiwi (model, 2048 B)"' in header
+    assert 'image-1;dur=100.0;desc="T%C5%AB%C4%AB %22bird%22%0Ascene (cache, 10 B)"' in header
+    header.encode("latin-1")
+    assert "total;dur=" in header
+
+
+def test_ledger_summarises_slow_themes_and_expensive_patterns(tmp_path) -> None:
+    ledger = CostLedger(tmp_path / "ledger.sqlite3")
+    slow = PackTimings()
+    slow.started -= 15  # began fifteen seconds ago
+    slow.add_stage("text", 4.0)
+    slow.add_image("Kiwi", 9.0, 5000, "model")
+    slow.add_usage("text-model", {"promptTokenCount": 900, "candidatesTokenCount": 300})
+    quick = PackTimings()
+    quick.add_image("Tūī", 0.01, 5000, "cache")
+
+    ledger.append("pack-1", {"theme": "Kiwi  Birds", "level": "ECE", "subject": "language"}, slow, placeholders=0)
+    ledger.append("pack-2", {"theme": "Tūī", "level": "ECE", "subject": "math"}, quick, placeholders=1)
+    ledger.record_pdf("pack-1", 0.25)
+
+    record = ledger.get("pack-1")
+    assert record["theme"] == "kiwi birds"
+    assert record["text_ms"] == 4000.0
+    assert record["prompt_tokens"] == 900
+    assert record["model_images"] == 1
+    assert record["pdf_ms"] == 250.0
+    assert record["detail"]["images"][0]["label"] == "Kiwi"
+
+    assert [row["theme"] for row in ledger.slowest_themes()][0] == "kiwi birds"
+    patterns = ledger.most_expensive_patterns()
+    assert patterns[0]["subject"] == "language"
+    assert patterns[0]["avg_tokens"] == 1200
+
+
+def test_generate_pack_sets_server_timing_and_records_cost(monkeypatch) -> None:
+    async def fake_generate_pack(theme: str, level: str, keywords: str, subject: str = "language", activity=None):
+        item = {
+            "order": 1,
+            "phase": "Whole Scene",
+            "image_role": "scene_intro",
+            "pedagogical_purpose": "Purpose",
+            "language_focus": "Focus",
+            "image_description": "Scene prompt",
+            "image_data_url": PNG_URL,
+        }
+        return {
+            "pack_id": "pack-ledger-1",
+            "generated_at": "2024-01-01T00:00:00+00:00",
+            "theme": theme,
+            "sentence_nzsl": "BIRD FLY",
+            "sentence_en": "The Bird flies.",
+            "teacher_tip": "Tip",
+            "pack_content": [item],
+            "scene_images": {slot: PNG_URL for slot in ("object", "action", "setting", "scene")},
+        }
+
+    monkeypatch.setattr("backend.pack_service.generate_pack", fake_generate_pack)
+    client = TestClient(app_module.app)
+
+    response = client.post("/api/generate_pack", json={"theme": "Ledger"})
+
+    assert response.status_code == 200
+    assert "pack;dur=" in response.headers["server-timing"]
+    assert "response_validation;dur=" in response.headers["server-timing"]
+    assert pack_service.cost_ledger.get("pack-ledger-1")["theme"] == "ledger"
+
+    pdf = client.get(response.json()["pdf_url"])
+    assert "pdf_render;dur=" in pdf.headers["server-timing"]
+    assert pack_service.cost_ledger.get("pack-ledger-1")["pdf_ms"] is not None
+
+
+def test_generate_pack_with_macron_theme_sends_ascii_server_timing(monkeypatch) -> None:
+    async def fake_call_text(theme: str, level: str, keywords: str, subject: str = "language", activity=None):
+        return {"semantic_components": [{"type": "agent", "label": theme, "nzsl_sign": "BIRD"}]}
+
+    async def fake_call_model(bucket, model, prompt, generation_config, on_text=None, timeout_secs=None):
+        return {"candidates": [{"content": {"parts": [{"inlineData": {"mimeType": "image/png", "data": PNG_URL.split(",")[1]}}]}}]}
+
+    monkeypatch.setattr("backend.llm.call_text", fake_call_text)
+    monkeypatch.setattr("backend.llm._call_model", fake_call_model)
+    client = TestClient(app_module.app)
+
+    response = client.post("/api/generate_pack", json={"theme": "Tūī"})
+
+    assert response.status_code == 200
+    assert "T%C5%AB%C4%AB noun (model," in response.headers["server-timing"]
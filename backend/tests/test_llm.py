@@ -1,5 +1,9 @@
+import asyncio
+import base64
+
 import pytest
 from backend import llm
+from backend.deadline import deadline_scope
 
 
 @pytest.mark.asyncio
@@ -22,7 +26,7 @@ async def test_generate_pack_builds_scene_images(monkeypatch):
             "language_steps": ["Noun: Nest (NEST)", "Verb: Fly (FLY)", "Location: Forest (FOREST)"],
         }
 
-    async def fake_generate_image(prompt: str, label: str):
+    async def fake_generate_image(prompt: str, label: str, role=None):
         return f"image://{label}"
 
     monkeypatch.setattr(llm, "call_text", fake_call_text)
@@ -37,3 +41,119 @@ async def test_generate_pack_builds_scene_images(monkeypatch):
     assert payload["pack_content"][-1]["image_data_url"] == "image://Birds scene"
     assert payload["teacher_tip"]
     assert payload["language_steps"][0].startswith("Noun:")
+
+
+@pytest.mark.asyncio
+async def test_generate_pack_substitutes_placeholders_at_deadline(monkeypatch):
+    async def fake_call_text(theme: str, level: str, keywords: str, subject: str = "language", activity=None):
+        return {"semantic_components": []}
+
+    cancelled = []
+
+    async def fake_generate_image(prompt: str, label: str, role=None):
+        if label.endswith("scene"):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(label)
+                raise
+        return f"image://{label}"
+
+    monkeypatch.setattr(llm, "call_text", fake_call_text)
+    monkeypatch.setattr(llm, "_generate_image", fake_generate_image)
+
+    with deadline_scope(0.2):
+        payload = await llm.generate_pack("Birds", "ECE", "")
+    await asyncio.sleep(0)
+
+    assert payload["scene_images"]["object"] == "image://Birds noun"
+    assert llm.is_placeholder_image(payload["scene_images"]["scene"])
+    assert cancelled == ["Birds scene"]
+
+
+@pytest.mark.asyncio
+async def test_speculative_images_overlap_the_text_call(monkeypatch):
+    from backend.fake_gemini import fake_png
+    from backend.metrics import SPECULATIVE_IMAGES
+
+    text_json = {
+        "semantic_components": [
+            {"type": "agent", "label": "Tūī", "nzsl_sign": "TUI"},
+            {"type": "action", "label": "Sing", "nzsl_sign": "SING"},
+            {"type": "setting", "label": "Forest", "nzsl_sign": "FOREST"},
+        ]
+    }
+    text_done = asyncio.Event()
+    image_calls = []
+
+    async def fake_call_text(theme: str, level: str, keywords: str, subject: str = "language", activity=None):
+        await asyncio.sleep(0.05)
+        text_done.set()
+        return text_json
+
+    async def fake_call_model(bucket, model, prompt, generation_config, on_text=None, timeout_secs=None):
+        image_calls.append((prompt, text_done.is_set()))
+        await asyncio.sleep(0.01)
+        data = base64.b64encode(fake_png(1_000 + len(image_calls))).decode()
+        return {"candidates": [{"content": {"parts": [{"inlineData": {"mimeType": "image/png", "data": data}}]}}]}
+
+    def speculated():
+        return {outcome: SPECULATIVE_IMAGES.value(kind="predicted", outcome=outcome) for outcome in ("hit", "wasted", "cancelled")}
+
+    monkeypatch.setattr(llm, "call_text", fake_call_text)
+    monkeypatch.setattr(llm, "_call_model", fake_call_model)
+    monkeypatch.setattr(llm.settings, "speculative_image_slots", "setting,scene")
+
+    # The request-only setting prompt differs from the planned one: the early image is paid for but not used
+    before = speculated()
+    await llm.generate_pack("Birds", "ECE", "garden")
+    assert len(image_calls) == 5
+    assert [started_after_text for _, started_after_text in image_calls].count(False) == 1
+    assert speculated() == {**before, "wasted": before["wasted"] + 1}
+
+    # When the prediction matches the plan, the early image is used with no extra model call
+    planned = llm._plan_pack(text_json, "Kiwi", "bush")["image_jobs"]
+    monkeypatch.setattr(llm, "_request_only_jobs", lambda *args: [job for job in planned if job["key"] == "location"])
+    image_calls.clear()
+    text_done.clear()
+    before = speculated()
+    payload = await llm.generate_pack("Kiwi", "ECE", "bush")
+    assert len(image_calls) == 4
+    assert [started_after_text for _, started_after_text in image_calls].count(False) == 1
+    assert speculated() == {**before, "hit": before["hit"] + 1}
+    assert not llm.is_placeholder_image(payload["scene_images"]["setting"])
+
+
+@pytest.mark.asyncio
+async def test_images_start_once_components_have_streamed(monkeypatch):
+    from backend.gemini_client import GeminiClient, set_client
+
+    text = (
+        '{"semantic_components": [{"type": "agent", "label": "Tūī", "nzsl_sign": "TUI"}], '
+        '"teacher_tip": "Sing along", "learning_prompts": ["Who sings?"]}'
+    )
+    text_done = asyncio.Event()
+    started_early = []
+
+    class StreamingClient(GeminiClient):
+        async def stream_generate_content(self, model, prompt, generation_config):
+            for start in range(0, len(text), 20):
+                yield {"candidates": [{"content": {"parts": [{"text": text[start : start + 20]}]}}]}
+                await asyncio.sleep(0.01)
+            text_done.set()
+
+    async def fake_generate_image(prompt: str, label: str, role=None):
+        if not text_done.is_set():
+            started_early.append(label)
+        return f"image://{label}"
+
+    monkeypatch.setattr(llm, "_generate_image", fake_generate_image)
+    set_client(StreamingClient())
+    try:
+        payload = await llm.generate_pack("Birds", "ECE", "forest")
+    finally:
+        set_client(None)
+
+    assert sorted(started_early) == ["Birds location", "Birds noun", "Birds scene", "Birds verb"]
+    assert payload["teacher_tip"]
+    assert payload["scene_images"]["object"] == "image://Birds noun"
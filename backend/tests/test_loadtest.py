@@ -0,0 +1,64 @@
+import base64
+import json
+from collections import Counter
+
+from fastapi.testclient import TestClient
+
+from backend.fake_gemini import FakeGeminiConfig, create_app
+from backend.loadtest import percentile, summarise
+
+
+def _generate(client: TestClient, model: str, text: str):
+    return client.post(
+        f"/v1beta/models/{model}:generateContent",
+        json={"contents": [{"role": "user", "parts": [{"text": text}]}], "generationConfig": {}},
+    )
+
+
+def pack_text(payload):
+    return payload["candidates"][0]["content"]["parts"][0]["text"]
+
+
+def test_fake_gemini_serves_text_and_images() -> None:
+    config = FakeGeminiConfig(text_latency_ms=0, image_latency_ms=0, image_bytes=3000, image_model="img", seed=1)
+    client = TestClient(create_app(config))
+
+    text = _generate(client, "txt", 'Create a pack for theme: "Kererū"').json()
+    pack = json.loads(text["candidates"][0]["content"]["parts"][0]["text"])
+    assert pack["semantic_components"][0]["label"] == "Kererū"
+    assert text["usageMetadata"]["promptTokenCount"] > 0
+
+    streamed = client.post(
+        "/v1beta/models/txt:streamGenerateContent?alt=sse",
+        json={"contents": [{"role": "user", "parts": [{"text": 'Create a pack for theme: "Kererū"'}]}]},
+    )
+    events = [json.loads(line[5:]) for line in streamed.text.splitlines() if line.startswith("data:")]
+    assert len(events) > 1
+    assert "".join(event["candidates"][0]["content"]["parts"][0]["text"] for event in events) == pack_text(text)
+
+    image = _generate(client, "img", "A kererū").json()
+    data = base64.b64decode(image["candidates"][0]["content"]["parts"][0]["inlineData"]["data"])
+    assert data.startswith(b"\x89PNG")
+
+
+def test_fake_gemini_injects_quota_errors() -> None:
+    config = FakeGeminiConfig(text_latency_ms=0, quota_rate=1.0, retry_after_secs=2)
+    client = TestClient(create_app(config))
+
+    response = _generate(client, "txt", "hello")
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "2"
+    assert client.get("/healthz").json()["throttled"] == 1
+
+
+def test_summarise_reports_percentiles_and_error_mix() -> None:
+    latencies = [i / 100 for i in range(1, 101)]  # 10ms .. 1000ms
+    result = summarise(latencies, Counter({"200": 100, "429": 4, "ReadTimeout": 1}), 50.0, {"rps": 2})
+
+    assert percentile([], 0.5) is None
+    assert result["latency_ms"]["p50"] == 500.0
+    assert result["latency_ms"]["p99"] == 990.0
+    assert result["throughput_rps"] == 2.0
+    assert result["outcomes"] == {"200": 100, "429": 4, "ReadTimeout": 1}
+    assert result["error_rate"] == round(5 / 105, 4)
@@ -0,0 +1,35 @@
+import pytest
+
+from backend.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    registry = Registry()
+    histogram = registry.register(Histogram("stage_seconds", "Stage time.", ["stage"], buckets=(0.1, 1.0)))
+    histogram.observe(0.05, stage="text")
+    histogram.observe(0.5, stage="text")
+    histogram.observe(5.0, stage="text")
+
+    body = registry.render()
+
+    assert 'stage_seconds_bucket{stage="text",le="0.1"} 1' in body
+    assert 'stage_seconds_bucket{stage="text",le="1"} 2' in body
+    assert 'stage_seconds_bucket{stage="text",le="+Inf"} 3' in body
+    assert 'stage_seconds_sum{stage="text"} 5.55' in body
+    assert 'stage_seconds_count{stage="text"} 3' in body
+
+
+def test_counter_and_gauge_render_and_validate_labels() -> None:
+    registry = Registry()
+    counter = registry.register(Counter("placeholders_total", "Placeholders.", ["reason"]))
+    registry.register(Gauge("in_flight", "In flight.", lambda: 3))
+    counter.inc(reason="error")
+    counter.inc(2, reason="error")
+
+    body = registry.render()
+
+    assert "# TYPE placeholders_total counter" in body
+    assert 'placeholders_total{reason="error"} 3' in body
+    assert "in_flight 3" in body
+    with pytest.raises(ValueError):
+        counter.inc(cause="error")
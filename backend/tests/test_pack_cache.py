@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from backend import pack_service
+from backend.pack_cache import SingleFlight, pack_cache_key
+from backend.schemas import GenerateRequest
+
+
+def test_pack_cache_key_normalises_request() -> None:
+    key = pack_cache_key(GenerateRequest(theme="Birds  in the Garden", keywords=" Tūī "))
+    assert key == pack_cache_key(GenerateRequest(theme="birds in the garden", keywords="tūī"))
+    assert key != pack_cache_key(GenerateRequest(theme="birds in the garden", keywords="tūī", subject="math"))
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_one_call() -> None:
+    flights = SingleFlight()
+    calls = 0
+
+    async def work() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "done"
+
+    results = await asyncio.gather(*(flights.do("same", work) for _ in range(5)))
+
+    assert results == ["done"] * 5
+    assert calls == 1
+    assert flights.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_generate_once(monkeypatch) -> None:
+    calls = 0
+
+    async def fake_build_pack_payload(req):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"pack_id": "pack-1", "scene_images": {"scene": "data:image/png;base64,AAAA"}}
+
+    monkeypatch.setattr(pack_service, "build_pack_payload", fake_build_pack_payload)
+    req = GenerateRequest(theme="Kai")
+
+    first, second = await asyncio.gather(
+        pack_service.cached_pack_payload(req),
+        pack_service.cached_pack_payload(GenerateRequest(theme="kai ")),
+    )
+    third = await pack_service.cached_pack_payload(req)
+
+    assert first == second == third
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_single_flight_cancels_work_when_last_waiter_leaves() -> None:
+    flights = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def work() -> str:
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "done"
+
+    first = asyncio.create_task(flights.do("same", work))
+    second = asyncio.create_task(flights.do("same", work))
+    await started.wait()
+
+    first.cancel()
+    await asyncio.sleep(0.01)
+    assert not cancelled.is_set()  # the second caller still wants the result
+
+    second.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
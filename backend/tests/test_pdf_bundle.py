@@ -0,0 +1,108 @@
+import re
+import zlib
+from typing import List, Tuple
+
+from fastapi.testclient import TestClient
+
+from backend import app as app_module
+from backend import pack_service
+from backend.assets import ImageAsset
+from backend.fake_gemini import fake_png
+from backend.pdf_bundle import PdfBundleWriter
+from backend.pdf_utils import build_single_page_pdf
+
+client = TestClient(app_module.app)
+
+
+def _assert_xref_matches_objects(pdf: bytes) -> int:
+    xref_offset = int(pdf.rsplit(b"startxref\n", 1)[1].split(b"\n")[0])
+    lines = pdf[xref_offset:].split(b"\n")
+    assert lines[0] == b"xref"
+    size = int(lines[1].split()[1])
+    for number in range(1, size):
+        offset = int(lines[2 + number][:10])
+        assert pdf[offset:].startswith(b"%d 0 obj" % number)
+    return size
+
+
+def _page_layout(pdf: bytes) -> Tuple[List[Tuple[float, float, bytes]], List[Tuple[float, ...]]]:
+    """The text lines `(x, y, text)` and image rectangles drawn by a one-page PDF's content stream."""
+    for stream in re.findall(rb"stream\r?\n(.*?)\r?\nendstream", pdf, re.S):
+        try:
+            content = zlib.decompress(stream)
+        except zlib.error:
+            continue  # image data
+        if b" Tj" in content:
+            text = [(float(x), float(y), line) for x, y, line in re.findall(rb"([\d.]+) ([\d.]+) Td \(((?:\\.|[^\\)])*)\) Tj", content)]
+            images = [tuple(float(n) for n in rect.split()) for rect in re.findall(rb"q ([\d. ]+) cm /\w+ Do Q", content)]
+            return text, images
+    raise AssertionError("no page content stream")
+
+
+def test_bundle_writer_streams_pages_and_shares_images() -> None:
+    bird = ImageAsset(fake_png(3_000), "image/png")
+    tree = ImageAsset(fake_png(4_000), "image/png")
+    writer = PdfBundleWriter()
+
+    chunks = [writer.start()]
+    for theme, images in [("Kererū", {"object": bird, "scene": tree}), ("Tūī", {"object": bird})]:
+        for image in images.values():
+            chunks.append(writer.add_image(image.digest, image))
+        keys = {slot: image.digest for slot, image in images.items()}
+        chunks.append(writer.add_page(theme, keys, "BIRD FLY (TREE)", "The bird flies."))
+    chunks.append(writer.finish())
+    pdf = b"".join(chunks)
+
+    assert pdf.startswith(b"%PDF-1.4") and pdf.endswith(b"%%EOF\n")
+    _assert_xref_matches_objects(pdf)
+    assert pdf.count(b"/Subtype /Image") == 2
+    assert (writer.page_count, writer.images_embedded, writer.images_reused) == (2, 2, 1)
+    assert b"/Count 2" in pdf
+
+
+def test_bundle_page_matches_single_page_layout() -> None:
+    bird = ImageAsset(fake_png(3_000), "image/png")
+    tree = ImageAsset(fake_png(4_000), "image/png")
+    images = {"object": bird, "action": tree, "setting": bird, "scene": tree}
+    nzsl = "BIRD FLY TREE AND THEN A LONG SENTENCE THAT WRAPS ONTO MORE LINES (TREE)"
+    en = "The bird flies to the tree, and then a long sentence that wraps too."
+
+    single = build_single_page_pdf("Kereru", images, nzsl, en)
+    writer = PdfBundleWriter()
+    chunks = [writer.start()] + [writer.add_image(image.digest, image) for image in images.values()]
+    chunks.append(writer.add_page("Kereru", {slot: image.digest for slot, image in images.items()}, nzsl, en))
+    chunks.append(writer.finish())
+
+    # The bundle hand-writes the page fpdf lays out; both must put every line and image in the same place
+    single_text, single_images = _page_layout(single)
+    bundle_text, bundle_images = _page_layout(b"".join(chunks))
+    assert [line for _, _, line in bundle_text] == [line for _, _, line in single_text]
+    assert len(single_text) == 6
+    for (bx, by, _), (sx, sy, _) in zip(bundle_text, single_text):
+        assert abs(bx - sx) < 0.1 and abs(by - sy) < 0.1
+    assert len(bundle_images) == len(single_images) == 4
+    for bundle_rect, single_rect in zip(bundle_images, single_images):
+        assert all(abs(b - s) < 0.1 for b, s in zip(bundle_rect, single_rect))
+
+
+def test_bundle_endpoint_streams_stored_packs() -> None:
+    image = ImageAsset(fake_png(2_000), "image/png")
+    for pack_id in ["pack-a", "pack-b"]:
+        pack_service.pack_store.save(
+            {
+                "pack_id": pack_id,
+                "theme": pack_id,
+                "sentence_nzsl": "KAI EAT",
+                "sentence_en": "Eat the kai.",
+                "scene_images": {"object": pack_service.asset_store.dehydrate(image), "scene": None},
+            }
+        )
+
+    response = client.post("/api/packs/bundle", json={"pack_ids": ["pack-a", "pack-b", "pack-a"]})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.content.count(b"/Type /Page ") == 3
+    assert response.content.count(b"/Subtype /Image") == 1
+    _assert_xref_matches_objects(response.content)
+    assert client.post("/api/packs/bundle", json={"pack_ids": ["pack-a", "pack-missing"]}).status_code == 404
@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from backend.pdf_pool import PdfRenderPool, PdfRenderQueueFull
+
+
+@pytest.mark.asyncio
+async def test_pdf_pool_renders_in_worker_process() -> None:
+    pool = PdfRenderPool(max_workers=1, max_queue=0)
+    try:
+        pdf_bytes = await pool.render("Birds", {}, "BIRD FLY", "The bird flies.")
+    finally:
+        pool.shutdown()
+
+    assert pdf_bytes.startswith(b"%PDF")
+    assert pool.renders == 1
+    assert pool.last_render_ms > 0
+
+
+@pytest.mark.asyncio
+async def test_pdf_pool_rejects_when_queue_is_full() -> None:
+    pool = PdfRenderPool(max_workers=0, max_queue=0)
+    first = asyncio.create_task(pool.render("Birds", {}, "BIRD", "Bird."))
+    await asyncio.sleep(0)
+
+    with pytest.raises(PdfRenderQueueFull):
+        await pool.render("Kai", {}, "KAI", "Kai.")
+
+    assert (await first).startswith(b"%PDF")
+    assert pool.rejected == 1
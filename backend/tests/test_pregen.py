@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+from backend import pack_service
+from backend.assets import ImageAsset
+from backend.fake_gemini import fake_png
+from backend.gemini_client import GeminiError
+from backend.pack_cache import PackCache, pack_cache_key
+from backend.schemas import GenerateRequest
+from backend.pregen import Pregenerator, load_catalogue, read_checkpoint
+
+
+def test_load_catalogue_expands_levels_and_subjects(tmp_path) -> None:
+    catalogue = tmp_path / "themes.csv"
+    catalogue.write_text("theme,level,subject\nBirds,,\nKai,Y1-2,science\n  birds ,,\n", encoding="utf-8")
+
+    requests = load_catalogue(catalogue, ["ECE", "Y1-2"], ["language"])
+
+    assert [(req.theme, req.level, req.subject) for req in requests] == [
+        ("Birds", "ECE", "language"),
+        ("Birds", "Y1-2", "language"),
+        ("Kai", "Y1-2", "science"),
+    ]
+
+
+def test_pregenerator_fills_cache_retries_quota_and_resumes(tmp_path, monkeypatch) -> None:
+    image = ImageAsset(fake_png(1_000), "image/png")
+    calls = []
+
+    async def fake_generate_pack(theme, level, keywords, subject="language", activity=None):
+        calls.append(theme)
+        if theme == "Kai" and calls.count("Kai") == 1:
+            raise RuntimeError("Text generation error") from GeminiError("quota", status_code=429, retry_after=0.01)
+        if theme == "Broken":
+            raise RuntimeError("Text generation error: bad JSON")
+        return {
+            "pack_id": f"pack-{theme.lower()}",
+            "generated_at": "2024-01-01T00:00:00+00:00",
+            "theme": theme,
+            "sentence_nzsl": "KAI EAT",
+            "sentence_en": "Eat the kai.",
+            "teacher_tip": "Tip",
+            "pack_content": [],
+            "scene_images": {"object": image, "action": image, "setting": image, "scene": image},
+        }
+
+    monkeypatch.setattr("backend.pack_service.generate_pack", fake_generate_pack)
+    catalogue = tmp_path / "themes.csv"
+    catalogue.write_text("theme\nBirds\nKai\nBroken\n", encoding="utf-8")
+    requests = load_catalogue(catalogue, ["ECE"], ["language"])
+    checkpoint = tmp_path / "themes.checkpoint.jsonl"
+
+    counts = asyncio.run(Pregenerator(checkpoint, concurrency=2).run(requests))
+
+    assert counts == {"skipped": 0, "generated": 2, "failed": 1}
+    assert calls.count("Kai") == 2
+    assert pack_service.pack_cache.get(pack_cache_key(requests[0])) is not None
+    assert read_checkpoint(checkpoint) == {pack_cache_key(requests[0]), pack_cache_key(requests[1])}
+
+    calls.clear()
+    counts = asyncio.run(Pregenerator(checkpoint, concurrency=2).run(requests))
+
+    assert counts == {"skipped": 2, "failed": 1}
+    assert calls == ["Broken"]
+
+
+def test_rerun_after_cache_expiry_regenerates(tmp_path, monkeypatch) -> None:
+    image = ImageAsset(fake_png(1_000), "image/png")
+    calls = []
+
+    async def fake_generate_pack(theme, level, keywords, subject="language", activity=None):
+        calls.append(theme)
+        return {
+            "pack_id": f"pack-{theme.lower()}-{len(calls)}",
+            "generated_at": "2024-01-01T00:00:00+00:00",
+            "theme": theme,
+            "sentence_nzsl": "KAI EAT",
+            "sentence_en": "Eat the kai.",
+            "teacher_tip": "Tip",
+            "pack_content": [],
+            "scene_images": {"object": image, "action": image, "setting": image, "scene": image},
+        }
+
+    now = [time.time()]
+    monkeypatch.setattr("backend.pack_service.generate_pack", fake_generate_pack)
+    monkeypatch.setattr(pack_service, "pack_cache", PackCache(tmp_path / "packs", ttl_secs=60, clock=lambda: now[0]))
+    monkeypatch.setattr(pack_service.settings, "pack_cache_ttl_secs", 60)
+    requests = [GenerateRequest(theme="Birds")]
+    checkpoint = tmp_path / "themes.checkpoint.jsonl"
+    assert asyncio.run(Pregenerator(checkpoint).run(requests)) == {"skipped": 0, "generated": 1}
+
+    # Past the TTL both the checkpoint entry and the cached pack have expired
+    now[0] += 120
+    monkeypatch.setattr(time, "time", lambda: now[0])
+
+    assert pack_service.pack_cache.get(pack_cache_key(requests[0])) is None
+    assert read_checkpoint(checkpoint) == set()
+    assert asyncio.run(Pregenerator(checkpoint).run(requests)) == {"skipped": 0, "generated": 1}
+    assert calls == ["Birds", "Birds"]
@@ -0,0 +1,88 @@
+from typing import Any, Dict
+
+import pytest
+
+from backend import llm
+from backend.gemini_client import GeminiClient, GeminiError, set_client
+from backend.rate_limit import QuotaExceededError, RateLimiter
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_is_shared_through_the_database(tmp_path) -> None:
+    clock = FakeClock()
+    budgets = {"image": (60, 2)}  # one token per second, burst of two
+    worker_a = RateLimiter(tmp_path / "rl.sqlite3", budgets, clock=clock)
+    worker_b = RateLimiter(tmp_path / "rl.sqlite3", budgets, clock=clock)
+
+    assert worker_a.try_acquire("image") == 0
+    assert worker_b.try_acquire("image") == 0
+    assert worker_a.try_acquire("image") == pytest.approx(1.0)
+
+    clock.now += 1
+    assert worker_b.try_acquire("image") == 0
+    assert worker_a.try_acquire("text") == 0  # unconfigured buckets are unlimited
+
+
+def test_throttle_blocks_every_worker_with_growing_backoff(tmp_path) -> None:
+    clock = FakeClock()
+    budgets = {"image": (600, 10)}
+    worker_a = RateLimiter(tmp_path / "rl.sqlite3", budgets, backoff_base_secs=2, backoff_max_secs=8, clock=clock)
+    worker_b = RateLimiter(tmp_path / "rl.sqlite3", budgets, backoff_base_secs=2, backoff_max_secs=8, clock=clock)
+
+    assert worker_a.record_throttle("image", retry_after=5) == 5
+    assert worker_b.try_acquire("image") == pytest.approx(5.0)
+
+    # Without Retry-After the shared penalty doubles (2s -> 4s -> 8s cap) with ±20% jitter
+    clock.now += 5
+    assert 3.2 <= worker_b.record_throttle("image") <= 4.8
+    assert 6.4 <= worker_a.record_throttle("image") <= 9.6
+    assert 6.4 <= worker_b.record_throttle("image") <= 9.6
+
+
+@pytest.mark.asyncio
+async def test_acquire_gives_up_after_max_wait(tmp_path) -> None:
+    limiter = RateLimiter(tmp_path / "rl.sqlite3", {"text": (1, 1)})
+    await limiter.acquire("text", max_wait=0.1)
+    with pytest.raises(QuotaExceededError):
+        await limiter.acquire("text", max_wait=0.1)
+
+
+@pytest.mark.asyncio
+async def test_call_model_retries_after_429() -> None:
+    class FlakyClient(GeminiClient):
+        def __init__(self) -> None:
+            self.calls = 0
+
+        async def generate_content(self, model: str, prompt: str, generation_config: Dict[str, Any]) -> Dict[str, Any]:
+            self.calls += 1
+            if self.calls == 1:
+                raise GeminiError("Gemini API error 429: quota", status_code=429, retry_after=0.01)
+            return {"candidates": []}
+
+    client = FlakyClient()
+    set_client(client)
+    try:
+        assert await llm._call_model("image", "image-model", "A bird", {}) == {"candidates": []}
+    finally:
+        set_client(None)
+
+    assert client.calls == 2
+    assert llm.rate_limiter.throttles == 1
+
+
+def test_reserve_leaves_headroom_for_interactive_calls(tmp_path) -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(tmp_path / "rl.sqlite3", {"image": (60, 4)}, clock=clock)
+
+    assert limiter.try_acquire("image", reserve=2) == 0  # a full bucket always admits
+    assert limiter.try_acquire("image", reserve=2) == 0
+    # Two tokens left: batch work waits, interactive work goes ahead
+    assert limiter.try_acquire("image", reserve=2) == pytest.approx(1.0)
+    assert limiter.try_acquire("image") == 0
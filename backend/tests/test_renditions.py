@@ -0,0 +1,40 @@
+import io
+
+from PIL import Image
+
+from backend.renditions import RenditionCache
+
+
+def _png(size: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.radial_gradient("L").resize((size, size)).convert("RGBA").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_renditions_shrink_and_are_cached_by_digest(tmp_path) -> None:
+    cache = RenditionCache(tmp_path, max_bytes=10_000_000, ttl_secs=60)
+    original = _png(1024)
+
+    thumb, thumb_mime = cache.get_or_create(original, "image/png", "thumb")
+    pdf_image, pdf_mime = cache.get_or_create(original, "image/png", "pdf")
+
+    assert thumb_mime == "image/webp"
+    assert pdf_mime == "image/jpeg"
+    assert len(thumb) < len(original) / 4
+    with Image.open(io.BytesIO(thumb)) as image:
+        assert max(image.size) <= 384
+    with Image.open(io.BytesIO(pdf_image)) as image:
+        assert image.mode == "RGB"
+        assert max(image.size) <= 768
+
+    hits_before = cache.cache.hits
+    assert cache.get_or_create(original, "image/png", "thumb") == (thumb, thumb_mime)
+    assert cache.cache.hits == hits_before + 1
+
+
+def test_non_raster_and_undecodable_images_pass_through(tmp_path) -> None:
+    cache = RenditionCache(tmp_path, max_bytes=10_000_000, ttl_secs=60)
+    svg = b"<svg xmlns='http://www.w3.org/2000/svg'/>"
+
+    assert cache.get_or_create(svg, "image/svg+xml", "thumb") == (svg, "image/svg+xml")
+    assert cache.get_or_create(b"not a png", "image/png", "pdf") == (b"not a png", "image/png")
@@ -0,0 +1,41 @@
+import pytest
+
+from backend import llm
+from backend.gemini_client import GeminiClient, set_client
+from backend.replay import RecordingGeminiClient, ReplayGeminiClient
+
+
+class ScriptedClient(GeminiClient):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def generate_content(self, model, prompt, generation_config):
+        self.calls += 1
+        if model == llm.settings.image_model:
+            part = {"inlineData": {"mimeType": "image/png", "data": "cG5n"}}
+        else:
+            part = {"text": '{"semantic_components": [], "language_steps": ["Noun: Kiwi (KIWI)"]}'}
+        return {"candidates": [{"content": {"parts": [part]}}]}
+
+
+@pytest.mark.asyncio
+async def test_recorded_responses_replay_without_network(tmp_path) -> None:
+    live = ScriptedClient()
+    set_client(RecordingGeminiClient(live, tmp_path))
+    try:
+        recorded_text = await llm.call_text("Kiwi", "ECE", "")
+        recorded_image = await llm._generate_image("A kiwi", "Kiwi noun")
+        assert live.calls == 2
+        assert len(list(tmp_path.glob("*.json"))) == 2
+
+        llm.image_cache.max_bytes = 0  # make the replayed image come from the fixture
+        replay = ReplayGeminiClient(tmp_path)
+        set_client(replay)
+        assert await llm.call_text("Kiwi", "ECE", "") == recorded_text
+        assert await llm._generate_image("A kiwi", "Kiwi noun") == recorded_image
+
+        # Unrecorded prompts fail deterministically and fall back to a placeholder
+        assert llm.is_placeholder_image(await llm._generate_image("A tūī", "Tūī noun"))
+        assert replay.misses == 1
+    finally:
+        set_client(None)
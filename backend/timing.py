@@ -0,0 +1,98 @@
+import time
+from urllib.parse import quote
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from .metrics import STAGE_SECONDS
+
+
+class PackTimings:
+    """Per-request attribution of where a pack's time, bytes and tokens went."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: List[Dict[str, Any]] = []
+        self.images: List[Dict[str, Any]] = []
+        self.usage: Dict[str, Dict[str, int]] = {}
+
+    def add_stage(self, name: str, secs: float) -> None:
+        self.stages.append({"name": name, "ms": round(secs * 1000, 1)})
+
+    def add_image(self, label: str, secs: float, size: int, source: str) -> None:
+        self.images.append({"label": label, "ms": round(secs * 1000, 1), "bytes": size, "source": source})
+
+    def add_usage(self, model: str, usage_metadata: Optional[Dict[str, Any]], images: int = 0) -> None:
+        totals = self.usage.setdefault(model, {"calls": 0, "prompt_tokens": 0, "output_tokens": 0, "images": 0})
+        usage_metadata = usage_metadata or {}
+        totals["calls"] += 1
+        totals["prompt_tokens"] += int(usage_metadata.get("promptTokenCount") or 0)
+        totals["output_tokens"] += int(usage_metadata.get("candidatesTokenCount") or 0)
+        totals["images"] += images
+
+    def stage_ms(self, name: str) -> float:
+        return round(sum(stage["ms"] for stage in self.stages if stage["name"] == name), 1)
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+    def server_timing(self) -> str:
+        """Render a `Server-Timing` header value, one metric per stage and image."""
+        entries = [f"{stage['name']};dur={stage['ms']}" for stage in self.stages]
+        for index, image in enumerate(self.images):
+            # Header values must be latin-1 without line breaks, and labels carry the user's theme
+            desc = quote(f"{image['label']} ({image['source']}, {image['bytes']} B)", safe=" ()',:-_.")
+            entries.append(f'image-{index};dur={image["ms"]};desc="{desc}"')
+        entries.append(f"total;dur={self.elapsed_ms()}")
+        return ", ".join(entries)
+
+
+_current_timings: ContextVar[Optional[PackTimings]] = ContextVar("tohu_pack_timings", default=None)
+
+
+def current_timings() -> Optional[PackTimings]:
+    return _current_timings.get()
+
+
+@contextmanager
+def collect_timings() -> Iterator[PackTimings]:
+    """
+    Collect timings for this context and the tasks it spawns. Nested scopes
+    share the outer collector so an endpoint sees what the pipeline recorded.
+    """
+    existing = _current_timings.get()
+    if existing is not None:
+        yield existing
+        return
+    timings = PackTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+@contextmanager
+def timed_stage(name: str) -> Iterator[None]:
+    """Time a pipeline stage into the stage histogram and the current request's timings."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add_stage(name, elapsed)
+
+
+def record_image(label: str, secs: float, size: int, source: str) -> None:
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add_image(label, secs, size, source)
+
+
+def record_usage(model: str, usage_metadata: Optional[Dict[str, Any]], images: int = 0) -> None:
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add_usage(model, usage_metadata, images)
@@ -0,0 +1,73 @@
+"""
+Worker process for queued pack generation.
+
+Run one or more alongside the web process:
+
+    python -m backend.worker --concurrency 2 --batch-concurrency 1
+
+Interactive jobs are always claimed before batch jobs, and at most
+`--batch-concurrency` batch jobs run at once so a term plan never fills
+every slot.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+from typing import Set
+
+from .app import job_queue, run_job
+from .jobs import PRIORITY_BATCH, PRIORITY_INTERACTIVE
+from .gemini_client import close_client
+
+logger = logging.getLogger("tohu-kaiako")
+
+
+async def run_worker(concurrency: int, poll_interval: float, batch_concurrency: int = 1) -> None:
+    """
+    Claim and run jobs until cancelled, keeping at most `concurrency` in
+    flight, of which at most `batch_concurrency` are batch jobs.
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    running: Set["asyncio.Task[None]"] = set()
+    batch_running: Set["asyncio.Task[None]"] = set()
+    logger.info(f"Worker {worker_id} started with concurrency {concurrency} ({batch_concurrency} for batches)")
+    try:
+        while True:
+            if len(running) >= concurrency:
+                await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            max_priority = PRIORITY_BATCH if len(batch_running) < batch_concurrency else PRIORITY_INTERACTIVE
+            job = await asyncio.to_thread(job_queue.claim, worker_id, max_priority)
+            if job is None:
+                await asyncio.sleep(poll_interval)
+                continue
+            logger.info(f"Worker {worker_id} claimed {job['job_id']}")
+            task = asyncio.create_task(run_job(job))
+            running.add(task)
+            task.add_done_callback(running.discard)
+            if job["priority"] >= PRIORITY_BATCH:
+                batch_running.add(task)
+                task.add_done_callback(batch_running.discard)
+    finally:
+        for task in list(running):
+            task.cancel()
+        await close_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process queued Tohu Kaiako pack jobs.")
+    parser.add_argument("--concurrency", type=int, default=2, help="Jobs to run at once in this process.")
+    parser.add_argument(
+        "--batch-concurrency", type=int, default=1, help="Batch (term plan) jobs to run at once in this process."
+    )
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_worker(args.concurrency, args.poll_interval, args.batch_concurrency))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
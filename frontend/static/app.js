@@ -272,6 +272,7 @@ const sortPackContent = (pack) => [...pack.pack_content].sort((a, b) => (a.order
 const createCardMarkup = (item) => {
   const stepBadge = `${item.order}️⃣`;
   const imageSrc = item.image_data_url || "";
+  const missingLabel = state.generating ? "Drawing picture…" : "Image unavailable";
   return `
     <article class="rounded-xl border border-gray-200 bg-white shadow hover:shadow-lg transition flex flex-col">
       <div class="p-5 space-y-3 flex flex-col flex-grow">
@@ -283,8 +284,8 @@ const createCardMarkup = (item) => {
         <figure class="relative aspect-square w-full overflow-hidden rounded-lg border border-gray-200 bg-gray-100">
           ${
             imageSrc
-              ? `<img src="${imageSrc}" alt="${item.phase} illustration" class="h-full w-full object-cover" />`
-              : `<span class="absolute inset-0 grid place-content-center text-xs text-gray-400">Image unavailable</span>`
+              ? `<a href="${item.image_original_url || imageSrc}" target="_blank" rel="noopener" title="Open full-size picture"><img src="${imageSrc}" alt="${item.phase} illustration" class="h-full w-full object-cover" /></a>`
+              : `<span class="absolute inset-0 grid place-content-center text-xs text-gray-400">${missingLabel}</span>`
           }
         </figure>
         <p class="text-xs font-medium text-sky-700 uppercase tracking-wide">${item.language_focus}</p>
@@ -312,7 +313,7 @@ const renderPrintCards = (pack) => {
         <div class="h-48 bg-gray-100 border border-gray-200 rounded-lg overflow-hidden flex items-center justify-center">
           ${
             item.image_data_url
-              ? `<img src="${item.image_data_url}" alt="${item.phase} illustration" class="h-full w-full object-cover" />`
+              ? `<img src="${item.image_original_url || item.image_data_url}" alt="${item.phase} illustration" class="h-full w-full object-cover" />`
               : `<span class="text-xs text-gray-400 text-center px-2">Image unavailable</span>`
           }
         </div>
@@ -340,6 +341,19 @@ const renderPack = (pack) => {
   elements.packDisplay.classList.remove("hidden");
 };
 
+const applyStreamedImage = ({ orders = [], image_data_url: imageUrl, image_original_url: originalUrl }) => {
+  const pack = state.currentPack;
+  if (!pack) return;
+  pack.pack_content.forEach((item) => {
+    if (orders.includes(item.order)) {
+      item.image_data_url = imageUrl;
+      item.image_original_url = originalUrl || imageUrl;
+    }
+  });
+  renderPackCards(pack);
+  renderPrintCards(pack);
+};
+
 const renderPrintView = (pack) => {
   elements.printTitle.textContent = pack.theme;
   elements.printSubtitle.textContent = `Resource generated ${formatDateTime(pack.generated_at)}`;
@@ -432,10 +446,10 @@ const renderRevisitList = () => {
 
 const downloadPdf = () => {
   const pack = state.currentPack;
-  if (!pack?.pdf_base64) return;
+  if (!pack?.pdf_url && !pack?.pdf_base64) return;
   const link = document.createElement("a");
   const safeTheme = (pack.theme || "tohu-kaiako").replace(/[^a-z0-9]+/gi, "-").toLowerCase();
-  link.href = `data:application/pdf;base64,${pack.pdf_base64}`;
+  link.href = pack.pdf_url || `data:application/pdf;base64,${pack.pdf_base64}`;
   link.download = `${safeTheme || "learning-pack"}.pdf`;
   link.click();
 };
@@ -460,6 +474,35 @@ const generatePayload = () => {
   return payload;
 };
 
+const readEventStream = async (response, onEvent) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let eventName = "message";
+      const dataLines = [];
+      block.split("\n").forEach((line) => {
+        if (line.startsWith("event:")) {
+          eventName = line.slice(6).trim();
+        } else if (line.startsWith("data:")) {
+          dataLines.push(line.slice(5).trim());
+        }
+      });
+      if (dataLines.length) {
+        onEvent(eventName, JSON.parse(dataLines.join("\n")));
+      }
+      boundary = buffer.indexOf("\n\n");
+    }
+  }
+};
+
 const handleGeneratePack = async () => {
   if (state.generating) return;
   const payload = generatePayload();
@@ -473,7 +516,7 @@ const handleGeneratePack = async () => {
   setLoading(true);
 
   try {
-    const response = await fetch("/api/generate_pack", {
+    const response = await fetch("/api/generate_pack/stream?image_mode=ref", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify(payload),
@@ -491,9 +534,23 @@ const handleGeneratePack = async () => {
       throw new Error(detail);
     }
 
-    const pack = await response.json();
+    let pack = null;
+    await readEventStream(response, (eventName, data) => {
+      if (eventName === "text") {
+        renderPack(data);
+      } else if (eventName === "image") {
+        applyStreamedImage(data);
+      } else if (eventName === "pack") {
+        pack = data;
+        renderPack(pack);
+      } else if (eventName === "error") {
+        throw new Error(data.detail || "Generation failed. Please try again.");
+      }
+    });
+    if (!pack) {
+      throw new Error("Generation failed. Please try again.");
+    }
     addPackToHistory(pack);
-    renderPack(pack);
     setError("");
   } catch (error) {
     console.error("Pack generation failed", error);